@@ -5,8 +5,12 @@ Module for mixin of basic crud methods based on api_path class method.
 """
 
 import robottelo.api.base as base
+import threading
 
-from robottelo.common.helpers import sleep_for_seconds
+from robottelo.api.utils import paginate
+from robottelo.cleanup import registry
+from robottelo.common import conf
+from robottelo.common.helpers import TaskPoller
 from robottelo.common.records import ManyRelatedField, RelatedField
 
 
@@ -77,14 +81,153 @@ def resolve_path_arg(arg, data):
     return data[arg]
 
 
+class PathTemplate(object):
+    """Compiled api path, with its arguments and their accessors,
+
+    >>> template = PathTemplate("/api/org/:org.label/test/:id")
+    >>> template.args
+    ['org.label', 'id']
+    >>> template.render({"org.label": "org123", "id": "456"})
+    '/api/org/org123/test/456'
+
+    Use PathTemplate.compile to compile each path once.
+    """
+
+    _compiled = {}
+    _lock = threading.Lock()
+
+    def __init__(self, path):
+        self.path = path
+        self.parts = path.split('/')
+        # (index of the part, argument) pairs
+        self.slots = [
+            (index, part[1:]) for index, part in enumerate(self.parts)
+            if part.startswith(":")
+            ]
+        self.args = [arg for _, arg in self.slots]
+        self.accessors = [(arg, arg.split(".")) for arg in self.args]
+
+    @classmethod
+    def compile(cls, path):
+        """Returns the template of path, compiling it on the first call"""
+        template = cls._compiled.get(path)
+        if template is None:
+            with cls._lock:
+                template = cls._compiled.setdefault(path, cls(path))
+        return template
+
+    def resolve(self, data):
+        """Returns the value of each argument of the path in data,
+        as resolve_path_arg does
+        """
+        values = {}
+        for arg, keys in self.accessors:
+            value = data
+            for key in keys:
+                value = value[key]
+            values[arg] = value
+        return values
+
+    def render(self, args):
+        """Returns the path with its arguments taken out of args"""
+        parts = self.parts[:]
+        for index, arg in self.slots:
+            if arg not in args:
+                raise NameError("Expecting {0} as an argument.".format(arg))
+            parts[index] = str(args.pop(arg))
+        return "/".join(parts)
+
+
+class ResolutionCache(object):
+    """Records found or created by resolve_or_create_record,
+    kept for the whole run, by record class, user and identifying fields:
+    the id of the record, or else its search fields and path arguments.
+
+    Cached records are returned without any request. They are forgotten
+    once removed by record_remove, and the whole cache is cleared whenever
+    :data:`robottelo.cleanup.registry` deletes entities. Records deleted by
+    other means stay cached: clear the cache after deleting them.
+
+    The cache can be disabled with the ``main.api.resolve_cache``
+    configuration property set to ``0``.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled():
+        """Whether records are cached"""
+        return conf.properties.get('main.api.resolve_cache', '1') == '1'
+
+    @staticmethod
+    def key(record, user=None):
+        """Returns the cache key of record,
+        or None if it has no hashable identifying fields
+        """
+        api = record._meta.api_class
+        try:
+            path_args = tuple(sorted(api.record_path_args(record).items()))
+            if "id" in record:
+                fields = (("id", record.id),)
+            else:
+                fields = tuple(sorted(api.search_dict(record).items()))
+            user_key = (user.login, user.password) if user else None
+            key = (type(record), user_key, fields, path_args)
+            hash(key)
+        except (KeyError, AttributeError, TypeError):
+            return None
+        return key
+
+    def get(self, key):
+        """Returns a copy of the cached record, or None"""
+        with self._lock:
+            record = self._records.get(key)
+        return None if record is None else record.copy()
+
+    def put(self, key, record):
+        """Caches a copy of record"""
+        with self._lock:
+            self._records[key] = record.copy()
+
+    def discard(self, record_class, uid):
+        """Forgets the records of record_class with the given id,
+        once removed
+        """
+        with self._lock:
+            for key, record in self._records.items():
+                if (key[0] is record_class and "id" in record and
+                        unicode(record.id) == unicode(uid)):
+                    del self._records[key]
+
+    def clear(self):
+        """Forgets every record"""
+        with self._lock:
+            self._records.clear()
+
+
+#: The records resolved or created by resolve_or_create_record.
+resolved = ResolutionCache()  # (bad var name) pylint: disable=C0103
+registry.subscribe(resolved.clear)
+
+
 def resolve_or_create_record(record, user=None):
     """On recieving record, that has api_class implemented,
     it checks if it exists and if not, creates it.
+    Found and created records are cached in :data:`resolved`.
     """
-    if ApiCrud.record_exists(record, user=user):
-        return ApiCrud.record_resolve(record, user=user)
-    else:
-        return ApiCrud.record_create_recursive(record, user=user)
+    key = ResolutionCache.key(record, user) if resolved.enabled() else None
+    if key is not None:
+        found = resolved.get(key)
+        if found is not None:
+            return found
+    found = ApiCrud.record_find(record, user=user)
+    if found is None:
+        found = ApiCrud.record_create_recursive(record, user=user)
+    if key is not None:
+        resolved.put(key, found)
+    return found
 
 
 def data_load_transform(instance_cls, data):
@@ -153,6 +296,13 @@ class ApiCrud(object):
         except NotImplementedError:
             return json[u'id']
 
+    @classmethod
+    def path_template(cls, path=None):
+        """Returns the compiled template of path, api_path by default"""
+        if path is None:
+            path = cls.get_api_path()
+        return PathTemplate.compile(path)
+
     @classmethod
     def list_path_args(cls, _path=None):
         """Lists all path arguments
@@ -163,12 +313,12 @@ class ApiCrud(object):
         >>> TestApi.list_path_args()
         ['org.label','id']
         """
-        path = cls.get_api_path()
-        if _path is not None:
-            path = _path
-        return [
-            s[1:] for s in path.split('/') if s.startswith(":")
-        ]
+        return list(cls.path_template(_path).args)
+
+    @classmethod
+    def record_path_args(cls, instance):
+        """Resolves the values of all path arguments from instance"""
+        return cls.path_template().resolve(instance)
 
     @classmethod
     def search_dict(cls, instance):
@@ -184,14 +334,7 @@ class ApiCrud(object):
         >>> TestApi.parse_path_arg({'org.label':"org123","id":"456"})
         '/api/org/org123/test/456'
         """
-        path_args = cls.list_path_args(path)
-        for arg in path_args:
-            if arg in args:
-                path = path.replace(":{0}".format(arg), str(args[arg]))
-                del args[arg]
-            else:
-                raise NameError("Expecting {0} as an argument.".format(arg))
-        return path
+        return cls.path_template(path).render(args)
 
     @classmethod
     def list(cls, **kwargs):
@@ -272,17 +415,24 @@ class ApiCrud(object):
     @classmethod
     def record_exists(cls, instance, user=None):
         """Checks if record is resolveable."""
+        return cls.record_find(instance, user=user) is not None
+
+    @classmethod
+    def record_find(cls, instance, user=None):
+        """Gets the record by its id, or name, with a single query,
+        returns None if it doesn't exist
+        """
         if cls != instance._meta.api_class:
             api = instance._meta.api_class
-            return api.record_exists(instance, user=user)
+            return api.record_find(instance, user=user)
 
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-        )
+        path_args = cls.record_path_args(instance)
 
+        json = None
         if "id" in instance:
             res = cls.show(instance.id, user=user, **path_args)
-            return res.ok
+            if res.ok:
+                json = res.json()
         else:
             try:
                 res = cls.list(
@@ -290,15 +440,19 @@ class ApiCrud(object):
                     user=user,
                     **path_args)
             except NameError:
-                return False
+                return None
 
-            # TODO better separete kattelo and formam api
             if res.ok:
-                if "results" in res.json():
-                    return len(res.json()["results"]) > 0
-                return len(res.json()) > 0
-            else:
-                return False
+                # TODO better separete kattelo and formam api
+                results = res.json()
+                if "results" in results:
+                    results = results["results"]
+                if len(results) > 0:
+                    json = results[0]
+
+        if json is None:
+            return None
+        return load_from_data(type(instance), json, data_load_transform)
 
     @classmethod
     def record_remove(cls, instance, user=None):
@@ -307,13 +461,12 @@ class ApiCrud(object):
             api = instance._meta.api_class
             return api.record_remove(instance, user=user)
 
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-            )
+        path_args = cls.record_path_args(instance)
 
         if "id" in instance:
             res = cls.delete(instance.id, user=user, **path_args)
             if res.ok:
+                resolved.discard(type(instance), instance.id)
                 return True
             else:
                 raise ApiException(
@@ -339,67 +492,42 @@ class ApiCrud(object):
         """Gets information by records id, or name
         and parses it into new record
         """
+        ninstance = cls.record_find(instance, user=user)
+        if ninstance is None:
+            raise ApiException("Couldn't resolve record", instance)
+        return ninstance
+
+    @classmethod
+    def record_iter(cls, instance, user=None, per_page=None, prefetch=None):
+        """Yields every record of the same type as instance,
+        fetching them one page at a time,
+        see :func:`robottelo.api.utils.paginate`
+        """
         if cls != instance._meta.api_class:
             api = instance._meta.api_class
-            return api.record_resolve(instance, user=user)
+            return api.record_iter(
+                instance, user=user, per_page=per_page, prefetch=prefetch)
 
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-            )
+        path_args = cls.record_path_args(instance)
 
-        res = None
-        json = None
-        if "id" in instance:
-            res = cls.show(instance.id, user=user, **path_args)
-            if res.ok:
-                json = res.json()
-        else:
+        def fetch(page, size):
+            """Fetches one page of records"""
             res = cls.list(
-                json=cls.search_dict(instance),
-                user=user,
-                **path_args)
-
-            if res.ok:
-                # TODO better separete kattelo and formam api
-                if "results" in res.json():
-                    json = res.json()["results"][0]
-                else:
-                    json = res.json()[0]
-
-        if res.ok and json:
-            ninstance = load_from_data(
-                type(instance),
-                json,
-                data_load_transform
-                )
-            return ninstance
-        else:
-            raise ApiException(
-                "Couldn't resolve record", instance, res)
+                json=dict(page=page, per_page=size),
+                user=user, **path_args)
+            if not res.ok:
+                raise ApiException("Couldn't list records", instance, res)
+            return res.json()
+
+        return (
+            load_from_data(instance.__class__, js, default_data_transform)
+            for js in paginate(fetch, per_page, prefetch)
+        )
 
     @classmethod
     def record_list(cls, instance, user=None):
-        if cls != instance._meta.api_class:
-            api = instance._meta.api_class
-            return api.record_list(instance, user=user)
-
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-            )
-
-        counting_response = cls.list(user=user, **path_args)
-        if counting_response.ok:
-            count = int(counting_response.json()["total"])
-            if count > 0:
-                listing_response = cls.list(
-                    json=dict(per_page=count),
-                    user=user, **path_args)
-                if listing_response.ok:
-                    return [
-                        load_from_data(
-                            instance.__class__, js, default_data_transform
-                        ) for js in listing_response.json()["results"]
-                    ]
+        """Lists every record of the same type as instance"""
+        return list(cls.record_iter(instance, user=user))
 
     @classmethod
     def record_resolve_recursive(cls, instance, user=None):
@@ -434,9 +562,7 @@ class ApiCrud(object):
             api = instance._meta.api_class
             return api.record_update(instance, user=user)
 
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-            )
+        path_args = cls.record_path_args(instance)
 
         if "id" not in instance:
             res = cls.list(json=dict(search="name="+instance.name), user=user)
@@ -486,9 +612,7 @@ class ApiCrud(object):
             return api.record_create(instance_orig, user=user)
         instance = instance_orig.copy()
 
-        path_args = dict(
-            (k, resolve_path_arg(k, instance)) for k in cls.list_path_args()
-            )
+        path_args = cls.record_path_args(instance)
 
         data = dict(
             (name, field) for name, field in instance.items()
@@ -501,6 +625,14 @@ class ApiCrud(object):
                 type(instance),
                 res.json(),
                 data_load_transform)
+            if "id" in ninstance:
+                created = instance.copy()
+                created.id = ninstance.id
+                registry.add(
+                    type(instance).__name__,
+                    ninstance.id,
+                    lambda: cls.record_remove(created, user=user),
+                    dict(instance.items()))
             return ninstance
         else:
             raise ApiException(
@@ -567,14 +699,21 @@ class Task(object):
         self.json = response.json()
 
     def poll(self, delay, timeout):
-        """Busy wait for task to complete"""
-        current = 0
-        finished = False
-        while (not finished) and current < timeout:
-            sleep_for_seconds(delay)
-            current += delay
+        """Wait for task to complete, checking it at most every ``delay``
+        seconds, and at most ``timeout`` seconds. The poller used is kept in
+        ``self.poller``.
+        """
+        def read():
+            """Reloads and returns task data"""
             self.refresh()
-            finished = (self.json["result"] != 'pending')
+            return self.json
+
+        self.poller = TaskPoller(
+            read,
+            finished=lambda json: json["result"] != 'pending',
+            timeout=timeout,
+            max_delay=delay)
+        self.poller.poll()
 
     def result(self):
         return self.json["result"]
@@ -1,9 +1,9 @@
 # -*- encoding: utf-8 -*-
 """Utility wrappers for the ``requests`` library."""
+from robottelo.api import client
 from robottelo.common import conf
 import json as js
 import logging
-import requests
 
 logger = logging.getLogger("robottelo")
 
@@ -12,6 +12,9 @@ def request(method, **kwargs):
     """A wrapper around the ``requests.request`` function that provides default
     values for ``domain``, ``auth`` and ``json``, adding new params for each.
 
+    The request is sent through a pooled session, see
+    :func:`robottelo.api.client.get_session`.
+
     :param method: method for the new ``Request`` object.
     :param url: URL for the new ``Request`` object.
     :param domain: set to main.server.hostname as default
@@ -80,7 +83,8 @@ def request(method, **kwargs):
         url,
         kwargs)
     logger.debug("Calling %s", request_command)
-    res = requests.request(method=method, url=url, **kwargs)
+    res = client._call_requests_request(  # pylint:disable=W0212
+        method, url, **kwargs)
     curl_command = "curl -X {0} {1}  -u {2}:{3} {4} -d {5}".format(
         res.request.method,
         "" if kwargs["verify"] else "-k",
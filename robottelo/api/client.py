@@ -19,15 +19,30 @@ arguments passed to them in any way, nor do they do anything else such as
 logging. They exist soley to ease unit testing: each one can be overridden in a
 unit test for mocking purposes.
 
+Requests are sent through pooled ``requests.Session`` objects, so that HTTP
+keep-alive connections, and their TLS handshake, are reused between requests.
+There is a session per base URL, credentials and ``verify`` option, see
+:func:`get_session`. Only connections are reused: pooled sessions never
+store cookies, such as Foreman's ``_session_id``, so each request is
+authenticated by its own credentials only. Set the ``main.api.pool``
+configuration property to ``0`` to send each request on a new connection, as
+plain ``requests`` functions do.
+
 .. _Requests: http://docs.python-requests.org/en/latest/
 .. _functions from:
     http://docs.python-requests.org/en/latest/api/#main-interface
 
 """
+from requests.adapters import HTTPAdapter
+from robottelo.common import conf
 from urllib import urlencode
+from urlparse import urlsplit
+import atexit
+import cookielib
 import json
 import logging
 import requests
+import threading
 
 
 logger = logging.getLogger(__name__)  # (bad var name) pylint: disable=C0103
@@ -157,39 +172,130 @@ def _log_response(response):
     )
 
 
+_adapters = {}
+_adapters_lock = threading.Lock()
+_local = threading.local()
+
+
+def _session_key(url, auth=None, verify=True):
+    """Return the key of the session to use for ``url``.
+
+    :return: A ``(scheme, netloc, auth, verify)`` tuple.
+    :rtype: tuple
+
+    """
+    parts = urlsplit(url)
+    if isinstance(auth, list):
+        auth = tuple(auth)
+    return (parts.scheme, parts.netloc, auth, verify)
+
+
+def _get_adapter(key):
+    """Return the transport adapter shared by the sessions for ``key``.
+
+    The adapter holds the pool of keep-alive connections. Its size is set by
+    the ``main.api.pool_connections`` and ``main.api.pool_maxsize``
+    configuration properties.
+
+    """
+    with _adapters_lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            adapter = HTTPAdapter(
+                pool_connections=int(conf.properties.get(
+                    'main.api.pool_connections', 10)),
+                pool_maxsize=int(conf.properties.get(
+                    'main.api.pool_maxsize', 10)),
+            )
+            _adapters[key] = adapter
+        return adapter
+
+
+def get_session(url, auth=None, verify=True):
+    """Return a pooled ``requests.Session`` for ``url``.
+
+    There is a session per base URL, credentials and ``verify`` option. As
+    sessions are not thread-safe, each thread gets its own sessions, but the
+    connections are pooled between threads. Sessions reject every cookie, so
+    that no request is authenticated by the cookies of a previous one.
+
+    :param str url: The URL to send requests to.
+    :param auth: The credentials used, such as ``('username', 'password')``.
+    :param verify: The ``verify`` option of the requests.
+    :rtype: requests.Session
+
+    """
+    key = _session_key(url, auth, verify)
+    sessions = _local.__dict__.setdefault('sessions', {})
+    session = sessions.get(key)
+    if session is None:
+        session = requests.Session()
+        session.cookies.set_policy(
+            cookielib.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = _get_adapter(key)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        sessions[key] = session
+    return session
+
+
+def close_sessions():
+    """Close every pooled connection."""
+    with _adapters_lock:
+        for adapter in _adapters.values():
+            adapter.close()
+        _adapters.clear()
+    _local.__dict__.pop('sessions', None)
+
+
+atexit.register(close_sessions)
+
+
+def _requester(url, kwargs):
+    """Return the object sending a request to ``url`` with ``kwargs``.
+
+    It is either a pooled session or, if the ``main.api.pool`` configuration
+    property is ``0``, the ``requests`` module.
+
+    """
+    if conf.properties.get('main.api.pool') == '0':
+        return requests
+    return get_session(url, kwargs.get('auth'), kwargs.get('verify', True))
+
+
 def _call_requests_request(method, url, **kwargs):
     """Call ``requests.request``."""
-    return requests.request(method, url, **kwargs)
+    return _requester(url, kwargs).request(method, url, **kwargs)
 
 
 def _call_requests_head(url, **kwargs):
     """Call ``requests.head``."""
-    return requests.head(url, **kwargs)
+    return _requester(url, kwargs).head(url, **kwargs)
 
 
 def _call_requests_get(url, **kwargs):
     """Call ``requests.get``."""
-    return requests.get(url, **kwargs)
+    return _requester(url, kwargs).get(url, **kwargs)
 
 
 def _call_requests_post(url, data=None, **kwargs):
     """Call ``requests.post``."""
-    return requests.post(url, data, **kwargs)
+    return _requester(url, kwargs).post(url, data, **kwargs)
 
 
 def _call_requests_put(url, data=None, **kwargs):
     """Call ``requests.put``."""
-    return requests.put(url, data, **kwargs)
+    return _requester(url, kwargs).put(url, data, **kwargs)
 
 
 def _call_requests_patch(url, data=None, **kwargs):
     """Call ``requests.patch``."""
-    return requests.patch(url, data, **kwargs)
+    return _requester(url, kwargs).patch(url, data, **kwargs)
 
 
 def _call_requests_delete(url, **kwargs):
     """Call ``requests.delete``."""
-    return requests.delete(url, **kwargs)
+    return _requester(url, kwargs).delete(url, **kwargs)
 
 
 def request(method, url, **kwargs):
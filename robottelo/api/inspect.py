@@ -1,23 +1,201 @@
 """This module contains functions that ease the process of inpecting API
 information from the Foreman server.
 
+The apidoc is several megabytes big and only changes when the server is
+upgraded, so :func:`get_api_doc` keeps it in memory and in a cache directory
+on disk, set by the ``main.api.apidoc_cache`` configuration property
+(``~/.cache/robottelo/apidoc`` by default, an empty value disables it). Cache
+entries are keyed by the server URL and by the server version reported by
+``/api/status``, and are revalidated with a conditional request.
+
 """
+import hashlib
+import json
+import logging
+import os
 import requests
+import tempfile
 
-from robottelo.common.helpers import get_server_url
+from robottelo.common import conf
+from robottelo.common.helpers import get_server_credentials, get_server_url
 from urlparse import urljoin
 
 
-def get_api_doc():
+#: The apidoc of each server URL, once read.
+_api_docs = {}
+
+#: The last ``(api_doc, ApiDocIndex)`` pair built by :func:`index_api_doc`.
+_last_index = [None, None]
+
+
+def _cache_dir():
+    """Return the apidoc cache directory, or ``None`` if it is disabled."""
+    path = conf.properties.get(
+        'main.api.apidoc_cache', '~/.cache/robottelo/apidoc')
+    if not path:
+        return None
+    return os.path.expanduser(path)
+
+
+def _server_version(server_url):
+    """Return the version reported by ``/api/status``, or ``None``."""
+    logger = logging.getLogger('robottelo')
+    try:
+        response = requests.get(
+            urljoin(server_url, '/api/status'),
+            auth=get_server_credentials(),
+            verify=False,
+        )
+    except requests.exceptions.RequestException as err:
+        logger.warning(
+            'Could not read the version of %s: %s', server_url, err)
+        return None
+    if not response.ok:
+        logger.warning(
+            'Could not read the version of %s: status code %s',
+            server_url, response.status_code)
+        return None
+    try:
+        return response.json().get('version')
+    except ValueError:
+        logger.warning(
+            'Could not read the version of %s: invalid JSON', server_url)
+        return None
+
+
+def _cache_path(cache_dir, server_url, version):
+    """Return the path of the cache entry for ``server_url`` at ``version``.
+    """
+    key = hashlib.sha1(
+        u'{0}\n{1}'.format(server_url, version).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key + '.json')
+
+
+def _read_cache(path):
+    """Return the cache entry at ``path``, or ``None`` if it is unusable."""
+    try:
+        with open(path) as handle:
+            entry = json.load(handle)
+        entry['docs']  # pylint:disable=W0104
+    except (IOError, ValueError, KeyError, TypeError):
+        return None
+    return entry
+
+
+def _write_cache(path, entry):
+    """Write the cache entry at ``path`` atomically."""
+    directory = os.path.dirname(path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as temp_file:
+            json.dump(entry, temp_file)
+        os.rename(temp_path, path)
+    except (IOError, OSError):
+        logging.getLogger('robottelo').warning(
+            'Could not write the apidoc cache %s', path)
+
+
+def get_api_doc(use_cache=True):
     """Go to Foreman server and grabs and returns its apidoc information
 
+    The apidoc is read once per process. When the disk cache is enabled and
+    holds the apidoc of the server's current version, it is only downloaded
+    again if the server answers the conditional request with new content.
+
+    :param bool use_cache: Whether to use the memory and disk caches.
     :return: A dictionary with the apidoc information
     :rtype: dict
 
     """
+    server_url = get_server_url()
+    if use_cache and server_url in _api_docs:
+        return _api_docs[server_url]
+
+    cache_dir = _cache_dir() if use_cache else None
+    path = entry = None
+    headers = {}
+    if cache_dir is not None:
+        path = _cache_path(
+            cache_dir, server_url, _server_version(server_url))
+        entry = _read_cache(path)
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
     response = requests.get(
-        urljoin(get_server_url(), '/apidoc/v2.json'), verify=False)
-    return response.json()['docs']
+        urljoin(server_url, '/apidoc/v2.json'),
+        headers=headers,
+        verify=False,
+    )
+    if entry is not None and response.status_code == 304:
+        api_doc = entry['docs']
+    else:
+        api_doc = response.json()['docs']
+        if path is not None:
+            _write_cache(path, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'docs': api_doc,
+            })
+    if use_cache:
+        _api_docs[server_url] = api_doc
+    return api_doc
+
+
+class ApiDocIndex(object):
+    """An index of the resources, methods and params of an apidoc.
+
+    :param dict api_doc: The apidoc, as returned by :func:`get_api_doc`.
+
+    """
+    def __init__(self, api_doc):
+        #: The methods of each resource, by name.
+        self.methods = {}
+        #: The params of each ``(resource, method)`` pair, by name.
+        self.params = {}
+        for resource, info in api_doc['resources'].items():
+            methods = self.methods[resource] = {}
+            for method in info['methods']:
+                methods[method['name']] = method
+                self.params[(resource, method['name'])] = dict(
+                    (param['name'], param) for param in method['params'])
+
+    def method(self, resource, name):
+        """Return the method ``name`` of ``resource``, or ``None``."""
+        return self.methods.get(resource, {}).get(name)
+
+    def param(self, resource, method, name):
+        """Return the param ``name`` of a method, or ``None``."""
+        return self.params.get((resource, method), {}).get(name)
+
+    def resources_with(self, method):
+        """Return the names of the resources having the method ``method``."""
+        return [
+            resource for resource, methods in self.methods.items()
+            if method in methods
+        ]
+
+
+def index_api_doc(api_doc=None):
+    """Return the :class:`ApiDocIndex` of ``api_doc``.
+
+    The index of the last apidoc is kept, so indexing the apidoc returned by
+    :func:`get_api_doc` again is free.
+
+    :param dict api_doc: An apidoc. It is requested from the server if not
+        provided.
+    :rtype: ApiDocIndex
+
+    """
+    if api_doc is None:
+        api_doc = get_api_doc()
+    if _last_index[0] is not api_doc:
+        _last_index[:] = [api_doc, ApiDocIndex(api_doc)]
+    return _last_index[1]
 
 
 def get_resource_create_info(api_doc=None):
@@ -32,13 +210,13 @@ def get_resource_create_info(api_doc=None):
     """
     if api_doc is None:
         api_doc = get_api_doc()
+    index = index_api_doc(api_doc)
 
     entities = {}
 
-    for resource in api_doc['resources']:
-        for method in api_doc['resources'][resource]['methods']:
-            if method['name'] == u'create':
-                entities[resource] = {}
-                entities[resource]['apis'] = method['apis']
-                entities[resource]['params'] = method['params']
+    for resource in index.resources_with(u'create'):
+        method = index.method(resource, u'create')
+        entities[resource] = {}
+        entities[resource]['apis'] = method['apis']
+        entities[resource]['params'] = method['params']
     return entities
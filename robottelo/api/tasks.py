@@ -0,0 +1,259 @@
+"""Waiting for many Foreman tasks at once.
+
+Repository synchronizations, content view publications and many other API
+calls start asynchronous Foreman tasks. Rather than polling each task on its
+own, a :class:`TaskWaiter` collects the outstanding task IDs and polls all of
+them with a single ``bulk_search`` request per interval. The interval grows
+while no task finishes, and shrinks back as soon as one does::
+
+    waiter = TaskWaiter()
+    futures = [waiter.add(task_id) for task_id in task_ids]
+    for future in futures:
+        print future.result()['result']
+
+:func:`wait_for_tasks` waits for a list of tasks with a shared waiter.
+
+"""
+from robottelo.api import client
+from robottelo.common.helpers import get_server_credentials
+from robottelo.entities import ForemanTask, TaskTimeout
+import logging
+import threading
+import time
+
+
+class TaskFuture(object):
+    """The outcome of a Foreman task, set once the task is finished.
+
+    :param str task_id: The UUID of the task.
+
+    """
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self._task = None
+        self._error = None
+        self._callbacks = []
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def done(self):
+        """Tell whether the task is finished, or timed out."""
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the task to finish and return it.
+
+        :param int timeout: The maximum number of seconds to wait for. Wait
+            as long as the waiter does if ``None``.
+        :return: Information about the finished task.
+        :rtype: dict
+        :raises robottelo.entities.TaskTimeout: If the task is not finished
+            in time.
+
+        """
+        if not self._done.wait(timeout):
+            raise TaskTimeout(
+                'Timed out waiting for task {0}'.format(self.task_id))
+        if self._error is not None:
+            raise self._error
+        return self._task
+
+    def add_done_callback(self, callback):
+        """Call ``callback(future)`` once the task is finished.
+
+        ``callback`` is called right away if the task is already finished,
+        or else by the thread of the waiter.
+
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _set(self, task=None, error=None):
+        """Set the outcome of the task and run the callbacks."""
+        with self._lock:
+            self._task = task
+            self._error = error
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:  # pylint:disable=W0703
+                logging.getLogger('robottelo').exception(
+                    'Callback of task %s failed', self.task_id)
+
+
+class TaskWaiter(object):
+    """Polls the outstanding Foreman tasks with ``bulk_search`` requests.
+
+    A background thread polls the tasks while some are outstanding. After
+    each poll which finishes no task, the interval between two polls is
+    multiplied by ``backoff``, up to ``max_poll_rate``. It goes back to
+    ``poll_rate`` when a task finishes or is added.
+
+    :param tuple auth: A ``(username, password)`` pair. If ``None``, the
+        credentials returned by
+        :func:`robottelo.common.helpers.get_server_credentials` are used.
+    :param float poll_rate: The shortest interval between two polls, in
+        seconds.
+    :param float max_poll_rate: The longest interval between two polls.
+    :param float backoff: The growth factor of the interval.
+
+    """
+    def __init__(self, auth=None, poll_rate=1, max_poll_rate=10, backoff=1.5):
+        self.auth = auth
+        self.poll_rate = poll_rate
+        self.max_poll_rate = max_poll_rate
+        self.backoff = backoff
+        self.requests = 0
+        self.logger = logging.getLogger('robottelo')
+        # task ID: list of (future, deadline) tuples
+        self._tasks = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._delay = poll_rate
+        self._last_poll = 0
+
+    def add(self, task_id, timeout=120, callback=None):
+        """Wait for the task ``task_id`` in the background.
+
+        :param str task_id: The UUID of a Foreman task.
+        :param int timeout: The number of seconds after which the future
+            fails with :class:`robottelo.entities.TaskTimeout`.
+        :param callback: A callable given to
+            :meth:`TaskFuture.add_done_callback`. Optional.
+        :rtype: TaskFuture
+
+        """
+        future = TaskFuture(task_id)
+        if callback is not None:
+            future.add_done_callback(callback)
+        with self._condition:
+            self._tasks.setdefault(task_id, []).append(
+                (future, time.time() + timeout))
+            self._delay = self.poll_rate
+            if self._thread is None:
+                self._last_poll = time.time()
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return future
+
+    def wait(self, task_ids, timeout=120):
+        """Wait for several tasks.
+
+        :return: Information about the finished tasks, in the order of
+            ``task_ids``.
+        :rtype: list
+        :raises robottelo.entities.TaskTimeout: If a task is not finished in
+            time.
+
+        """
+        futures = [self.add(task_id, timeout) for task_id in task_ids]
+        return [future.result() for future in futures]
+
+    def _run(self):
+        """Poll the outstanding tasks until none is left."""
+        while True:
+            with self._condition:
+                while True:
+                    if not self._tasks:
+                        self._thread = None
+                        return
+                    remaining = self._last_poll + self._delay - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                task_ids = list(self._tasks)
+                self._last_poll = time.time()
+            try:
+                tasks = self._poll(task_ids)
+            except Exception:  # pylint:disable=W0703
+                self.logger.exception('Could not poll tasks %s', task_ids)
+                tasks = {}
+            self._settle(tasks)
+
+    def _settle(self, tasks):
+        """Resolve the futures of the finished and timed out tasks.
+
+        :param dict tasks: Information about tasks, by ID.
+
+        """
+        now = time.time()
+        settled = []
+        with self._condition:
+            finished = False
+            for task_id, waiting in self._tasks.items():
+                task = tasks.get(task_id)
+                if task is not None and not task['pending']:
+                    settled.extend(
+                        (future, task, None) for future, _ in waiting)
+                    del self._tasks[task_id]
+                    finished = True
+                    continue
+                for future, deadline in waiting[:]:
+                    if deadline <= now:
+                        waiting.remove((future, deadline))
+                        settled.append((future, None, TaskTimeout(
+                            'Timed out polling task {0}'.format(task_id))))
+                if not waiting:
+                    del self._tasks[task_id]
+            if finished:
+                self._delay = self.poll_rate
+            else:
+                self._delay = min(
+                    self._delay * self.backoff, self.max_poll_rate)
+        for future, task, error in settled:
+            future._set(task, error)  # pylint:disable=W0212
+
+    def _poll(self, task_ids):
+        """Read the tasks ``task_ids`` with one ``bulk_search`` request.
+
+        :return: Information about the tasks found, by ID.
+        :rtype: dict
+
+        """
+        auth = self.auth
+        if auth is None:
+            auth = get_server_credentials()
+        response = client.post(
+            ForemanTask().path(which='bulk_search'),
+            {'searches': [
+                {'type': 'task', 'task_id': task_id, 'search_id': task_id}
+                for task_id in task_ids
+            ]},
+            auth=auth,
+            verify=False,
+        )
+        self.requests += 1
+        response.raise_for_status()
+        tasks = {}
+        for search in response.json():
+            for task in search['results']:
+                tasks[task['id']] = task
+        return tasks
+
+
+_waiters = {}
+_waiters_lock = threading.Lock()
+
+
+def get_waiter(auth=None):
+    """Return the waiter shared by the callers using ``auth``."""
+    with _waiters_lock:
+        if auth not in _waiters:
+            _waiters[auth] = TaskWaiter(auth)
+        return _waiters[auth]
+
+
+def wait_for_tasks(task_ids, timeout=120, auth=None):
+    """Wait for the Foreman tasks ``task_ids`` with a shared waiter.
+
+    See :meth:`TaskWaiter.wait`.
+
+    """
+    return get_waiter(auth).wait(task_ids, timeout)
@@ -1,6 +1,8 @@
 """Module containing convenience functions for working with the API."""
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
 from robottelo.api import client
-from robottelo.common import helpers
+from robottelo.common import conf, helpers
 from urlparse import urljoin
 
 
@@ -12,58 +14,209 @@ class RepositoryErrataException(Exception):
     """Indicates that a repository's errata could not be fetched."""
 
 
-def get_errata(repository_id):
-    """Return all erratums belonging to repository ``repository_id``.
+def paginate(fetch, per_page=None, prefetch=None):
+    """Yield the results of a paginated listing, one at a time.
+
+    Pages are fetched one after another until ``subtotal`` (or ``total``)
+    results are returned, or until an empty page. Pages may hold fewer
+    results than asked for, as servers cap the page size of some listings.
+    Only when the response holds no total does a page smaller than its
+    ``per_page`` (the one reported by the server, else the one asked for)
+    end the listing. While the results of a page are consumed, the next page
+    is fetched in a background thread if ``prefetch`` is true. Nothing is
+    fetched before the first result is asked for.
+
+    :param fetch: A callable taking the ``page`` number, starting at 1, and
+        the ``per_page`` page size, and returning the decoded JSON response,
+        a dict with a ``results`` list.
+    :param int per_page: The number of results per page. Defaults to the
+        ``main.api.per_page`` configuration property, or 100.
+    :param bool prefetch: Whether to fetch the next page in the background.
+        Defaults to the ``main.api.prefetch`` configuration property, or
+        ``True``.
+    :return: A generator of results.
 
-    :param int repository_id: A repository ID.
-    :return: That repository's errata.
-    :rtype: list
-    :raises robottelo.api.utils.RepositoryErrataException: If an error occurs
-        while fetching the requested repository's errata.
+    """
+    if per_page is None:
+        per_page = int(conf.properties.get('main.api.per_page', 100))
+    if prefetch is None:
+        prefetch = conf.properties.get('main.api.prefetch', '1') == '1'
+    executor = ThreadPool(1) if prefetch else None
+    try:
+        page = 1
+        seen = 0
+        following = None
+        while True:
+            if following is None:
+                response = fetch(page, per_page)
+            else:
+                response = following.get()
+            results = response['results']
+            seen += len(results)
+            total = response.get('subtotal', response.get('total'))
+            if not results:
+                last = True
+            elif total is not None:
+                last = seen >= int(total)
+            else:
+                last = len(results) < int(
+                    response.get('per_page') or per_page)
+            following = None
+            if not last and executor is not None:
+                following = executor.apply_async(fetch, (page + 1, per_page))
+            for result in results:
+                yield result
+            if last:
+                return
+            page += 1
+    finally:
+        if executor is not None:
+            executor.close()
+            executor.join()
+
+
+def _repository_content(repository_id, content, exception, per_page,
+                        prefetch):
+    """Yield the ``content`` of repository ``repository_id``, page by page.
+
+    :param str content: ``packages`` or ``errata``.
+    :param exception: The exception raised if a page cannot be fetched.
 
     """
     path = urljoin(
         helpers.get_server_url(),
-        'katello/api/v2/repositories/{0}/errata'.format(repository_id)
+        'katello/api/v2/repositories/{0}/{1}'.format(repository_id, content)
     )
-    response = client.get(
-        path,
-        auth=helpers.get_server_credentials(),
-        verify=False,
-    ).json()
-    if 'errors' in response.keys():
-        raise RepositoryErrataException(
-            'Error received after issuing GET to {0}. Error received: {1}'
-            ''.format(path, response['errors'])
-        )
-    return response['results']
-
-
-def get_packages(repository_id):
-    """Return all packages belonging to repository ``repository_id``.
+    auth = helpers.get_server_credentials()
+
+    def fetch(page, size):
+        """Return the page ``page`` of content."""
+        response = client.get(
+            path,
+            auth=auth,
+            params={'page': page, 'per_page': size},
+            verify=False,
+        ).json()
+        if 'errors' in response.keys():
+            raise exception(
+                'Error received after issuing GET to {0}. Error received: {1}'
+                ''.format(path, response['errors'])
+            )
+        return response
+
+    return paginate(fetch, per_page, prefetch)
+
+
+def get_errata(repository_id, per_page=None, prefetch=None):
+    """Yield all erratums belonging to repository ``repository_id``.
+
+    The errata are fetched one page at a time, see :func:`paginate`, so only
+    one or two pages are in memory at once.
+
+    :param int repository_id: A repository ID.
+    :param int per_page: The number of errata per page.
+    :param bool prefetch: Whether to fetch the next page in the background.
+    :return: A generator of that repository's errata.
+    :raises robottelo.api.utils.RepositoryErrataException: If an error occurs
+        while fetching the requested repository's errata.
+
+    """
+    return _repository_content(
+        repository_id, 'errata', RepositoryErrataException, per_page,
+        prefetch)
+
+
+def get_packages(repository_id, per_page=None, prefetch=None):
+    """Yield all packages belonging to repository ``repository_id``.
+
+    The packages are fetched one page at a time, see :func:`paginate`, so
+    only one or two pages are in memory at once.
 
     :param int repository_id: A repository ID.
-    :return: That repository's packages.
-    :rtype: list
+    :param int per_page: The number of packages per page.
+    :param bool prefetch: Whether to fetch the next page in the background.
+    :return: A generator of that repository's packages.
     :raises robottelo.api.utils.RepositoryPackagesException: If an error occurs
         while fetching the requested repository's packages.
 
     """
-    path = urljoin(
-        helpers.get_server_url(),
-        'katello/api/v2/repositories/{0}/packages'.format(repository_id)
+    return _repository_content(
+        repository_id, 'packages', RepositoryPackagesException, per_page,
+        prefetch)
+
+
+#: The difference between two collections of content, as sets of keys:
+#: those found ``only_first``, ``only_second``, and in ``both``.
+ContentDiff = namedtuple('ContentDiff', ('only_first', 'only_second', 'both'))
+
+
+def package_nvra(package):
+    """Return the ``(name, version, release, arch)`` tuple of ``package``."""
+    return (
+        package['name'],
+        package['version'],
+        package['release'],
+        package['arch'],
     )
-    response = client.get(
-        path,
-        auth=helpers.get_server_credentials(),
-        verify=False,
-    ).json()
-    if 'errors' in response.keys():
-        raise RepositoryPackagesException(
-            'Error received after issuing GET to {0}. Error received: {1}'
-            ''.format(path, response['errors'])
-        )
-    return response['results']
+
+
+def erratum_id(erratum):
+    """Return the ID of ``erratum``, such as ``RHSA-2014:0001``."""
+    return erratum.get('errata_id') or erratum['id']
+
+
+def package_set(repository_id):
+    """Return the NVRA tuples of the packages of ``repository_id``.
+
+    :rtype: frozenset
+
+    """
+    return frozenset(
+        package_nvra(package) for package in get_packages(repository_id))
+
+
+def errata_set(repository_id):
+    """Return the IDs of the errata of ``repository_id``.
+
+    :rtype: frozenset
+
+    """
+    return frozenset(
+        erratum_id(erratum) for erratum in get_errata(repository_id))
+
+
+def diff_content(first, second):
+    """Compare two collections of content keys.
+
+    :param first: An iterable of keys, such as NVRA tuples or erratum IDs.
+    :param second: Another iterable of keys.
+    :rtype: ContentDiff
+
+    """
+    first = first if isinstance(first, (set, frozenset)) else frozenset(first)
+    second = (
+        second if isinstance(second, (set, frozenset)) else frozenset(second))
+    return ContentDiff(first - second, second - first, first & second)
+
+
+def diff_packages(first_repository_id, second_repository_id):
+    """Compare the packages of two repositories by NVRA.
+
+    :rtype: ContentDiff
+
+    """
+    return diff_content(
+        package_set(first_repository_id), package_set(second_repository_id))
+
+
+def diff_errata(first_repository_id, second_repository_id):
+    """Compare the errata of two repositories by ID.
+
+    :rtype: ContentDiff
+
+    """
+    return diff_content(
+        errata_set(first_repository_id), errata_set(second_repository_id))
 
 
 def status_code_error(path, desired, response):
@@ -0,0 +1,313 @@
+"""Tracking and deletion of the entities created by tests.
+
+Every entity created by :mod:`robottelo.factory`,
+:mod:`robottelo.cli.factory` or
+:meth:`robottelo.api.apicrud.ApiCrud.record_create` is recorded in
+:data:`registry`, along with the entities it references. Deleting them
+afterwards keeps the server from accumulating orphaned entities, which slow
+down every ``list`` and ``search`` request.
+
+:meth:`CleanupRegistry.cleanup` deletes an entity only after all of the
+entities referencing it, with up to ``main.cleanup.workers`` deletions at
+once (5 by default). The content of an organization, such as its products,
+repositories and lifecycle environments, is not deleted one entity at a
+time when the organization itself is deleted: deleting the organization
+deletes its content.
+
+The ``main.cleanup`` configuration property sets when the entities created
+by :class:`robottelo.test.TestCase` tests are deleted: after each ``test``,
+after each test ``class``, or at the end of the test ``run``. They are not
+deleted by default.
+
+Entities created within :meth:`CleanupRegistry.suppressed`, such as the
+entities kept by :mod:`robottelo.pool`, are not recorded: they outlive the
+test which happens to be running when they are created.
+
+"""
+from collections import namedtuple, OrderedDict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from robottelo.common import conf
+import atexit
+import logging
+import Queue
+import re
+import threading
+
+
+logger = logging.getLogger(__name__)  # (bad var name) pylint: disable=C0103
+
+#: The kind of organizations.
+ORGANIZATION = 'organization'
+
+#: The kinds of entities deleted along with their organization.
+ORGANIZATION_CONTENT = frozenset((
+    'activationkey',
+    'contentview',
+    'contentviewdefinition',
+    'customproduct',
+    'customrepository',
+    'environmentkatello',
+    'gpg',
+    'gpgkey',
+    'hostcollection',
+    'hostcollectiondeforg',
+    'lifecycleenvironment',
+    'product',
+    'repository',
+    'syncplan',
+    'systemgroup',
+))
+
+#: The number of entities deleted by :meth:`CleanupRegistry.cleanup`:
+#: ``deleted`` one at a time, ``covered`` by the deletion of their
+#: organization, and ``failed``. ``failed`` includes the entities not deleted
+#: because an entity referencing them could not be deleted.
+CleanupReport = namedtuple('CleanupReport', ('deleted', 'covered', 'failed'))
+
+
+def kind(name):
+    """Return the kind of entity called ``name``.
+
+    Names are compared regardless of case, hyphens and underscores, so
+    ``LifecycleEnvironment``, ``lifecycle-environment`` and
+    ``lifecycle_environment`` are the same kind.
+
+    """
+    return re.sub('[^a-z0-9]', '', name.lower())
+
+
+def _references(fields):
+    """Yield the ``(kind, id)`` keys referenced by ``fields``.
+
+    Fields named like ``product_id`` or ``organization-ids`` reference
+    entities of the ``product`` and ``organization`` kinds.
+
+    """
+    for name, value in fields.items():
+        match = re.match(r'(.+)[-_]ids?$', name)
+        if match is None or value is None:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for uid in values:
+            if uid is not None and not isinstance(uid, dict):
+                yield kind(match.group(1)), unicode(uid)
+
+
+def _delete(entities, referrers, workers):
+    """Delete ``entities`` in reverse topological order.
+
+    An entity is deleted once all of the entities referencing it are. The
+    entities referenced by an entity which cannot be deleted are not.
+
+    :param dict entities: The entities to delete, by key.
+    :param dict referrers: The keys of the entities referencing each key.
+    :param int workers: The maximum number of entities deleted at once.
+    :return: The number of entities which were not deleted.
+
+    """
+    references = dict((key, set()) for key in entities)
+    for key, keys in referrers.items():
+        for referrer in keys:
+            references[referrer].add(key)
+    ready = [key for key in entities if not referrers[key]]
+    done = Queue.Queue()
+
+    def run(key):
+        """Delete an entity and queue its key, and whether it failed."""
+        try:
+            entities[key].delete()
+        except Exception:  # pylint:disable=W0703
+            logger.exception('Could not delete %s %s', *key)
+            done.put((key, True))
+        else:
+            done.put((key, False))
+
+    pool = ThreadPool(workers) if workers > 1 and len(entities) > 1 else None
+    running = 0
+    failed = set()
+    try:
+        while ready or running:
+            while ready:
+                running += 1
+                if pool is None:
+                    run(ready.pop())
+                else:
+                    pool.apply_async(run, (ready.pop(),))
+            key, error = done.get()
+            running -= 1
+            if error:
+                failed.add(key)
+            for reference in references[key]:
+                referrers[reference].discard(key)
+                if error:
+                    failed.add(reference)
+                if not referrers[reference] and reference not in failed:
+                    ready.append(reference)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    # The entities referenced by failed entities are never ready
+    blocked = set(key for key in entities if referrers[key])
+    return len(failed | blocked)
+
+
+class _Entity(object):  # (too-few-public-methods) pylint:disable=R0903
+    """A created entity, see :meth:`CleanupRegistry.add`."""
+    def __init__(self, key, sequence, delete):
+        self.key = key
+        self.sequence = sequence
+        self.delete = delete
+        self.references = set()
+        self.organization = None
+
+
+class CleanupRegistry(object):
+    """The entities created by tests, and how to delete them."""
+    def __init__(self):
+        self._entities = OrderedDict()
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._listeners = []
+
+    def __len__(self):
+        return len(self._entities)
+
+    def add(self, name, uid, delete, fields=None):
+        """Record a created entity.
+
+        :param str name: The kind of the entity, see :func:`kind`.
+        :param uid: The ID of the entity.
+        :param delete: A callable deleting the entity, raising an exception
+            if it cannot.
+        :param dict fields: The fields the entity was created with. The IDs
+            of the recorded entities found in ``*_id`` and ``*_ids`` fields
+            are the entities it references.
+        :return: The key of the entity, a ``(kind, id)`` tuple.
+
+        """
+        key = (kind(name), unicode(uid))
+        if self.suppressing:
+            return key
+        with self._lock:
+            self._sequence += 1
+            entity = _Entity(key, self._sequence, delete)
+            for reference in _references(fields or {}):
+                referenced = self._entities.get(reference)
+                if referenced is None:
+                    continue
+                entity.references.add(reference)
+                if key[0] in ORGANIZATION_CONTENT:
+                    if reference[0] == ORGANIZATION:
+                        entity.organization = reference
+                    elif referenced.organization is not None:
+                        entity.organization = referenced.organization
+            self._entities[key] = entity
+        return key
+
+    @property
+    def suppressing(self):
+        """Whether the current thread is within :meth:`suppressed`."""
+        return getattr(self._local, 'depth', 0) > 0
+
+    @contextmanager
+    def suppressed(self):
+        """Do not record the entities created by the current thread.
+
+        Threads started within the block do not inherit it, so code creating
+        entities in other threads must enter it there too.
+
+        """
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        try:
+            yield
+        finally:
+            self._local.depth -= 1
+
+    def discard(self, name, uid):
+        """Forget an entity, deleted by the test itself for example."""
+        with self._lock:
+            self._entities.pop((kind(name), unicode(uid)), None)
+
+    def subscribe(self, listener):
+        """Call ``listener()`` after every cleanup deleting entities.
+
+        Caches of what exists on the server use it to forget the entities
+        which may be gone, such as the content of deleted organizations.
+
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def mark(self):
+        """Return a mark, to clean up the entities recorded after it."""
+        with self._lock:
+            return self._sequence
+
+    def cleanup(self, since=0, workers=None):
+        """Delete the entities recorded after the mark ``since``.
+
+        Entities are deleted after the entities referencing them, and the
+        content of a deleted organization is deleted along with it.
+        Entities which cannot be deleted are logged and forgotten.
+
+        :param int since: A mark returned by :meth:`mark`.
+        :param int workers: The maximum number of entities deleted at once.
+            Defaults to the ``main.cleanup.workers`` configuration property,
+            or 5.
+        :rtype: CleanupReport
+
+        """
+        if workers is None:
+            workers = int(conf.properties.get('main.cleanup.workers', 5))
+        with self._lock:
+            entities = OrderedDict(
+                (key, entity) for key, entity in self._entities.items()
+                if entity.sequence > since
+            )
+            for key in entities:
+                del self._entities[key]
+
+        # Leave the content of the deleted organizations to them, but delete
+        # what references that content before the organizations.
+        covered = dict(
+            (key, entity.organization) for key, entity in entities.items()
+            if entity.organization in entities
+        )
+        referrers = dict(
+            (key, set()) for key in entities if key not in covered)
+        for key, entity in entities.items():
+            key = covered.get(key, key)
+            for reference in entity.references:
+                reference = covered.get(reference, reference)
+                if reference in referrers and reference != key:
+                    referrers[reference].add(key)
+        for key in covered:
+            del entities[key]
+
+        failed = _delete(entities, referrers, workers)
+        report = CleanupReport(len(entities) - failed, len(covered), failed)
+        if entities or covered:
+            with self._lock:
+                listeners = list(self._listeners)
+            for listener in listeners:
+                listener()
+        logger.debug(
+            'Deleted %s entities, %s along with their organization, %s '
+            'failed', report.deleted, report.covered, report.failed)
+        return report
+
+
+#: The registry of the entities created by tests.
+registry = CleanupRegistry()  # (bad var name) pylint: disable=C0103
+
+
+def cleanup_run():
+    """Delete every entity if ``main.cleanup`` is ``run``."""
+    if conf.properties.get('main.cleanup') == 'run' and len(registry):
+        registry.cleanup()
+
+
+atexit.register(cleanup_run)
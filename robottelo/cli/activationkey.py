@@ -41,9 +41,8 @@ class ActivationKey(Base):
         Associate a resource
         """
 
-        cls.command_sub = "add-host-collection"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "add-host-collection"))
 
     @classmethod
     def remove_host_collection(cls, options=None):
@@ -51,9 +50,8 @@ class ActivationKey(Base):
         Remove the associated resource
         """
 
-        cls.command_sub = "remove-host-collection"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-host-collection"))
 
     @classmethod
     def add_subscription(cls, options=None):
@@ -61,9 +59,7 @@ class ActivationKey(Base):
         Add subscription
         """
 
-        cls.command_sub = "add-subscription"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-subscription"))
 
     @classmethod
     def host_collection(cls, options=None):
@@ -71,9 +67,7 @@ class ActivationKey(Base):
         List associated host collections
         """
 
-        cls.command_sub = "host-collections"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "host-collections"))
 
     @classmethod
     def remove_repository(cls, options=None):
@@ -81,9 +75,8 @@ class ActivationKey(Base):
         Disassociate a resource
         """
 
-        cls.command_sub = "remove-repository"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-repository"))
 
     @classmethod
     def remove_subscription(cls, options=None):
@@ -91,9 +84,8 @@ class ActivationKey(Base):
         Remove subscription
         """
 
-        cls.command_sub = "remove-subscription"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-subscription"))
 
     @classmethod
     def subscriptions(cls, options=None):
@@ -101,6 +93,4 @@ class ActivationKey(Base):
         List associated subscriptions
         """
 
-        cls.command_sub = "subscriptions"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "subscriptions"))
@@ -31,3 +31,4 @@ class Architecture(Base):
     """
 
     command_base = "architecture"
+    lazy_create_info = True
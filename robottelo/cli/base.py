@@ -5,10 +5,282 @@
 Generic base class for cli hammer commands
 """
 
+import copy
 import logging
+import threading
 
+from collections import MutableMapping, OrderedDict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from robottelo.cli import shell
 from robottelo.common import conf, ssh
-from robottelo.common.helpers import info_dictionary
+from robottelo.common.helpers import info_dictionary, iter_csv_dictionary
+
+
+class CLIReturnCodeError(Exception):
+    """Indicates that a CLI command has finished with return code, different
+    from zero.
+
+    :param return_code: CLI command return code
+    :param stderr: contents of the ``stderr``
+    :param msg: explanation of the error
+
+    """
+    def __init__(self, return_code, stderr, msg):
+        super(CLIReturnCodeError, self).__init__(msg)
+        self.return_code = return_code
+        self.stderr = stderr
+        self.msg = msg
+
+    def __str__(self):
+        return self.msg
+
+
+class HammerCommand(unicode):
+    """An immutable hammer command line.
+
+    Each call builds its own command, so that a subcommand, its options and
+    whether the organization is required travel together with the call and
+    never through class attributes shared between threads. Being an unicode
+    string, a command can be given as is to L{Base.execute}.
+
+    @param base: Base command, like ``organization``.
+    @param sub: Subcommand, like ``create``.
+    @param options: Dictionary of the command options. Options set to
+    ``None`` or ``False`` are left out, options set to ``True`` are flags.
+    @param requires_org: Whether the command requires organization-id.
+    """
+    __slots__ = ('base', 'sub', 'options', 'requires_org')
+
+    def __new__(cls, base, sub, options=None, requires_org=False):
+        options = tuple(sorted(
+            (key, val) for key, val in (options or {}).items()
+            if val is not None and val is not False
+        ))
+        tail = u""
+        for key, val in options:
+            if val is True:
+                tail += u" --%s" % key
+            else:
+                tail += u" --%s='%s'" % (key, val)
+        self = super(HammerCommand, cls).__new__(
+            cls, u"%s %s %s" % (base, sub, tail.strip()))
+        unicode.__setattr__(self, 'base', base)
+        unicode.__setattr__(self, 'sub', sub)
+        unicode.__setattr__(self, 'options', options)
+        unicode.__setattr__(self, 'requires_org', requires_org)
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('HammerCommand objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('HammerCommand objects are immutable')
+
+    def __reduce__(self):
+        return (HammerCommand, (self.base, self.sub, dict(self.options),
+                                self.requires_org))
+
+
+class LazyInfo(MutableMapping):
+    """Fields of a record created by L{Base.create}, completed by running
+    ``info`` the first time a field missing from the create output is read.
+
+    A LazyInfo is a mapping but not a dict: ``isinstance(record, dict)`` is
+    false, and ``dict(record)`` or ``record.copy()`` return a dict holding
+    every field, running ``info`` if it did not run yet.
+
+    @param fields: Fields read from the create output, like ``id``.
+    @param loader: Callable returning the dictionary of ``info`` fields.
+    @param defaults: Fields returned when neither the create output nor
+    ``info`` have them, like the creation arguments.
+    """
+    def __init__(self, fields, loader, defaults=None):
+        self._fields = dict(fields)
+        self._loader = loader
+        self.defaults = dict(defaults or {})
+        self.loaded = False
+
+    def load(self):
+        """Runs ``info``, once, and adds its fields to the record."""
+        if not self.loaded:
+            fields = self._loader()
+            fields.update(self._fields)
+            self._fields = fields
+            self.loaded = True
+
+    def copy(self):
+        """Returns a dict of every field of the record."""
+        return dict(self)
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            self.load()
+        if key in self._fields:
+            return self._fields[key]
+        return self.defaults[key]
+
+    def __setitem__(self, key, value):
+        self._fields[key] = value
+
+    def __delitem__(self, key):
+        self.load()
+        if key not in self._fields and key not in self.defaults:
+            raise KeyError(key)
+        self._fields.pop(key, None)
+        self.defaults.pop(key, None)
+
+    def __iter__(self):
+        self.load()
+        for key in self.defaults:
+            if key not in self._fields:
+                yield key
+        for key in self._fields:
+            yield key
+
+    def __len__(self):
+        self.load()
+        return len(set(self.defaults).union(self._fields))
+
+    def __repr__(self):
+        return '<LazyInfo %r%s>' % (
+            self._fields, '' if self.loaded else ' (info not loaded)')
+
+
+class CommandCache(object):
+    """LRU cache of the results of the hammer ``list`` and ``info``
+    subcommands.
+
+    The cache is used by L{Base.execute} when the ``main.cli.cache``
+    configuration property is ``1``. Any other subcommand, like ``create``,
+    ``update``, ``delete`` or the add and remove subcommands, drops the
+    cached results of its base command. Only the results of successful
+    commands are cached, and copies of them are returned.
+
+    @param maxsize: Maximum number of cached results, the
+    ``main.cli.cache_size`` configuration property by default.
+    """
+    read_subcommands = ('info', 'list')
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._disabled = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Whether results are cached."""
+        return (not self._disabled and
+                conf.properties.get('main.cli.cache', '0') == '1')
+
+    def _get_maxsize(self):
+        """Return the maximum number of cached results."""
+        if self.maxsize is not None:
+            return self.maxsize
+        return int(conf.properties.get('main.cli.cache_size', 256))
+
+    def is_cacheable(self, command):
+        """Tells whether the results of ``command`` can be cached."""
+        return (isinstance(command, HammerCommand) and
+                command.sub.split()[-1] in self.read_subcommands)
+
+    def get(self, key):
+        """Return a copy of the result cached for ``key``, or None."""
+        with self._lock:
+            result = self._results.pop(key, None)
+            if result is None:
+                self.misses += 1
+                return None
+            self._results[key] = result
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        """Cache a copy of ``result`` for ``key``."""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._results.pop(key, None)
+            self._results[key] = result
+            while len(self._results) > self._get_maxsize():
+                self._results.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, command_base):
+        """Drop the cached results of ``command_base`` commands."""
+        with self._lock:
+            for key in [key for key in self._results
+                        if key[0] == command_base]:
+                del self._results[key]
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every cached result."""
+        with self._lock:
+            self._results.clear()
+
+    @contextmanager
+    def disabled(self):
+        """Turns the cache off within a ``with`` block, for tests checking
+        the state of the server.
+        """
+        with self._lock:
+            self._disabled += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._disabled -= 1
+
+    def stats(self):
+        """Return the cache counters.
+
+        @rtype: dict
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._results),
+            }
+
+
+#: Cache of the ``list`` and ``info`` results used by L{Base.execute}
+cache = CommandCache()
+
+
+def execute_concurrently(calls, max_parallel=5):
+    """Runs CLI operations concurrently, using a pool of threads.
+
+    Example::
+
+        results = execute_concurrently([
+            (Org.create, {'name': 'org1'}),
+            (Org.create, {'name': 'org2'}),
+        ])
+
+    @param calls: Iterable of tuples, each one a callable, like
+    ``Org.create``, followed by its positional arguments.
+    @param max_parallel: Maximum number of operations run at once.
+    @return: The results of the calls, in the same order as ``calls``.
+    @raise Exception: The first exception raised by a call, once all calls
+    are done.
+    """
+    calls = list(calls)
+    if not calls:
+        return []
+    pool = ThreadPool(min(max_parallel, len(calls)))
+    try:
+        return pool.map(lambda call: call[0](*call[1:]), calls)
+    finally:
+        pool.close()
+        pool.join()
 
 
 class Base(object):
@@ -43,6 +315,10 @@ class Base(object):
     command_base = None  # each inherited instance should define this
     command_sub = None  # specific to instance, like: create, update, etc
     command_requires_org = False  # True when command requires organization-id
+    command_org_optional = ()  # subcommands not requiring organization-id
+    # True when the fields of a created record are read from the create
+    # output, running info only when a missing field is read
+    lazy_create_info = False
 
     logger = logging.getLogger("robottelo")
 
@@ -52,9 +328,8 @@ class Base(object):
         Adds OS to record.
         """
 
-        cls.command_sub = "add-operatingsystem"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "add-operatingsystem"))
 
         return result
 
@@ -62,15 +337,17 @@ class Base(object):
     def create(cls, options=None):
         """
         Creates a new record using the arguments passed via dictionary.
-        """
 
-        cls.command_sub = "create"
+        The new record is fetched with info, unless the class has
+        lazy_create_info set: the record is then a L{LazyInfo}, which runs
+        info only when a field missing from the create output is read.
+        """
 
         if options is None:
             options = {}
 
         result = cls.execute(
-            cls._construct_command(options),
+            cls._construct_command(options, "create"),
             expect_csv=True)
 
         # Extract new object ID if it was successfully created
@@ -80,13 +357,20 @@ class Base(object):
             # Fetch new object
             # Some Katello obj require the organization-id for subcommands
             info_options = {u'id': obj_id}
-            if cls.command_requires_org:
+            if cls._requires_org('create'):
                 if 'organization-id' not in options:
                     raise Exception(
                         'organization-id option is required for %s.create' %
                         cls.__name__)
                 info_options[u'organization-id'] = options[u'organization-id']
 
+            if cls.lazy_create_info:
+                fields = dict(result.stdout[0])
+                fields.pop('message', None)
+                result.stdout = LazyInfo(
+                    fields, lambda: cls._info_fields(info_options))
+                return result
+
             new_obj = cls.info(info_options)
             # stdout should be a dictionary containing the object
             if len(new_obj.stdout) > 0:
@@ -94,15 +378,28 @@ class Base(object):
 
         return result
 
+    @classmethod
+    def _info_fields(cls, options):
+        """
+        Runs info and returns the fields of the record.
+        @raise CLIReturnCodeError: If info failed.
+        """
+        result = cls.info(options)
+        if result.return_code != 0:
+            raise CLIReturnCodeError(
+                result.return_code,
+                result.stderr,
+                'Failed to read %s %s' % (cls.__name__, options[u'id'])
+            )
+        return dict(result.stdout)
+
     @classmethod
     def delete(cls, options=None):
         """
         Deletes existing record.
         """
 
-        cls.command_sub = "delete"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "delete"))
 
         return result
 
@@ -112,9 +409,8 @@ class Base(object):
         Deletes parameter from record.
         """
 
-        cls.command_sub = "delete-parameter"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "delete-parameter"))
 
         return result
 
@@ -124,9 +420,7 @@ class Base(object):
         Displays the content for existing partition table.
         """
 
-        cls.command_sub = "dump"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "dump"))
 
         return result
 
@@ -158,14 +452,85 @@ class Base(object):
 
     @classmethod
     def execute(cls, command, user=None, password=None,
-                expect_csv=False, timeout=None):
-        """Executes the cli ``command`` on the server via ssh"""
+                expect_csv=False, timeout=None, expect_json=False):
+        """Executes the cli ``command`` on the server via ssh
+
+        With ``expect_json``, hammer is asked for its JSON output.
+
+        If the ``main.cli.backend`` configuration property is ``shell`` the
+        command is sent to a persistent ``hammer shell`` session, see
+        :mod:`robottelo.cli.shell`, or run as a new hammer process where
+        the shell cannot report exit statuses.
+
+        The results of ``list`` and ``info`` are cached when the
+        ``main.cli.cache`` configuration property is ``1``, see
+        :class:`CommandCache`.
+
+        """
         user, password = cls._get_username_password(user, password)
 
+        cache_key = None
+        if cache.is_cacheable(command) and cache.enabled:
+            cache_key = (command.base, unicode(command), user, expect_csv,
+                         expect_json)
+            result = cache.get(cache_key)
+            if result is not None:
+                return result
+
+        result = None
+        if conf.properties.get('main.cli.backend') == 'shell':
+            try:
+                result = shell.execute(
+                    command, user, password, expect_csv=expect_csv,
+                    timeout=timeout, expect_json=expect_json)
+            except shell.HammerShellUnsupported:
+                pass
+        if result is None:
+            result = ssh.command(
+                cls._hammer_command(
+                    command, user, password, expect_csv, expect_json),
+                expect_csv=expect_csv,
+                timeout=timeout
+            )
+
+        if cache_key is not None:
+            if result.return_code == 0:
+                cache.put(cache_key, result)
+        elif (isinstance(command, HammerCommand) and
+              not cache.is_cacheable(command)):
+            cache.invalidate(command.base)
+
+        return result
+
+    @classmethod
+    def execute_stream(cls, command, user=None, password=None,
+                       expect_csv=False, timeout=None):
+        """Executes the cli ``command`` on the server via ssh and streams its
+        output line by line.
+
+        The ``main.cli.backend`` configuration property is not honoured: a
+        new hammer process is always started.
+
+        :rtype: robottelo.common.ssh.SSHCommandStream
+
+        """
+        user, password = cls._get_username_password(user, password)
+        return ssh.command_stream(
+            cls._hammer_command(command, user, password, expect_csv),
+            timeout=timeout,
+            expect_csv=expect_csv
+        )
+
+    @classmethod
+    def _hammer_command(cls, command, user, password, expect_csv=False,
+                        expect_json=False):
+        """Build the shell command line running hammer ``command``."""
         output_csv = u""
 
         if expect_csv:
             output_csv = u" --output csv"
+        elif expect_json:
+            output_csv = u" --output json"
         shell_cmd = u"LANG=%s hammer -v -u %s -p %s %s %s"
 
         cmd = shell_cmd % (
@@ -176,8 +541,7 @@ class Base(object):
             command
         )
 
-        return ssh.command(
-            cmd.encode('utf-8'), expect_csv=expect_csv, timeout=timeout)
+        return cmd.encode('utf-8')
 
     @classmethod
     def exists(cls, options=None, tuple_search=None):
@@ -186,8 +550,7 @@ class Base(object):
         @return: CSV parsed structure[0] of the list.
         """
 
-        if options is None:
-            options = {}
+        options = dict(options or {})
 
         if tuple_search and 'search' not in options:
             options.update({"search": "%s=\"%s\"" %
@@ -204,20 +567,25 @@ class Base(object):
     def info(cls, options=None):
         """
         Gets information by provided: options dictionary.
+        Hammer JSON output is used when the ``main.cli.info_json``
+        configuration property is ``1``.
         @param options: ID (sometimes name or id).
         """
 
-        cls.command_sub = "info"
-
         if options is None:
             options = {}
 
-        if cls.command_requires_org and 'organization-id' not in options:
+        command = cls._construct_command(options, "info")
+        if command.requires_org and 'organization-id' not in options:
             raise Exception(
                 'organization-id option is required for %s.info' %
                 cls.__name__)
 
-        result = cls.execute(cls._construct_command(options), expect_csv=False)
+        result = cls.execute(
+            command,
+            expect_csv=False,
+            expect_json=conf.properties.get('main.cli.info_json') == '1'
+        )
 
         # info_dictionary required to convert result.stdout to dic format
         updated_result = info_dictionary(result)
@@ -231,22 +599,52 @@ class Base(object):
         @param options: ID (sometimes name works as well) to retrieve info.
         """
 
-        cls.command_sub = "list"
+        options = cls._list_options(options, per_page)
 
-        if options is None:
-            options = {}
+        result = cls.execute(
+            cls._construct_command(options, "list"), expect_csv=True)
+
+        return result
+
+    @classmethod
+    def iter_list(cls, options=None, per_page=True):
+        """
+        List information, yielding one dictionary per record as the output
+        of hammer arrives, so that large lists are never held in memory.
+        @param options: Same as for list.
+        @raise CLIReturnCodeError: Once all records are read, if the command
+        failed.
+        """
+
+        options = cls._list_options(options, per_page)
+
+        stream = cls.execute_stream(
+            cls._construct_command(options, "list"), expect_csv=True)
+        for record in iter_csv_dictionary(stream):
+            yield record
+
+        if stream.return_code != 0:
+            raise CLIReturnCodeError(
+                stream.return_code,
+                stream.stderr,
+                'Failed to list %s records' % cls.__name__
+            )
+
+    @classmethod
+    def _list_options(cls, options=None, per_page=True):
+        """Fill in and check the options of a list command."""
+
+        options = dict(options or {})
 
         if 'per-page' not in options and per_page:
             options[u'per-page'] = 10000
 
-        if cls.command_requires_org and 'organization-id' not in options:
+        if cls._requires_org('list') and 'organization-id' not in options:
             raise Exception(
                 'organization-id option is required for %s.list' %
                 cls.__name__)
 
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
-
-        return result
+        return options
 
     @classmethod
     def puppetclasses(cls, options=None):
@@ -254,9 +652,8 @@ class Base(object):
         Lists all puppet classes.
         """
 
-        cls.command_sub = "puppet-classes"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "puppet-classes"), expect_csv=True)
 
         return result
 
@@ -266,9 +663,8 @@ class Base(object):
         Removes OS from record.
         """
 
-        cls.command_sub = "remove-operatingsystem"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "remove-operatingsystem"))
 
         return result
 
@@ -278,9 +674,8 @@ class Base(object):
         Lists all smart class parameters.
         """
 
-        cls.command_sub = "sc-params"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "sc-params"), expect_csv=True)
 
         return result
 
@@ -290,9 +685,7 @@ class Base(object):
         Creates or updates parameter for a record.
         """
 
-        cls.command_sub = "set-parameter"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "set-parameter"))
 
         return result
 
@@ -302,9 +695,8 @@ class Base(object):
         Updates existing record.
         """
 
-        cls.command_sub = "update"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "update"), expect_csv=True)
 
         return result
 
@@ -325,23 +717,28 @@ class Base(object):
         return Wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
+    def _requires_org(cls, command_sub):
+        """Tells whether the ``command_sub`` subcommand requires the
+        organization-id option.
+        """
+        return (cls.command_requires_org and
+                command_sub not in cls.command_org_optional)
+
+    @classmethod
+    def _construct_command(cls, options=None, command_sub=None):
         """
         Build a hammer cli command based on the options passed
+        @param options: Options of the command.
+        @param command_sub: Subcommand to run, ``command_sub`` by default.
+        @return: An immutable L{HammerCommand}.
         """
 
-        tail = u""
-
-        if options is None:
-            options = {}
-
-        for key, val in options.items():
-            if val is not None:
-                if val is True:
-                    tail += u" --%s" % key
-                elif val is not False:
-                    tail += u" --%s='%s'" % (key, val)
-        cmd = u"%s %s %s" % (cls.command_base, cls.command_sub,
-                             tail.strip())
+        if command_sub is None:
+            command_sub = cls.command_sub
 
-        return cmd
+        return HammerCommand(
+            cls.command_base,
+            command_sub,
+            options,
+            cls._requires_org(command_sub)
+        )
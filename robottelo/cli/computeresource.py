@@ -29,3 +29,4 @@ class ComputeResource(Base):
     """
 
     command_base = "compute-resource"
+    lazy_create_info = True
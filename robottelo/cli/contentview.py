@@ -49,9 +49,8 @@ class ContentView(Base):
         Associate repository to a selected CV.
         """
 
-        cls.command_sub = "add-repository"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "add-repository"), expect_csv=True)
 
         return result
 
@@ -61,9 +60,8 @@ class ContentView(Base):
         Associate version to a selected CV.
         """
 
-        cls.command_sub = "add-version"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "add-version"), expect_csv=True)
 
         return result
 
@@ -73,13 +71,12 @@ class ContentView(Base):
         Publishes a new version of content-view.
         """
 
-        cls.command_sub = "publish"
-
         # Publishing can take a while so try to wait a bit longer
         if timeout is None:
             timeout = 120
 
-        result = cls.execute(cls._construct_command(options), timeout=timeout)
+        result = cls.execute(
+            cls._construct_command(options, "publish"), timeout=timeout)
 
         return result
 
@@ -89,12 +86,11 @@ class ContentView(Base):
         Provides version info related to content-view's version.
         """
 
-        cls.command_sub = "version info"
-
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options), expect_csv=False)
+        result = cls.execute(
+            cls._construct_command(options, "version info"), expect_csv=False)
 
         # info_dictionary required to convert result.stdout
         # to dictionary format
@@ -108,9 +104,9 @@ class ContentView(Base):
         Associate puppet_module to selected CV
         """
 
-        cls.command_sub = "puppet-module add"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "puppet-module add"),
+            expect_csv=True)
 
         return result
 
@@ -120,12 +116,12 @@ class ContentView(Base):
         Provides puppet-module info related to content-view's version.
         """
 
-        cls.command_sub = "puppet-module info"
-
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options), expect_csv=False)
+        result = cls.execute(
+            cls._construct_command(options, "puppet-module info"),
+            expect_csv=False)
 
         # info_dictionary required to convert result.stdout
         # to dictionary format
@@ -139,12 +135,11 @@ class ContentView(Base):
         Provides filter info related to content-view's version.
         """
 
-        cls.command_sub = "filter info"
-
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options), expect_csv=False)
+        result = cls.execute(
+            cls._construct_command(options, "filter info"), expect_csv=False)
 
         # info_dictionary required to convert result.stdout
         # to dictionary format
@@ -158,12 +153,11 @@ class ContentView(Base):
         Lists content-view's versions.
         """
 
-        cls.command_sub = "version list"
-
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "version list"), expect_csv=True)
 
         return result
 
@@ -173,9 +167,8 @@ class ContentView(Base):
         Promotes content-view version to next env.
         """
 
-        cls.command_sub = "version promote"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "version promote"))
 
         return result
 
@@ -185,8 +178,7 @@ class ContentView(Base):
         Removes content-view version.
         """
 
-        cls.command_sub = "version destroy"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "version destroy"))
 
         return result
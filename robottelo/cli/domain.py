@@ -31,3 +31,4 @@ class Domain(Base):
     """
 
     command_base = "domain"
+    lazy_create_info = True
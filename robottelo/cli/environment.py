@@ -30,3 +30,4 @@ class Environment(Base):
     """
 
     command_base = "environment"
+    lazy_create_info = True
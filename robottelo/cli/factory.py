@@ -9,10 +9,13 @@ import datetime
 import logging
 import os
 import random
+import threading
+import time
 
 from os import chmod
 from robottelo.cli.activationkey import ActivationKey
 from robottelo.cli.architecture import Architecture
+from robottelo.cli.base import LazyInfo, cache
 from robottelo.cli.contenthost import ContentHost
 from robottelo.cli.contentview import ContentView
 from robottelo.cli.computeresource import ComputeResource
@@ -35,12 +38,13 @@ from robottelo.cli.syncplan import SyncPlan
 from robottelo.cli.template import Template
 from robottelo.cli.user import User
 from robottelo.cli.operatingsys import OperatingSys
+from robottelo.cleanup import registry
 from robottelo.common import ssh
 from robottelo.common.constants import (FOREMAN_PROVIDERS, OPERATING_SYSTEMS,
                                         SYNC_INTERVAL, TEMPLATE_TYPES)
 from robottelo.common.helpers import (
     generate_ipaddr, generate_mac, generate_name, generate_string,
-    sleep_for_seconds, update_dictionary)
+    update_dictionary, wait_until)
 from tempfile import mkstemp
 
 logger = logging.getLogger("robottelo")
@@ -63,6 +67,159 @@ def _format_error_msg(msg):
     return u'\n'.join(['  {0}'.format(line) for line in msg.split('\n')])
 
 
+#: Seconds to wait for a new entity to show up before giving up
+READY_TIMEOUT = 30
+
+_wait_stats = {'seconds': 0.0, 'waits': 0, 'timeouts': 0, 'per_entity': {}}
+_wait_stats_lock = threading.Lock()
+
+
+def _info_ready(cli_object, entity, args):
+    """Tell whether ``info`` finds the newly created ``entity``."""
+    options = {u'id': entity['id']}
+    if cli_object._requires_org('info'):  # pylint:disable=W0212
+        options[u'organization-id'] = args.get('organization-id')
+    result = cli_object.info(options)
+    return result.return_code == 0 and len(result.stdout) > 0
+
+
+def _org_ready(cli_object, entity, args):  # pylint:disable=W0613
+    """Tell whether the Library environment of a new organization exists.
+
+    Creating an organization starts background tasks, like the creation of
+    its Library environment, which are not visible through ``info``.
+
+    """
+    # An empty list must not be cached, lest the next poll read it again
+    with cache.disabled():
+        result = LifecycleEnvironment.list(
+            {u'organization-id': entity['id']})
+    return result.return_code == 0 and any(
+        environment.get('name') == 'Library'
+        for environment in result.stdout)
+
+
+#: Readiness checks specific to some entities, taking the CLI object, the
+#: created entity and the creation arguments. They run even if ``info``
+#: already found the entity. By default an entity is ready once ``info``
+#: finds it.
+READY_CHECKS = {
+    Org: _org_ready,
+}
+
+
+def _lookup(table, cli_object):
+    """Return the ``table`` value for ``cli_object`` or its closest parent.
+
+    ``Base.with_user`` returns subclasses, which must get the same value.
+
+    """
+    for cls in cli_object.__mro__:
+        if cls in table:
+            return table[cls]
+    return None
+
+
+def wait_for_ready(cli_object, entity, args, found=False):
+    """
+    Waits until a newly created entity is ready to be used.
+
+    Entities created with lazy_create_info are ready as soon as hammer
+    returned, and so are entities already found by ``info`` unless they have
+    a readiness check in READY_CHECKS. Other entities are polled with their
+    readiness check, with an exponential backoff, for at most READY_TIMEOUT
+    seconds.
+
+    @param cli_object: The CLI object which created the entity.
+    @param entity: A dictionary representing the created entity.
+    @param args: Arguments used to create the entity.
+    @param found: Whether ``entity`` holds the fields read by ``info``, as
+    returned by L{robottelo.cli.base.Base.create}.
+
+    @raise CLIFactoryError: If the entity is not ready in time.
+
+    @rtype: float
+    @return: Seconds spent waiting.
+    """
+    start = time.time()
+    ready = True
+    if 'id' in entity and not isinstance(entity, LazyInfo):
+        check = _lookup(READY_CHECKS, cli_object)
+        if check is None and not found:
+            check = _info_ready
+        if check is not None:
+            ready = wait_until(
+                lambda: check(cli_object, entity, args),
+                timeout=READY_TIMEOUT)
+    waited = time.time() - start
+
+    with _wait_stats_lock:
+        _wait_stats['seconds'] += waited
+        _wait_stats['waits'] += 1
+        if not ready:
+            _wait_stats['timeouts'] += 1
+        per_entity = _wait_stats['per_entity']
+        per_entity[cli_object.__name__] = (
+            per_entity.get(cli_object.__name__, 0.0) + waited)
+    logger.debug(
+        'Waited %.2f seconds for %s to be ready', waited, cli_object.__name__)
+
+    if not ready:
+        raise CLIFactoryError(
+            '%s %s was not ready after %s seconds' % (
+                cli_object.__name__, entity['id'], READY_TIMEOUT))
+    return waited
+
+
+def wait_stats():
+    """
+    Reports how much time the factory spent waiting for created entities.
+
+    @rtype: dict
+    @return: The total ``seconds`` waited, the number of ``waits`` and of
+    ``timeouts``, and the seconds waited ``per_entity`` type.
+    """
+    with _wait_stats_lock:
+        stats = dict(_wait_stats)
+        stats['per_entity'] = dict(_wait_stats['per_entity'])
+    return stats
+
+
+def reset_wait_stats():
+    """Resets the statistics returned by L{wait_stats}."""
+    with _wait_stats_lock:
+        _wait_stats.update(
+            {'seconds': 0.0, 'waits': 0, 'timeouts': 0, 'per_entity': {}})
+
+
+def _deleter(cli_object, options):
+    """
+    Returns a function deleting an entity.
+
+    @param cli_object: A valid CLI object.
+    @param options: The options of the delete command.
+    """
+
+    def delete():
+        """
+        Deletes the entity.
+
+        @raise CLIFactoryError: Raise an exception if the entity cannot be
+        deleted.
+        """
+        result = cli_object.delete(options)
+        if result.return_code != 0:
+            raise CLIFactoryError(
+                'Failed to delete %s with %r data due to:\n%s' % (
+                    cli_object.__name__,
+                    options,
+                    _format_error_msg(result.stderr),
+                )
+            )
+
+    return delete
+
+
 def create_object(cli_object, args):
     """
     Creates <object> with dictionary of arguments.
@@ -75,12 +232,18 @@ def create_object(cli_object, args):
     created.
 
     @rtype: dict
-    @return: A dictionary representing the newly created resource.
+    @return: A dictionary representing the newly created resource, on top
+    of the creation arguments. For CLI objects with lazy_create_info set,
+    it is a L{LazyInfo}, a mapping which is not a dict, running info the
+    first time a field missing from the create output is read. Like for
+    other objects, the fields read by info take precedence over the
+    creation arguments. Use its ``copy`` method to get a dict.
     """
 
     result = cli_object.create(args)
-    # Some methods require a bit of waiting
-    sleep_for_seconds(5)
+    # create returns the dictionary read by info, or else the list of
+    # records read from its own output
+    found = isinstance(result.stdout, dict)
 
     # If the object is not created, raise exception, stop the show.
     if result.return_code != 0:
@@ -98,7 +261,25 @@ def create_object(cli_object, args):
     if type(result.stdout) is list and len(result.stdout) > 0:
         result.stdout = result.stdout[0]
 
-    return result.stdout
+    # Some entities are not usable right after their creation
+    wait_for_ready(cli_object, result.stdout, args, found)
+
+    # Track the entity, to delete it once the tests are done
+    uid = result.stdout.get('id')
+    if uid:
+        options = {u'id': uid}
+        if cli_object._requires_org('delete'):  # pylint:disable=W0212
+            options[u'organization-id'] = args.get('organization-id')
+        registry.add(
+            cli_object.command_base, uid, _deleter(cli_object, options), args)
+
+    if isinstance(result.stdout, LazyInfo):
+        result.stdout.defaults.update(args)
+        return result.stdout
+
+    new_obj = dict(args)
+    new_obj.update(result.stdout)
+    return new_obj
 
 
 def make_activation_key(options=None):
@@ -149,9 +330,7 @@ def make_activation_key(options=None):
 
     # Override default dictionary with updated one
     args = update_dictionary(args, options)
-    args.update(create_object(ActivationKey, args))
-
-    return args
+    return create_object(ActivationKey, args)
 
 
 def make_architecture(options=None):
@@ -174,9 +353,7 @@ def make_architecture(options=None):
 
     # Override default dictionary with updated one
     args = update_dictionary(args, options)
-    args.update(create_object(Architecture, args))
-
-    return args
+    return create_object(Architecture, args)
 
 
 def make_content_view(options=None):
@@ -217,9 +394,7 @@ def make_content_view(options=None):
 
     # Override default dictionary with updated one
     args = update_dictionary(args, options)
-    args.update(create_object(ContentView, args))
-
-    return args
+    return create_object(ContentView, args)
 
 
 def make_gpg_key(options=None):
@@ -263,10 +438,7 @@ def make_gpg_key(options=None):
     args = update_dictionary(args, options)
 
     # gpg create returns a dict inside a list
-    new_obj = create_object(GPGKey, args)
-    args.update(new_obj)
-
-    return args
+    return create_object(GPGKey, args)
 
 
 def make_model(options=None):
@@ -292,9 +464,7 @@ def make_model(options=None):
 
     # Override default dictionary with updated one
     args = update_dictionary(args, options)
-    args.update(create_object(Model, args))
-
-    return args
+    return create_object(Model, args)
 
 
 def make_partition_table(options=None):
@@ -341,9 +511,7 @@ def make_partition_table(options=None):
     ssh.upload_file(local_file=layout, remote_file=args['file'])
 
     args = update_dictionary(args, options)
-    args.update(create_object(PartitionTable, args))
-
-    return args
+    return create_object(PartitionTable, args)
 
 
 def make_product(options=None):
@@ -377,9 +545,7 @@ def make_product(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Product, args))
-
-    return args
+    return create_object(Product, args)
 
 
 def make_proxy(options=None):
@@ -400,14 +566,12 @@ def make_proxy(options=None):
 
     args = update_dictionary(args, options)
     if options and 'url' in options:
-        args.update(create_object(Proxy, args))
-    else:
-        newport = random.randint(9191, 49090)
-        with default_url_on_new_port(9090, newport) as url:
-            args['url'] = url
-            args.update(create_object(Proxy, args))
+        return create_object(Proxy, args)
 
-    return args
+    newport = random.randint(9191, 49090)
+    with default_url_on_new_port(9090, newport) as url:
+        args['url'] = url
+        return create_object(Proxy, args)
 
 
 def make_repository(options=None):
@@ -455,9 +619,7 @@ def make_repository(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Repository, args))
-
-    return args
+    return create_object(Repository, args)
 
 
 def make_subnet(options=None):
@@ -502,9 +664,7 @@ def make_subnet(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Subnet, args))
-
-    return args
+    return create_object(Subnet, args)
 
 
 def make_sync_plan(options=None):
@@ -541,9 +701,7 @@ def make_sync_plan(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(SyncPlan, args))
-
-    return args
+    return create_object(SyncPlan, args)
 
 
 def make_content_host(options=None):
@@ -614,9 +772,7 @@ def make_content_host(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(ContentHost, args))
-
-    return args
+    return create_object(ContentHost, args)
 
 
 def make_host(options=None):
@@ -765,9 +921,7 @@ def make_host(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Host, args))
-
-    return args
+    return create_object(Host, args)
 
 
 def make_host_collection(options=None):
@@ -804,9 +958,7 @@ def make_host_collection(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(HostCollection, args))
-
-    return args
+    return create_object(HostCollection, args)
 
 
 def make_user(options=None):
@@ -840,9 +992,7 @@ def make_user(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(User, args))
-
-    return args
+    return create_object(User, args)
 
 
 def make_compute_resource(options=None):
@@ -886,9 +1036,7 @@ def make_compute_resource(options=None):
         args['provider'] = FOREMAN_PROVIDERS['libvirt']
         if args['url'] is None:
             args['url'] = "qemu+tcp://localhost:16509/system"
-    args.update(create_object(ComputeResource, args))
-
-    return args
+    return create_object(ComputeResource, args)
 
 
 def make_org(options=None):
@@ -912,9 +1060,7 @@ def make_org(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Org, args))
-
-    return args
+    return create_object(Org, args)
 
 
 def make_os(options=None):
@@ -953,9 +1099,7 @@ def make_os(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(OperatingSys, args))
-
-    return args
+    return create_object(OperatingSys, args)
 
 
 def make_domain(options=None):
@@ -978,9 +1122,7 @@ def make_domain(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Domain, args))
-
-    return args
+    return create_object(Domain, args)
 
 
 def make_hostgroup(options=None):
@@ -1035,9 +1177,7 @@ def make_hostgroup(options=None):
         u'subnet-id': None,
     }
     args = update_dictionary(args, options)
-    args.update(create_object(HostGroup, args))
-
-    return args
+    return create_object(HostGroup, args)
 
 
 def make_medium(options=None):
@@ -1082,9 +1222,7 @@ def make_medium(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Medium, args))
-
-    return args
+    return create_object(Medium, args)
 
 
 def make_environment(options=None):
@@ -1103,9 +1241,7 @@ def make_environment(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(Environment, args))
-
-    return args
+    return create_object(Environment, args)
 
 
 def make_lifecycle_environment(options=None):
@@ -1141,9 +1277,7 @@ def make_lifecycle_environment(options=None):
     }
 
     args = update_dictionary(args, options)
-    args.update(create_object(LifecycleEnvironment, args))
-
-    return args
+    return create_object(LifecycleEnvironment, args)
 
 
 def make_template(options=None):
@@ -1188,6 +1322,4 @@ def make_template(options=None):
     # End - Special handling for template factory
 
     args = update_dictionary(args, options)
-    args.update(create_object(Template, args))
-
-    return args
+    return create_object(Template, args)
@@ -59,9 +59,8 @@ class Host(Base):
             --name NAME                   resource name
             -h, --help                    print help
         """
-        cls.command_sub = "facts"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "facts"), expect_csv=True)
 
         facts = []
 
@@ -84,9 +83,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "puppetrun"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "puppetrun"))
 
         return result
 
@@ -104,9 +101,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "reboot"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "reboot"))
 
         return result
 
@@ -127,9 +122,8 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "reports"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "reports"), expect_csv=True)
 
         reports = []
 
@@ -152,9 +146,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "stop"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "stop"))
 
         return result
 
@@ -172,9 +164,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "status"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "status"))
 
         return result
 
@@ -193,8 +183,6 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = "stop"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "stop"))
 
         return result
@@ -33,3 +33,4 @@ class HostGroup(Base):
     """
 
     command_base = "hostgroup"
+    lazy_create_info = True
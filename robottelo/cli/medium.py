@@ -31,3 +31,4 @@ class Medium(Base):
     """
 
     command_base = "medium"
+    lazy_create_info = True
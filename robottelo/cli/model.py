@@ -29,3 +29,4 @@ class Model(Base):
     """
 
     command_base = "model"
+    lazy_create_info = True
@@ -39,6 +39,7 @@ class OperatingSys(Base):
     """
 
     command_base = "os"
+    lazy_create_info = True
 
     @classmethod
     def add_architecture(cls, options=None):
@@ -46,9 +47,8 @@ class OperatingSys(Base):
         Adds existing architecture to OS.
         """
 
-        cls.command_sub = "add-architecture"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "add-architecture"))
 
         return result
 
@@ -58,9 +58,8 @@ class OperatingSys(Base):
         Adds existing template to OS.
         """
 
-        cls.command_sub = "add-config-template "
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "add-config-template "))
 
         return result
 
@@ -70,9 +69,7 @@ class OperatingSys(Base):
         Adds existing partitioning table to OS.
         """
 
-        cls.command_sub = "add-ptable"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "add-ptable"))
 
         return result
 
@@ -82,9 +79,8 @@ class OperatingSys(Base):
         Removes architecture from OS.
         """
 
-        cls.command_sub = "remove-architecture"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "remove-architecture"))
 
         return result
 
@@ -94,9 +90,8 @@ class OperatingSys(Base):
         Removes template from OS.
         """
 
-        cls.command_sub = "remove-config-template"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "remove-config-template"))
 
         return result
 
@@ -106,8 +101,6 @@ class OperatingSys(Base):
         Removes partitioning table from OS.
         """
 
-        cls.command_sub = "remove-ptable "
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "remove-ptable "))
 
         return result
@@ -54,9 +54,7 @@ class Org(Base):
         Adds existing subnet to an org
         """
 
-        cls.command_sub = "add-subnet"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-subnet"))
 
     @classmethod
     def remove_subnet(cls, options=None):
@@ -64,9 +62,7 @@ class Org(Base):
         Removes a subnet from an org
         """
 
-        cls.command_sub = "remove-subnet"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "remove-subnet"))
 
     @classmethod
     def add_domain(cls, options=None):
@@ -74,9 +70,7 @@ class Org(Base):
         Adds a domain to an org
         """
 
-        cls.command_sub = "add-domain"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-domain"))
 
     @classmethod
     def remove_domain(cls, options=None):
@@ -84,9 +78,7 @@ class Org(Base):
         Removes a domain from an org
         """
 
-        cls.command_sub = "remove-domain"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "remove-domain"))
 
     @classmethod
     def add_user(cls, options=None):
@@ -94,9 +86,7 @@ class Org(Base):
         Adds an user to an org
         """
 
-        cls.command_sub = "add-user"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-user"))
 
     @classmethod
     def remove_user(cls, options=None):
@@ -104,9 +94,7 @@ class Org(Base):
         Removes an user from an org
         """
 
-        cls.command_sub = "remove-user"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "remove-user"))
 
     @classmethod
     def add_hostgroup(cls, options=None):
@@ -114,9 +102,7 @@ class Org(Base):
         Adds a hostgroup to an org
         """
 
-        cls.command_sub = "add-hostgroup"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-hostgroup"))
 
     @classmethod
     def remove_hostgroup(cls, options=None):
@@ -124,9 +110,7 @@ class Org(Base):
         Removes a hostgroup from an org
         """
 
-        cls.command_sub = "remove-hostgroup"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "remove-hostgroup"))
 
     @classmethod
     def add_compute_resource(cls, options=None):
@@ -134,9 +118,8 @@ class Org(Base):
         Adds a computeresource to an org
         """
 
-        cls.command_sub = "add-compute-resource"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "add-compute-resource"))
 
     @classmethod
     def remove_compute_resource(cls, options=None):
@@ -144,9 +127,8 @@ class Org(Base):
         Removes a computeresource from an org
         """
 
-        cls.command_sub = "remove-compute-resource"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-compute-resource"))
 
     @classmethod
     def add_medium(cls, options=None):
@@ -154,9 +136,7 @@ class Org(Base):
         Adds a medium to an org
         """
 
-        cls.command_sub = "add-medium"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-medium"))
 
     @classmethod
     def remove_medium(cls, options=None):
@@ -164,9 +144,7 @@ class Org(Base):
         Removes a medium from an org
         """
 
-        cls.command_sub = "remove-medium"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "remove-medium"))
 
     @classmethod
     def add_config_template(cls, options=None):
@@ -174,9 +152,8 @@ class Org(Base):
         Adds a configtemplate to an org
         """
 
-        cls.command_sub = "add-config-template"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "add-config-template"))
 
     @classmethod
     def remove_config_template(cls, options=None):
@@ -184,9 +161,8 @@ class Org(Base):
         Removes a configtemplate from an org
         """
 
-        cls.command_sub = "remove-config-template"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-config-template"))
 
     @classmethod
     def add_environment(cls, options=None):
@@ -194,9 +170,7 @@ class Org(Base):
         Adds an environment to an org
         """
 
-        cls.command_sub = "add-environment"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-environment"))
 
     @classmethod
     def remove_environment(cls, options=None):
@@ -204,9 +178,8 @@ class Org(Base):
         Removes an environment from an org
         """
 
-        cls.command_sub = "remove-environment"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-environment"))
 
     @classmethod
     def add_smart_proxy(cls, options=None):
@@ -214,9 +187,7 @@ class Org(Base):
         Adds a smartproxy to an org
         """
 
-        cls.command_sub = "add-smart-proxy"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, "add-smart-proxy"))
 
     @classmethod
     def remove_smart_proxy(cls, options=None):
@@ -224,6 +195,5 @@ class Org(Base):
         Removes a smartproxy from an org
         """
 
-        cls.command_sub = "remove-smart-proxy"
-
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, "remove-smart-proxy"))
@@ -32,3 +32,4 @@ class PartitionTable(Base):
     """
 
     command_base = "partition-table"
+    lazy_create_info = True
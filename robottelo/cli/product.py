@@ -39,9 +39,8 @@ class Product(Base):
         Delete assignment sync plan and product.
         """
 
-        cls.command_sub = "remove-sync-plan"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "remove-sync-plan"))
 
         return result
 
@@ -51,8 +50,6 @@ class Product(Base):
         Assign sync plan to product.
         """
 
-        cls.command_sub = "set-sync-plan"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "set-sync-plan"))
 
         return result
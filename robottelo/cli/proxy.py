@@ -62,8 +62,6 @@ class Proxy(Base):
         Import puppet classes from puppet proxy.
         """
 
-        cls.command_sub = "import-classes"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "import-classes"))
 
         return result
@@ -31,28 +31,7 @@ class Repository(Base):
 
     command_base = "repository"
     command_requires_org = True
-
-    @classmethod
-    def create(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(Repository, cls).create(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
-
-    @classmethod
-    def info(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(Repository, cls).info(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
+    command_org_optional = ('create', 'info')
 
     @classmethod
     def synchronize(cls, options):
@@ -60,8 +39,7 @@ class Repository(Base):
         Synchronizes a repository.
         """
 
-        cls.command_sub = "synchronize"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "synchronize"), expect_csv=True)
 
         return result
@@ -0,0 +1,403 @@
+# -*- encoding: utf-8 -*-
+# vim: ts=4 sw=4 expandtab ai
+
+"""
+Persistent ``hammer shell`` sessions.
+
+Starting ``hammer`` costs a Ruby interpreter start-up and the loading of all
+hammer plugins for every single command. When the ``main.cli.backend``
+configuration property is set to ``shell``,
+:meth:`robottelo.cli.base.Base.execute` sends its commands to a long-lived
+``hammer shell`` instead, running on the remote server over one SSH channel.
+
+The output of each command is delimited by the shell prompt printed once the
+command is done. ``hammer shell`` does not print the exit status of its
+commands, so it is started with :data:`STATUS_HOOK` loaded into its Ruby
+interpreter, which prints :data:`STATUS_MARKER` and hammer's own exit status
+after the output of each command. A session checks that the hook works right
+after its start; where it does not, like with ``hammer_cli`` versions it does
+not support, :class:`HammerShellUnsupported` is raised and
+:meth:`robottelo.cli.base.Base.execute` starts hammer for every command
+instead. The shell must parse its input lines with shell quoting rules, as
+done by recent ``hammer_cli`` versions.
+
+Each thread has its own sessions. The sessions of a thread which is over are
+closed the next time a session is requested, and all of them at exit.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from robottelo.common import conf, ssh
+
+
+#: Printed on a line of its own after the output of every command, followed
+#: by the exit status of the command.
+STATUS_MARKER = '__robottelo_status__ '
+
+#: Ruby code loaded by ``hammer shell`` before it starts. Once
+#: ``hammer_cli/shell`` is loaded, it wraps ``HammerCLI::AbstractCommand#run``
+#: to print :data:`STATUS_MARKER` and the exit status of every command run
+#: by the ``hammer shell`` command itself, subcommands excluded.
+STATUS_HOOK = r"""
+module RobotteloStatus
+  MARKER = '%s'
+
+  def self.install
+    return if @installed || !defined?(HammerCLI::AbstractCommand) ||
+      !defined?(HammerCLI::ShellCommand)
+    @installed = true
+    HammerCLI::AbstractCommand.class_eval do
+      alias_method :robottelo_run, :run
+      def run(*args)
+        stack = (Thread.current[:robottelo_commands] ||= [])
+        stack.push(self)
+        status = 70
+        begin
+          status = robottelo_run(*args)
+        rescue SystemExit => e
+          status = e.status
+          raise
+        ensure
+          stack.pop
+          if stack.last.is_a?(HammerCLI::ShellCommand)
+            $stderr.flush
+            $stdout.print("\n#{MARKER}#{status.to_i}\n")
+            $stdout.flush
+          end
+        end
+        status
+      end
+    end
+  end
+end
+
+module Kernel
+  alias_method :robottelo_require, :require
+  def require(*args)
+    result = robottelo_require(*args)
+    if args.first.to_s =~ %%r{hammer_cli/shell(\.rb)?\z}
+      RobotteloStatus.install
+    end
+    result
+  end
+  private :require
+end
+""" % STATUS_MARKER
+
+
+class HammerShellError(Exception):
+    """Indicates that a ``hammer shell`` session stopped responding."""
+
+
+class HammerShellUnsupported(HammerShellError):
+    """Indicates that ``hammer shell`` does not print exit statuses on the
+    server, so that its commands must be run one hammer at a time.
+    """
+
+
+#: Servers where ``hammer shell`` does not print exit statuses.
+_unsupported = set()  # (bad var name) pylint: disable=C0103
+
+
+class HammerShell(object):
+    """A ``hammer shell`` process running on the remote server.
+
+    A session runs one command at a time. Use :func:`execute` to share
+    sessions between callers.
+    """
+
+    prompt = 'hammer> '
+    bufsize = 32768
+    #: Seconds to wait for standard error arriving after the prompt.
+    stderr_delay = 0.05
+
+    def __init__(self, user, password, hostname=None, timeout=120):
+        self.user = user
+        self.password = password
+        self.hostname = hostname
+        self.timeout = timeout
+        self.channel = None
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger('robottelo')
+        self._key = None
+        self._client = None
+
+    def start(self):
+        """Start ``hammer shell`` with :data:`STATUS_HOOK`, wait for its
+        first prompt and check that the hook works.
+
+        :raises HammerShellUnsupported: If the shell does not print exit
+            statuses. The session is then closed.
+
+        """
+        self._key, self._client = ssh.acquire_connection(self.hostname)
+        self.channel = self._client.get_transport().open_session()
+        self.channel.exec_command((
+            u"hook=$(mktemp -d) && cat > $hook/status.rb <<'ROBOTTELO_HOOK'"
+            u"\n{0}\nROBOTTELO_HOOK\n"
+            u"LANG={1} RUBYOPT=\"-r$hook/status.rb $RUBYOPT\" "
+            u"hammer -u {2} -p {3} shell; rm -rf $hook".format(
+                STATUS_HOOK, conf.properties['main.locale'], self.user,
+                self.password)
+        ).encode('utf-8'))
+        self._read_until_prompt(self.timeout)
+        self.check_status()
+        self.logger.info('Started hammer shell session %s', hex(id(self)))
+
+    def check_status(self):
+        """Check that the shell prints the exit status of its commands.
+
+        :raises HammerShellUnsupported: If it does not. The session is then
+            closed, and no other session is started for the server.
+
+        """
+        stdout, _ = self._send('--help', self.timeout)
+        if self._split_status(stdout)[1] is None:
+            _unsupported.add(self.hostname)
+            self.close()
+            self.logger.warning(
+                'hammer shell does not print exit statuses, commands are run '
+                'one hammer at a time.')
+            raise HammerShellUnsupported(
+                'hammer shell does not print exit statuses.')
+
+    def close(self):
+        """Exit the shell and give its connection back to the pool."""
+        if self.channel is None:
+            return
+        try:
+            self.channel.sendall('exit\n')
+        except Exception:  # pylint:disable=W0703
+            pass
+        self.channel.close()
+        self.channel = None
+        if self._client is not None:
+            ssh.release_connection(self._key, self._client)
+            self._key = self._client = None
+        self.logger.info('Closed hammer shell session %s', hex(id(self)))
+
+    @property
+    def alive(self):
+        """Whether the remote shell is still running."""
+        return (self.channel is not None and
+                not self.channel.exit_status_ready())
+
+    def _read_until_prompt(self, timeout):
+        """Read the shell output until the next prompt.
+
+        The standard error travels apart from the prompt, so it is read for
+        ``stderr_delay`` more seconds once the prompt shows up, lest it be
+        taken for the standard error of the next command.
+
+        :return: A ``(stdout, stderr)`` tuple, the prompt excluded.
+        :raises HammerShellError: If the shell exits or no prompt shows up
+            within ``timeout`` seconds.
+
+        """
+        stdout = []
+        stderr = []
+        tail = ''
+        deadline = time.time() + timeout
+        while True:
+            if self.channel.recv_stderr_ready():
+                stderr.append(self.channel.recv_stderr(self.bufsize))
+                continue
+            if self.channel.recv_ready():
+                data = self.channel.recv(self.bufsize)
+                stdout.append(data)
+                tail = (tail + data)[-len(self.prompt):]
+                if tail == self.prompt:
+                    break
+                continue
+            if self.channel.exit_status_ready():
+                raise HammerShellError('hammer shell exited unexpectedly.')
+            if time.time() > deadline:
+                raise HammerShellError(
+                    'hammer shell did not answer within {0} seconds.'
+                    ''.format(timeout))
+            time.sleep(0.01)
+        deadline = time.time() + self.stderr_delay
+        while True:
+            if self.channel.recv_stderr_ready():
+                stderr.append(self.channel.recv_stderr(self.bufsize))
+                continue
+            if time.time() > deadline:
+                break
+            time.sleep(0.01)
+        stdout = ''.join(stdout)[:-len(self.prompt)]
+        return stdout.replace('\r\n', '\n'), ''.join(stderr)
+
+    def _send(self, line, timeout):
+        """Send a command line to the shell and read its output.
+
+        :return: A ``(stdout, stderr)`` tuple, without the echoed command
+            line.
+        :raises HammerShellError: If the shell is not running, exits or
+            does not answer in time. The session is closed on any error, as
+            its output can no longer be told apart from the next command's.
+
+        """
+        with self.lock:
+            if self.channel is None:
+                raise HammerShellError('hammer shell is not running.')
+            try:
+                self.channel.sendall(line + '\n')
+                stdout, stderr = self._read_until_prompt(timeout)
+            except Exception:
+                self.close()
+                raise
+        # Readline may echo the command line back
+        if stdout.startswith(line + '\n'):
+            stdout = stdout[len(line) + 1:]
+        return stdout, stderr
+
+    @staticmethod
+    def _split_status(stdout):
+        """Split the exit status printed by :data:`STATUS_HOOK` from the
+        output of a command.
+
+        :return: A ``(stdout, status)`` tuple, ``status`` being None if it
+            was not printed.
+
+        """
+        # The hook prints a line break, the marker and the exit status
+        marker = stdout.rfind('\n' + STATUS_MARKER)
+        if marker == -1:
+            return stdout, None
+        status = stdout[marker + len(STATUS_MARKER) + 1:].strip()
+        return stdout[:marker], int(status)
+
+    def run(self, line, timeout=None):
+        """Run a hammer command line in the shell.
+
+        :param str line: The hammer command, without the leading ``hammer``.
+        :param int timeout: Seconds to wait for the command to finish.
+        :return: A ``(stdout, stderr, return_code)`` tuple, the return code
+            being hammer's exit status.
+        :rtype: tuple
+        :raises HammerShellError: If the shell is not running, exits, does
+            not answer in time or does not print the exit status. The
+            session is closed on any error, as its output can no longer be
+            told apart from the next command's.
+
+        """
+        if timeout is None:
+            timeout = self.timeout
+        line = line.strip()
+        stdout, stderr = self._send(line, timeout)
+        stdout, return_code = self._split_status(stdout)
+        if return_code is None:
+            self.close()
+            raise HammerShellError(
+                'hammer shell did not print the exit status of: {0}'
+                ''.format(line))
+        return stdout, stderr, return_code
+
+
+_local = threading.local()  # (bad var name) pylint: disable=C0103
+
+#: Every session not closed yet, with the thread it belongs to.
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _drop(session):
+    """Close ``session`` and forget it."""
+    with _sessions_lock:
+        _sessions.pop(session, None)
+    sessions = _local.__dict__.get('sessions', {})
+    for key, value in sessions.items():
+        if value is session:
+            del sessions[key]
+    session.close()
+
+
+def _close_orphans():
+    """Close the sessions of the threads which are over."""
+    with _sessions_lock:
+        orphans = [session for session, thread in _sessions.items()
+                   if not thread.is_alive()]
+        for session in orphans:
+            del _sessions[session]
+    for session in orphans:
+        session.close()
+
+
+def _get_session(user, password, hostname=None):
+    """Return a running session of the current thread for the given
+    credentials.
+
+    A session is started if none is running yet. The sessions of the threads
+    which are over are closed on the way.
+
+    """
+    if hostname in _unsupported:
+        raise HammerShellUnsupported(
+            'hammer shell does not print exit statuses.')
+    _close_orphans()
+    sessions = _local.__dict__.setdefault('sessions', {})
+    key = (hostname, user, password)
+    session = sessions.get(key)
+    if session is not None and not session.alive:
+        _drop(session)
+        session = None
+    if session is None:
+        session = HammerShell(user, password, hostname)
+        sessions[key] = session
+        with _sessions_lock:
+            _sessions[session] = threading.current_thread()
+    if session.channel is None:
+        try:
+            session.start()
+        except Exception:
+            _drop(session)
+            raise
+    return session
+
+
+def close_sessions():
+    """Close every running ``hammer shell`` session, of every thread."""
+    with _sessions_lock:
+        sessions = _sessions.keys()
+        _sessions.clear()
+    _local.__dict__.pop('sessions', None)
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_sessions)
+
+
+def execute(command, user, password, expect_csv=False, timeout=None,
+            expect_json=False):
+    """Run a hammer ``command`` in a persistent ``hammer shell`` session.
+
+    Sessions are kept per thread and per credentials, so concurrent callers
+    never share one.
+
+    :raises HammerShellUnsupported: If ``hammer shell`` does not print exit
+        statuses on the server. The command was not run.
+
+    :return: The result of the command, as returned by
+        :func:`robottelo.common.ssh.command`.
+    :rtype: robottelo.common.ssh.SSHCommandResult
+
+    """
+    session = _get_session(user, password)
+    line = command
+    if expect_csv:
+        line = u"--output csv {0}".format(command)
+    elif expect_json:
+        line = u"--output json {0}".format(command)
+    session.logger.debug(">>> hammer shell: %s", line)
+    try:
+        stdout, stderr, return_code = session.run(
+            line.encode('utf-8'), timeout)
+    except Exception:
+        _drop(session)
+        raise
+    return ssh._command_result(  # pylint:disable=W0212
+        stdout, stderr, return_code, expect_csv)
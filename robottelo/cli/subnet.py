@@ -30,3 +30,4 @@ class Subnet(Base):
     """
 
     command_base = "subnet"
+    lazy_create_info = True
@@ -19,9 +19,7 @@ class Subscription(Base):
         Upload a subscription manifest
         """
 
-        cls.command_sub = "upload"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, "upload"))
 
         return result
 
@@ -31,9 +29,8 @@ class Subscription(Base):
         Deletes a subscription manifest
         """
 
-        cls.command_sub = "delete-manifest"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "delete-manifest"))
 
         return result
 
@@ -43,8 +40,7 @@ class Subscription(Base):
         Refreshes a subscription manifest
         """
 
-        cls.command_sub = "refresh-manifest"
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, "refresh-manifest"))
 
         return result
@@ -33,6 +33,7 @@ class Template(Base):
     """
 
     command_base = "template"
+    lazy_create_info = True
 
     @classmethod
     def kinds(cls, options=None):
@@ -40,9 +41,8 @@ class Template(Base):
         Returns list of types of templates.
         """
 
-        cls.command_sub = "kinds"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "kinds"), expect_csv=True)
 
         kinds = []
 
@@ -57,9 +57,9 @@ class Template(Base):
         Adds operating system, requires "id" and "operatingsystem-id".
         """
 
-        cls.command_sub = "add-operatingsystem"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "add-operatingsystem"),
+            expect_csv=True)
 
         return result
 
@@ -69,8 +69,8 @@ class Template(Base):
         Remove operating system, requires "id" and "operatingsystem-id".
         """
 
-        cls.command_sub = "remove-operatingsystem"
-
-        result = cls.execute(cls._construct_command(options), expect_csv=True)
+        result = cls.execute(
+            cls._construct_command(options, "remove-operatingsystem"),
+            expect_csv=True)
 
         return result
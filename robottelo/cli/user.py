@@ -29,3 +29,4 @@ class User(Base):
     """
 
     command_base = "user"
+    lazy_create_info = True
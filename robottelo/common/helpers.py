@@ -5,12 +5,19 @@
 Several helper methods and functions.
 """
 
+import binascii
+import csv
+import ctypes
+import json
 import os
 import random
 import re
 import string
+import sys
 import time
 
+from array import array
+from collections import namedtuple
 from itertools import izip
 from robottelo.common.constants import HTML_TAGS
 from robottelo.common import conf
@@ -70,24 +77,218 @@ def get_server_url():
         ))
 
 
+def _code_points(*ranges):
+    """
+    Returns the characters of the given ``(first, last)`` code point
+    ranges, ``last`` excluded.
+    """
+    return u''.join(
+        unichr(i) for first, last in ranges for i in xrange(first, last))
+
+
+#: The characters drawn by ``DataGenerator``, by kind of string.
+ALPHABETS = {
+    'alpha': unicode(string.ascii_letters),
+    'alphanumeric': unicode(string.ascii_letters + string.digits),
+    'numeric': unicode(string.digits),
+    # Latin 1 letters, without the multiplication and division signs
+    'latin1': _code_points((0xC0, 0xD6), (0xD8, 0xF6), (0xF8, 0xFF)),
+    # CJK Unified Ideographs, without the extensions
+    'utf8': _code_points((0x4E00, 0x9FCC)),
+    'name': unicode(string.ascii_lowercase + string.digits),
+    'hex': u'abcdef0123456789',
+}
+
+
+class DataGenerator(object):
+    """
+    Generates random test data, many values at a time.
+
+    Characters are drawn from the precomputed ``ALPHABETS``, all the
+    characters of a batch of values at once, which is then cut into values.
+    The random bits of a whole batch come from a single ``getrandbits``
+    call, read as an array of integers indexing the alphabet.
+    With ``unique=True``, a value is never returned twice by the same
+    generator for the same kind of data: duplicates are drawn again.
+
+    Unless a seed is given, the random generator is seeded from
+    ``os.urandom``, again after a fork, so that parallel test processes do
+    not generate the same values.
+
+    @param seed: Seed of the random generator, to reproduce the values.
+    @param attempts: Number of times duplicates are drawn again before
+    giving up with a ``ValueError``.
+    """
+
+    def __init__(self, seed=None, attempts=100):
+        self.seed = seed
+        self.attempts = attempts
+        self._random = None
+        self._pid = None
+        # kind of data: set of the values returned
+        self._issued = {}
+
+    def random(self):
+        """
+        Returns the random generator of the current process.
+        """
+        if self._random is None or (
+                self.seed is None and self._pid != os.getpid()):
+            self._random = random.Random(self.seed)
+            self._pid = os.getpid()
+        return self._random
+
+    def reset(self):
+        """
+        Forgets the values returned, which may then be returned again.
+        """
+        self._issued.clear()
+
+    def _indexes(self, size, count):
+        """
+        Returns ``count`` random integers from 0 to ``size`` excluded.
+
+        The bits of all the integers are drawn at once, as bytes read as
+        unsigned integers of the smallest fitting type. Integers beyond the
+        largest multiple of ``size`` are dropped, lest the smallest indexes
+        come up more often, and the missing ones drawn again.
+        """
+        for typecode in 'BHI':
+            span = 256 ** array(typecode).itemsize
+            if span >= size:
+                break
+        limit = span - span % size
+        width = array(typecode).itemsize * 2
+        rand = self.random()
+        indexes = []
+        while len(indexes) < count:
+            number = (count - len(indexes)) * span // limit + 1
+            bits = rand.getrandbits(number * width * 4)
+            data = array(typecode, binascii.unhexlify(
+                '%0*x' % (number * width, bits)))
+            indexes.extend(i % size for i in data if i < limit)
+        del indexes[count:]
+        return indexes
+
+    def _draw(self, alphabet, lengths):
+        """
+        Returns a string of ``length`` random characters of ``alphabet``
+        for each of ``lengths``.
+        """
+        alphabet = ALPHABETS.get(alphabet, alphabet)
+        chars = u''.join([
+            alphabet[i]
+            for i in self._indexes(len(alphabet), sum(lengths))])
+        values = []
+        start = 0
+        for length in lengths:
+            values.append(chars[start:start + length])
+            start += length
+        return values
+
+    def _batch(self, kind, make, count, unique):
+        """
+        Returns ``count`` values returned by ``make(count)``, none of them
+        returned before for ``kind`` if ``unique``.
+        """
+        if not unique:
+            return make(count)
+        issued = self._issued.setdefault(kind, set())
+        values = []
+        for _ in xrange(self.attempts):
+            for value in make(count - len(values)):
+                if value not in issued:
+                    issued.add(value)
+                    values.append(value)
+            if len(values) == count:
+                return values
+        raise ValueError(
+            'Could not generate {0} unique values of {1}'.format(
+                count, kind))
+
+    def strings(self, str_type, length, count=1, unique=False):
+        """
+        Returns ``count`` random strings, see ``generate_string``.
+        """
+        str_type = str_type.lower()
+        if str_type == 'html':
+            def make(number):
+                """Returns random strings wrapped in random tags"""
+                rand = self.random()
+                return [
+                    u'<%s>%s</%s>' % (tag, value, tag)
+                    for tag, value in (
+                        (rand.choice(HTML_TAGS).lower(), value)
+                        for value in self._draw('alpha', [length] * number)
+                    )
+                ]
+        elif str_type in ALPHABETS and str_type not in ('name', 'hex'):
+            def make(number):
+                """Returns random strings"""
+                return self._draw(str_type, [length] * number)
+        else:
+            raise Exception(
+                'Unexpected output type, valid types are "alpha", '
+                '"alphanumeric", "html", "latin1", "numeric" or "utf8".')
+        return self._batch(
+            ('string', str_type, length), make, count, unique)
+
+    def names(self, minimum=4, maximum=8, count=1, unique=False):
+        """
+        Returns ``count`` random names, see ``generate_name``.
+        """
+        if minimum <= 0:
+            minimum = 4
+        if maximum < minimum:
+            maximum = minimum
+
+        def make(number):
+            """Returns random names of random lengths"""
+            return self._draw('name', [
+                minimum + i
+                for i in self._indexes(maximum - minimum + 1, number)])
+        return self._batch('name', make, count, unique)
+
+    def ipaddrs(self, ip3=False, count=1, unique=False):
+        """
+        Returns ``count`` random IP addresses, see ``generate_ipaddr``.
+        """
+        octets = 3 if ip3 else 4
+
+        def make(number):
+            """Returns random IP addresses"""
+            numbers = [unicode(i) for i in self._indexes(255, number * octets)]
+            addresses = []
+            for start in xrange(0, number * octets, octets):
+                address = u'.'.join(numbers[start:start + octets])
+                addresses.append(address + u'.0' if ip3 else address)
+            return addresses
+        return self._batch(('ipaddr', ip3), make, count, unique)
+
+    def macs(self, delimiter=u':', count=1, unique=False):
+        """
+        Returns ``count`` random MAC addresses, see ``generate_mac``.
+        """
+        def make(number):
+            """Returns random MAC addresses"""
+            return [
+                delimiter.join(digits[i:i + 2] for i in xrange(0, 12, 2))
+                for digits in self._draw('hex', [12] * number)
+            ]
+        # Uniqueness does not depend on the delimiter
+        return self._batch('mac', make, count, unique)
+
+
+#: The generator used by the ``generate_*`` functions.
+data_generator = DataGenerator()  # pylint:disable=C0103
+
+
 def generate_name(minimum=4, maximum=8):
     """
     Generates a random string using lower, upper boundaries to determine the
     length.
     """
-
-    if minimum <= 0:
-        minimum = 4
-    if maximum < minimum:
-        maximum = minimum
-
-    rand = random.SystemRandom()
-    pool1 = string.ascii_lowercase + string.digits
-
-    name = u''.join(
-        rand.choice(pool1) for x in range(random.randint(minimum, maximum)))
-
-    return unicode(name)
+    return data_generator.names(minimum, maximum)[0]
 
 
 def generate_email_address(name_length=8, domain_length=6):
@@ -155,29 +356,18 @@ def generate_ipaddr(ip3=False):
     """
     Generates a random IP address.
     """
-    rng = 3 if ip3 else 4
-    ipaddr = u'.'.join(str(random.randrange(0, 255, 1)) for x in range(rng))
-
-    return unicode(ipaddr if not ip3 else ipaddr + u'.0')
+    return data_generator.ipaddrs(ip3)[0]
 
 
 def generate_mac(delimiter=u':'):
     """
     Generates a random MAC address.
     """
-    chars = ['a', 'b', 'c', 'd', 'e', 'f',
-             '0', '1', '2', '3', '4', '5', '6', '7', '8', '9']
-
     # We'll eventually need to be able to test against all valid
     # (and some invalid!) delimiters, so might as well make it
     # parameterized.  Valid delimiters include (but may not be
     # limited to):  ':', "-", "None"
-
-    mac = delimiter.join(
-        chars[random.randrange(0, len(chars), 1)]+chars[random.randrange(
-            0, len(chars), 1)] for x in range(6))
-
-    return unicode(mac)
+    return data_generator.macs(delimiter)[0]
 
 
 class STR:
@@ -197,64 +387,11 @@ def generate_string(str_type, length):
     This function will allow creation of a wide variety of string types,
     of arbitrary length.  Presently the unicode strings are CJK-only but
     should suffice for the purposes of most multibyte testing.
+
+    The characters are drawn from ``ALPHABETS``; use ``data_generator``
+    directly to generate many strings at once, or unique ones.
     '''
-    # approximate range of CJK Unified Ideographs
-    # It does not include extensions: '4E00- 9FFF'
-    # (note: big block of unused -- possibly reserved -- characters
-    # at the end of range above.  Code below does not include these
-    # as they are, in the end, invalid unicode for now)
-    # Latin 1 range: '00C0-00F0'
-    # (note: includes some mathematical symbol, which sort of wreaks
-    # havoc with using full range.  See range broken outto avoid these,
-    # below)
-
-    # First lowercase the selected str type
-    str_type = str_type.lower()
-
-    if str_type == "alphanumeric":
-        output_string = u''.join(
-            random.choice(
-                string.ascii_letters + string.digits
-            ) for i in range(length))
-    elif str_type == "alpha":
-        output_string = u''.join(
-            random.choice(string.ascii_letters) for i in range(length)
-        )
-    elif str_type == "numeric":
-        output_string = u''.join(
-            random.choice(string.digits) for i in range(length)
-        )
-    elif str_type == "latin1":
-        range0 = range1 = range2 = []
-        range0 = ['00C0', '00D6']
-        range1 = ['00D8', '00F6']
-        range2 = ['00F8', '00FF']
-        output_array = []
-        for i in range(int(range0[0], 16), int(range0[1], 16)):
-            output_array.append(i)
-        for i in range(int(range1[0], 16), int(range1[1], 16)):
-            output_array.append(i)
-        for i in range(int(range2[0], 16), int(range2[1], 16)):
-            output_array.append(i)
-        output_string = u''.join(
-            unichr(random.choice(output_array)) for x in xrange(length))
-    elif str_type == "utf8":
-        cjk_range = []
-        cjk_range = ['4E00', '9FCC']
-        output_array = []
-        for i in range(int(cjk_range[0], 16), int(cjk_range[1], 16)):
-            output_array.append(i)
-        output_string = u''.join(
-            unichr(random.choice(output_array)) for x in xrange(length))
-    elif str_type == "html":
-        html_tag = random.choice(HTML_TAGS).lower()
-        output_string = u'<%s>%s</%s>' % (
-            html_tag, generate_string("alpha", length), html_tag)
-    else:
-        raise Exception(
-            'Unexpected output type, valid types are \"alpha\", \
-            \"alphanumeric\", \"html\", \"latin1\", \"numeric\" or \"utf8\".')
-    return unicode(output_string)
+    return data_generator.strings(str_type, length)[0]
 
 
 def generate_strings_list(len1=8):
@@ -274,23 +411,98 @@ def generate_strings_list(len1=8):
     return str_list
 
 
+def _parse_quoted_csv(record):
+    """Parse a CSV ``record`` holding quoted values with the csv module."""
+    if isinstance(record, unicode):
+        record = record.encode('utf-8')
+    row = next(csv.reader([record]), [])
+    return tuple(value.decode('utf-8') for value in row)
+
+
+def iter_csv_rows(data):
+    """
+    Parses CSV data from Hammer CLI, following RFC 4180, and yields a tuple
+    of values per row. Empty lines are skipped.
+
+    Values can be quoted, to hold commas, doubled quotes or line breaks,
+    a quoted value then spanning several lines of ``data``. Lines without
+    any quote are simply split on commas.
+
+    @param data: An iterable of CSV lines, without their line terminator.
+    """
+
+    pending = None
+    for line in data:
+        if pending is None:
+            if '"' not in line:
+                if line:
+                    yield tuple(line.split(','))
+                continue
+            record = line
+        else:
+            record = pending + '\n' + line
+        # An odd number of quotes means a quoted value goes on next line
+        if record.count('"') % 2:
+            pending = record
+            continue
+        pending = None
+        yield _parse_quoted_csv(record)
+
+    if pending is not None:
+        yield _parse_quoted_csv(pending)
+
+
+def _csv_keys(headers):
+    """Turn CSV headers, like ``Full Name``, into keys like ``full-name``."""
+    return tuple(header.replace(' ', '-').lower() for header in headers)
+
+
+def iter_csv_dictionary(data):
+    """
+    Converts CSV data from Hammer CLI and yields a python dictionary per row.
+
+    @param data: An iterable of CSV lines, the first one being the header.
+    It can be a generator, such as a robottelo.common.ssh.SSHCommandStream.
+    """
+
+    rows = iter_csv_rows(data)
+    headers = next(rows, None)
+    if headers is None:
+        return
+
+    dic_keys = _csv_keys(headers)
+
+    for row in rows:
+        yield dict(izip(dic_keys, row))
+
+
 def csv_to_dictionary(data):
     """
     Converts CSV data from Hammer CLI and returns a python dictionary.
     """
 
-    records = []
+    return list(iter_csv_dictionary(data))
 
-    items = data
-    headers = items.pop(0)
-    dic_values = [item.split(',') for item in items if len(item) > 0]
 
-    dic_keys = [x.replace(' ', '-').lower() for x in headers.split(',')]
+#: Column oriented CSV data: a tuple of keys and a list of value tuples
+CSVTable = namedtuple('CSVTable', ('keys', 'rows'))
 
-    for value in dic_values:
-        records.append(dict(izip(dic_keys, value)))
 
-    return records
+def csv_to_table(data):
+    """
+    Converts CSV data from Hammer CLI into a compact CSVTable, sharing one
+    tuple of keys between all rows instead of building a dictionary per
+    row. Suited to large lists.
+
+    @return: A CSVTable, whose keys are empty if ``data`` is.
+    """
+
+    rows = iter_csv_rows(data)
+    headers = next(rows, None)
+    if headers is None:
+        return CSVTable((), [])
+
+    return CSVTable(_csv_keys(headers), list(rows))
 
 
 def escape_search(term):
@@ -307,6 +519,153 @@ def sleep_for_seconds(guaranteed_sleep=1):
     time.sleep(random.uniform(guaranteed_sleep, guaranteed_sleep + 1))
 
 
+def wait_until(predicate, timeout=30, delay=0.1, max_delay=2, backoff=2):
+    """
+    Calls ``predicate`` until it returns a true value, sleeping between the
+    calls for an exponentially growing delay.
+    @param predicate: Callable taking no arguments.
+    @param timeout: Seconds after which to give up.
+    @param delay: Seconds to sleep after the first call.
+    @param max_delay: Maximum seconds to sleep between two calls.
+    @param backoff: Factor applied to the delay after each call.
+    @return: True if ``predicate`` returned a true value in time, False
+    otherwise.
+    """
+    deadline = time.time() + timeout
+    while True:
+        if predicate():
+            return True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * backoff, max_delay)
+
+
+def _monotonic_clock():
+    """
+    Returns a function reading the monotonic clock of the system, which
+    never goes backwards when the system time is set, or ``time.time`` if
+    it is not available.
+    """
+    if not sys.platform.startswith('linux'):
+        return time.time
+
+    class Timespec(ctypes.Structure):  # pylint:disable=R0903
+        """The C ``struct timespec``."""
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    # Loaded by soname, as ctypes.util.find_library runs ldconfig or gcc
+    for library in ('librt.so.1', 'libc.so.6'):
+        try:
+            clock_gettime = ctypes.CDLL(library, use_errno=True).clock_gettime
+            break
+        except (OSError, AttributeError):
+            pass
+    else:
+        return time.time
+    clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(Timespec)]
+
+    def clock():
+        """Returns the seconds elapsed on the monotonic clock."""
+        timespec = Timespec()
+        if clock_gettime(1, ctypes.pointer(timespec)) != 0:  # MONOTONIC
+            return time.time()
+        return timespec.tv_sec + timespec.tv_nsec * 1e-9
+
+    return clock
+
+
+_clock = None  # pylint:disable=C0103
+
+
+def monotonic():
+    """
+    Returns seconds from a clock which never goes backwards, to measure
+    durations and deadlines. The clock is looked up on the first call.
+    """
+    global _clock  # pylint:disable=W0603
+    if _clock is None:
+        _clock = _monotonic_clock()
+    return _clock()
+
+
+class TaskPoller(object):
+    """
+    Polls an asynchronous task until it is finished or a deadline is reached.
+
+    The interval between two checks starts at ``min_delay`` and is
+    multiplied by ``backoff`` after each check, up to ``max_delay``. When
+    the ``progress`` field of the task (from 0 to 1) grew since the previous
+    check, the next check is scheduled for when the task should be done at
+    that pace, within the same bounds.
+
+    The number of checks and the seconds waited are kept in the ``polls``
+    and ``waited`` attributes, for reporting.
+
+    @param read: Callable returning the task as a dictionary.
+    @param finished: Callable telling whether a task dictionary is
+    finished. By default, a task is finished when its ``pending`` field is
+    false.
+    @param timeout: Seconds after which to give up.
+    @param min_delay: Minimum seconds between two checks, lowered to
+    ``max_delay`` if greater.
+    @param max_delay: Maximum seconds between two checks.
+    @param backoff: Factor applied to the delay after each check.
+    """
+
+    def __init__(self, read, finished=None, timeout=120, min_delay=0.5,
+                 max_delay=5, backoff=2):
+        self.read = read
+        self.finished = finished or (lambda task: not task['pending'])
+        self.timeout = timeout
+        self.min_delay = min(min_delay, max_delay)
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.polls = 0
+        self.waited = 0.0
+        self.task = None
+
+    def _next_delay(self, delay, progress, last):
+        """
+        Returns the seconds to wait before the next check.
+
+        @param delay: The delay given by the backoff.
+        @param progress: The ``(time, progress)`` of the last check.
+        @param last: The ``(time, progress)`` of the check before it.
+        """
+        if (last is not None and progress[1] is not None and
+                last[1] is not None and progress[1] > last[1]):
+            rate = (progress[1] - last[1]) / (progress[0] - last[0])
+            delay = (1 - progress[1]) / rate
+        return max(self.min_delay, min(delay, self.max_delay))
+
+    def poll(self):
+        """
+        Checks the task until it is finished or the timeout is reached.
+
+        @return: The last read task dictionary. Check it with ``finished``
+        to tell whether it timed out.
+        """
+        deadline = monotonic() + self.timeout
+        delay = self.min_delay
+        last = None
+        while True:
+            self.task = self.read()
+            self.polls += 1
+            if self.finished(self.task):
+                return self.task
+            now = monotonic()
+            progress = (now, self.task.get('progress'))
+            wait = min(self._next_delay(delay, progress, last), deadline - now)
+            if wait <= 0:
+                return self.task
+            time.sleep(wait)
+            self.waited += wait
+            delay = min(delay * self.backoff, self.max_delay)
+            last = progress
+
+
 def update_dictionary(default, updates):
     """
     Updates default dictionary with elements from
@@ -327,84 +686,120 @@ def update_dictionary(default, updates):
     return default
 
 
+#: Key of a numbered item, like ``1) Repo Name``
+_INFO_NUMBERED_KEY = re.compile(r'(\d+)\)')
+_INFO_NUMBER = re.compile(r'\d+\)')
+#: Value of a numbered single attribute, like ``1) template1``
+_INFO_LIST_ITEM = re.compile(r'\d+\)\s+(.+)$')
+
+
+def _info_key(key):
+    """Turn an info label, like ``Full Name``, into a key like
+    ``full-name``."""
+    return key.lstrip().replace(' ', '-').lower()
+
+
+def _json_info(value):
+    """Convert hammer JSON output to the structure of its text output.
+
+    Labels are turned into keys and values into strings: booleans become
+    ``yes`` or ``no`` and null values empty strings.
+    """
+    if isinstance(value, dict):
+        return dict(
+            (_info_key(key), _json_info(val)) for key, val in value.items())
+    if isinstance(value, list):
+        return [_json_info(val) for val in value]
+    if isinstance(value, bool):
+        return u'yes' if value else u'no'
+    if value is None:
+        return u''
+    return unicode(value)
+
+
 def info_dictionary(result):
     """
-    Function for converting result to dictionary, from info function in base..
+    Function for converting result to dictionary, from info function in base.
+
+    The text output of hammer info is parsed in a single pass. Lines without
+    indentation hold a ``key: value`` property, or start a group of
+    sub-properties when they have no value. Indented lines are the
+    sub-properties of the last group, either ``key: value`` or
+    ``key => value`` pairs, single values, or numbered items::
+
+        Content:
+         1) Repo Name: repo1
+            URL:       /custom/url1
+
+    Hammer JSON output (``--output json``) is converted to the same
+    structure.
     """
-    # info dictionary
+    lines = result.stdout
+    first = next((line for line in lines if line), u'')
+    if first.lstrip().startswith('{'):
+        result.stdout = _json_info(json.loads(u'\n'.join(lines)))
+        return result
+
     r = {}
     sub_prop = None  # stores name of the last group of sub-properties
-    sub_num = None  # is not None when list of properties
+    item = None  # is not None when in a list of numbered properties
 
-    for line in result.stdout:
+    for line in lines:
         # skip empty lines
-        if line == '':
+        if not line:
             continue
-        if line.startswith(' '):  # sub-properties are indented
-            # values are separated by ':' or '=>'
-            if line.find(':') != -1:
-                key, value = line.lstrip().split(":", 1)
-            elif line.find('=>') != -1:
-                key, value = line.lstrip().split(" =>", 1)
-            else:
-                key = value = None
-
-            if key is None and value is None:
-                # Parse single attribute collection properties
-                # Template
-                #  1) template1
-                #  2) template2
-                #
-                # or
-                # Template
-                #  template1
-                #  template2
-                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
-
-                if match is None:
-                    match = re.match(r'(.*)$', line.lstrip())
-
-                value = match.group(1)
-
-                if isinstance(r[sub_prop], dict):
+        stripped = line.lstrip()
+        if line[0] != ' ':
+            item = None  # new property implies no sub property
+            key, _, value = stripped.partition(':')
+            key = key.replace(' ', '-').lower()
+            value = value.lstrip()
+            if value:  # 'key: value' line
+                r[key] = value
+            else:  # 'key:' no value, new sub-property
+                sub_prop = key
+                r[sub_prop] = {}
+            continue
+
+        # sub-properties are indented, values are separated by ':' or '=>'
+        key, sep, value = stripped.partition(':')
+        if not sep:
+            key, sep, value = stripped.partition(' =>')
+        if not sep:
+            # Parse single attribute collection properties
+            # Template
+            #  1) template1
+            #  2) template2
+            #
+            # or
+            # Template
+            #  template1
+            #  template2
+            match = _INFO_LIST_ITEM.match(stripped)
+            if match is not None:
+                stripped = match.group(1)
+            if isinstance(r[sub_prop], dict):
+                r[sub_prop] = []
+            r[sub_prop].append(stripped)
+            continue
+
+        # some properties have many numbered values
+        if key[:1].isdigit():
+            number = _INFO_NUMBERED_KEY.match(key)
+            if number is not None:
+                # no. 1) we need to change dict() to list()
+                if int(number.group(1)) == 1 or isinstance(
+                        r[sub_prop], dict):
                     r[sub_prop] = []
+                key = _INFO_NUMBER.sub('', key).lstrip()
+                item = {}
+                r[sub_prop].append(item)
 
-                r[sub_prop].append(value)
-            else:
-                # some properties have many numbered values
-                # Example:
-                # Content:
-                #  1) Repo Name: repo1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                #  2) Repo Name: puppet1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                starts_with_number = re.match(r'(\d+)\)', key)
-                if starts_with_number:
-                    sub_num = int(starts_with_number.group(1))
-                    # no. 1) we need to change dict() to list()
-                    if sub_num == 1:
-                        r[sub_prop] = []
-                    # remove number from key
-                    key = re.sub(r'\d+\)', '', key)
-                    # append empty dict to array
-                    r[sub_prop].append({})
-
-                key = key.lstrip().replace(' ', '-').lower()
-
-                # add value to dictionary
-                if sub_num is not None:
-                    r[sub_prop][-1][key] = value.lstrip()
-                else:
-                    r[sub_prop][key] = value.lstrip()
+        # add value to dictionary
+        if item is not None:
+            item[key.replace(' ', '-').lower()] = value.lstrip()
         else:
-            sub_num = None  # new property implies no sub property
-            key, value = line.lstrip().split(":", 1)
-            key = key.lstrip().replace(' ', '-').lower()
-            if value.lstrip() == '':  # 'key:' no value, new sub-property
-                sub_prop = key
-                r[sub_prop] = {}
-            else:  # 'key: value' line
-                r[key] = value.lstrip()
+            r[sub_prop][key.replace(' ', '-').lower()] = value.lstrip()
 
     # update result
     result.stdout = r
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Records class definition with its options and metaclass"""
 
-import copy
+import logging
+import operator
 import random
 import itertools
 
@@ -21,6 +22,102 @@ def create_choice(enum, fields):
     return result
 
 
+def covering_array(values, strength=2, candidate_rows=20):
+    """Returns rows of values, one value per column of ``values``,
+    such that every combination of values of any ``strength`` columns
+    is found in at least one row.
+
+    The rows are built greedily: each one is the candidate row covering the
+    most remaining combinations, out of ``candidate_rows``. This gives far
+    fewer rows than the full product.
+
+    >>> rows = covering_array([["a1", "a2"], ["b1", "b2"], ["c1", "c2"]])
+    >>> len(rows)
+    4
+    """
+    values = [list(column) for column in values]
+    columns = range(len(values))
+    strength = min(strength, len(values))
+    if strength == len(values):
+        return [list(row) for row in itertools.product(*values)]
+
+    # Combinations yet to cover: tuples of (column, value index) pairs
+    uncovered = set()
+    groups = list(itertools.combinations(columns, strength))
+    for group in groups:
+        for indexes in itertools.product(*[range(len(values[c]))
+                                           for c in group]):
+            uncovered.add(tuple(zip(group, indexes)))
+    groups_of = dict(
+        (column, [group for group in groups if column in group])
+        for column in columns)
+
+    def complete(seed, order):
+        """Returns a row holding seed, and the combinations it covers"""
+        row = dict(seed)
+        for column in order:
+            if column in row:
+                continue
+            best, best_count = 0, -1
+            for index in range(len(values[column])):
+                row[column] = index
+                count = sum(
+                    1 for group in groups_of[column]
+                    if all(c in row for c in group) and
+                    tuple((c, row[c]) for c in group) in uncovered)
+                if count > best_count:
+                    best, best_count = index, count
+            row[column] = best
+        covered = set(
+            tuple((c, row[c]) for c in group) for group in groups
+            ) & uncovered
+        return row, covered
+
+    # Pick the best of a few candidate rows, built from different seeds and
+    # column orders, seeded so that the same rows are returned every time
+    rand = random.Random(0)
+    rows = []
+    while uncovered:
+        candidates = [complete(min(uncovered), columns)]
+        for _ in range(candidate_rows - 1):
+            order = list(columns)
+            rand.shuffle(order)
+            candidates.append(
+                complete(rand.choice(tuple(uncovered)), order))
+        row, covered = max(candidates, key=lambda c: len(c[1]))
+        uncovered -= covered
+        rows.append([values[c][row[c]] for c in columns])
+    return rows
+
+
+class Enumeration(object):
+    """Records of an enumeration, see Record.enumerate,
+    instantiated one at a time while iterating.
+
+    ``choices`` is a callable returning the choices of each record.
+    ``cases`` is the number of records and ``product`` the number of
+    records of the full product of every enumerated field.
+    """
+
+    def __init__(self, record_class, choices, fields, cases, product):
+        self.record_class = record_class
+        self.choices = choices
+        self.fields = fields
+        self.cases = cases
+        self.product = product
+
+    def __len__(self):
+        return self.cases
+
+    def __iter__(self):
+        for enum in self.choices():
+            yield self.record_class(**create_choice(enum, self.fields))
+
+    def __repr__(self):
+        return "<Enumeration of {0}: {1} of {2} combinations>".format(
+            self.record_class.__name__, self.cases, self.product)
+
+
 class FieldsOpts(object):
     """
     Fields class for the Options meta information in Records
@@ -103,9 +200,22 @@ class RecordBase(type):
         if not parents:
             return super_new(mcs, name, bases, attrs)
 
-        # Creates the class
+        # Creates the class, with a slot for each declared field, the
+        # instance __dict__ inherited from Record holding any other value
         module = attrs.pop('__module__')
-        new_class = super_new(mcs, name, bases, {'__module__': module})
+        inherited = set()
+        for parent in parents:
+            inherited.update(parent._field_slots)  # pylint: disable=W0212
+        slots = tuple(sorted(set(
+            obj.name or obj_name
+            for obj_name, obj in attrs.items()
+            if isinstance(obj, Field) and
+            not (obj.name or obj_name).startswith("_")
+            ) - inherited))
+        new_class = super_new(
+            mcs, name, bases, {'__module__': module, '__slots__': slots})
+        new_class._field_slots = tuple(sorted(inherited)) + slots
+        new_class._field_slot_set = frozenset(new_class._field_slots)
         attr_meta = attrs.pop('Meta', None)
         if not attr_meta:
             meta = getattr(new_class, 'Meta', None)
@@ -136,31 +246,66 @@ class NoEnum(object):  # pylint: disable=R0903
     """No enum class representation"""
 
 
+def _copy_value(value, memo):
+    """Copies the records, lists and dicts found in value,
+    sharing everything else. memo maps the ids of the records
+    already copied to their copy.
+    """
+    if isinstance(value, Record):
+        return value._copy(memo)  # pylint: disable=W0212
+    elif isinstance(value, list):
+        return [_copy_value(item, memo) for item in value]
+    elif isinstance(value, dict):
+        return dict(
+            (key, _copy_value(item, memo)) for key, item in value.items())
+    elif isinstance(value, tuple):
+        return tuple(_copy_value(item, memo) for item in value)
+    return value
+
+
 class Record(object):
     """ Entity definition and generating class
+
+    The RecordBase metaclass gives each record class a slot per declared
+    field, listed in _field_slots, so that fields are stored compactly and
+    checked for in constant time. Any other value is kept in __dict__.
     """
     __metaclass__ = RecordBase
+    _field_slots = ()
+    _field_slot_set = frozenset()
 
     def __getitem__(self, key):
-        if key in self.keys():
+        if key in self._field_slot_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        elif key in self:
             return self.__dict__[key]
-        else:
-            raise KeyError("Not found in record,", key)
+        raise KeyError("Not found in record,", key)
 
     def __delitem__(self, key):
-        if key in self.keys():
-            del self.__dict__[key]
-        else:
+        if key not in self:
             raise KeyError("Not found in record,", key)
+        if key in self._field_slot_set:
+            delattr(self, key)
+        else:
+            del self.__dict__[key]
 
     def __setitem__(self, key, value):
-        self.__dict__[key] = value
+        if key in self._field_slot_set:
+            setattr(self, key, value)
+        else:
+            self.__dict__[key] = value
 
     def __iter__(self):
         return iter(self.keys())
 
     def __contains__(self, key):
-        return key in self.keys()
+        if key in self._field_slot_set:
+            return hasattr(self, key)
+        return (isinstance(key, basestring) and bool(key) and
+                not key.startswith("_") and key in self.__dict__)
 
     def record_set_field(self, **kwargs):
         """Set the valus for all fields in kwargs"""
@@ -170,17 +315,42 @@ class Record(object):
 
     def keys(self):
         """Adding dict functionality to records"""
-        return [key for key in vars(self).keys()
-                if not key.startswith("_") and key != ""]
+        return [key for key, _ in self.items()]
 
     def items(self):
         """Adding dict functionality to records"""
-        return [(key, value) for key, value in vars(self).items()
-                if not key.startswith("_") and key != ""]
+        items = []
+        for key in self._field_slots:
+            try:
+                items.append((key, getattr(self, key)))
+            except AttributeError:
+                pass
+        items.extend(
+            (key, value) for key, value in self.__dict__.items()
+            if not key.startswith("_") and key != "")
+        return items
 
     def copy(self):
-        """We use deepcopy as our copy implementation"""
-        return copy.deepcopy(self)
+        """Copies the record structurally: the fields holding records,
+        lists and dicts are copied, the other values are shared
+        """
+        return self._copy({})
+
+    def _copy(self, memo):
+        """Copies the record, once per memo"""
+        new = memo.get(id(self))
+        if new is not None:
+            return new
+        new = memo[id(self)] = self.__class__.__new__(self.__class__)
+        for key in self._field_slots:
+            try:
+                setattr(new, key, _copy_value(getattr(self, key), memo))
+            except AttributeError:
+                pass
+        new.__dict__.update(
+            (key, _copy_value(value, memo))
+            for key, value in self.__dict__.items())
+        return new
 
     @classmethod
     def matrix_enumerate(cls, *args, **kwargs):
@@ -190,6 +360,14 @@ class Record(object):
         """
         return cls.enumerate(MATRIX=2, *args, **kwargs)
 
+    @classmethod
+    def pairwise_enumerate(cls, *args, **kwargs):
+        """Calls enumerate with the NWISE=2 option,
+        representing every pair of items of two choice fields
+        with far fewer records than matrix_enumerate.
+        """
+        return cls.enumerate(NWISE=2, *args, **kwargs)
+
     @classmethod
     def enumerate(cls, *args, **kwargs):
         """Generates instances of record so that
@@ -215,6 +393,19 @@ class Record(object):
         >>> len(test.enumerate(MATRIX=True))
         81
 
+        With NWISE=n, every combination of items of any n choice fields
+        is represented, pairwise with NWISE=2, by a covering array:
+        >>> len(test.enumerate(NWISE=2))
+        9
+
+        With LAZY=True, an Enumeration is returned instead of a list:
+        records are only instantiated while iterating over it, and its
+        ``cases`` and ``product`` attributes tell how many records it holds,
+        and how many the full product would.
+        >>> enumeration = test.enumerate(NWISE=2, LAZY=True)
+        >>> (enumeration.cases, enumeration.product)
+        (9, 81)
+
         Now for some more concrete examples:
         >>> from robottelo.common.records.base import Record
         >>> from robottelo.common.records import ChoiceField
@@ -240,6 +431,8 @@ class Record(object):
         matrix_conf = conf.properties["main.matrix"]
         matrix = kwargs.pop("MATRIX") if "MATRIX" in kwargs else matrix_conf
         matrix = int(matrix)
+        nwise = int(kwargs.pop("NWISE", 0))
+        lazy = kwargs.pop("LAZY", False)
 
         fnames = [f.name for f in iter(cls._meta.fields)]
         fields = dict(zip(fnames, args))
@@ -262,13 +455,19 @@ class Record(object):
             (not isinstance(value, Field) or not value.enumerable)
             )
 
-        e2 = []
+        keys = enumerated.keys()
+        product = reduce(
+            operator.mul, (len(vx) for vx in enumerated.values()), 1)
 
-        if matrix > 1:
+        if nwise > 0:
             e2 = [
-                dict(zip(enumerated.keys(), y))
-                for y in [x for x in itertools.product(*enumerated.values())]
+                dict(zip(keys, row))
+                for row in covering_array(enumerated.values(), nwise)
                 ]
+            cases = len(e2)
+        elif matrix > 1:
+            e2 = None
+            cases = product
         else:
             e2 = [
                 {key: value} for key, value in
@@ -276,14 +475,28 @@ class Record(object):
                     [(key, value) for value in vx]
                     for key, vx in enumerated.items()])
                 ]
-
-        if matrix == 0:
-            chosen = [random.choice(
-                [cls(**create_choice(enum, fields)) for enum in e2]
-                )]
-            return chosen
-        else:
-            return [cls(**create_choice(enum, fields)) for enum in e2]
+            cases = len(e2)
+            if matrix == 0:
+                e2 = [random.choice(e2)]
+                cases = 1
+
+        logging.getLogger("robottelo").debug(
+            "Enumerated %s of %s combinations of %s",
+            cases, product, cls.__name__)
+
+        def choices():
+            """Returns the choices of each record"""
+            if e2 is not None:
+                return e2
+            return (
+                dict(zip(keys, row))
+                for row in itertools.product(*enumerated.values())
+                )
+
+        enumeration = Enumeration(cls, choices, fields, cases, product)
+        if lazy:
+            return enumeration
+        return list(enumeration)
 
     def __init__(self, *args, **kwargs):
         """Constructs record based on its definition.
@@ -399,7 +612,7 @@ class Record(object):
 
         name = self.__class__.__name__
         fields = ", ".join("%s=%s" % (
-            str(key), repr(value)) for key, value in self.__dict__.items())
+            str(key), repr(value)) for key, value in self.items())
         fullname = u"%s(%s)" % (name, fields)
         return fullname.encode("utf8")
 
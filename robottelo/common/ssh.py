@@ -2,11 +2,16 @@
 Utility module to handle the shared ssh connection
 """
 
+import atexit
 import logging
 import re
+import socket
 import sys
+import threading
+import time
 
 from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from robottelo.common import conf
 from robottelo.common.helpers import csv_to_dictionary
 
@@ -17,6 +22,10 @@ except ImportError:
     sys.exit(-1)
 
 
+# Escape codes for colors displayed in the output
+_COLOR_ESCAPE = re.compile(r'\x1b\[\d\d?m')
+
+
 class SSHCommandResult(object):
     """
     Structure that returns in all ssh commands results.
@@ -89,6 +98,249 @@ def _get_connection(timeout=10):
         robo_logger.info('Destroyed Paramiko client {0}'.format(client_id))
 
 
+def _connection_is_alive(client):
+    """Tell whether the transport behind ``client`` can still be used.
+
+    :param paramiko.SSHClient client: A connected SSH client.
+    :return: ``True`` if the transport is active and accepts an ``ignore``
+        message, ``False`` otherwise.
+    :rtype: bool
+
+    """
+    transport = client.get_transport()
+    if transport is None or not transport.is_active():
+        return False
+    try:
+        transport.send_ignore()
+    except (socket.error, EOFError, paramiko.SSHException):
+        return False
+    return True
+
+
+def _connection_key(hostname=None, username=None, key_filename=None):
+    """Return the ``(hostname, username, key_filename)`` pool key.
+
+    Missing values default to the ``main.server.hostname``,
+    ``main.server.ssh.username`` and ``main.server.ssh.key_private``
+    configuration properties.
+
+    """
+    return (
+        hostname or conf.properties['main.server.hostname'],
+        username or conf.properties['main.server.ssh.username'],
+        key_filename or conf.properties['main.server.ssh.key_private'],
+    )
+
+
+class SSHConnectionPool(object):
+    """A thread-safe pool of reusable SSH connections.
+
+    Connections are keyed by ``(hostname, username, key_filename)``. A
+    connection is handed to a single caller at a time and goes back to the
+    pool when the caller is done with it, so the underlying
+    ``paramiko.Transport`` (and its TCP and key-exchange handshake) is reused
+    by the following commands.
+
+    Idle connections are health-checked before being reused and are closed
+    once they have been idle for more than ``idle_timeout`` seconds. If
+    ``idle_timeout`` is ``None``, the value of the
+    ``main.server.ssh.pool_idle_timeout`` configuration property is used,
+    defaulting to 60 seconds.
+
+    The following counters are kept and returned by :meth:`stats`:
+
+    * ``hits``: an idle connection was reused.
+    * ``misses``: no idle connection was available and a new one was opened.
+    * ``reconnects``: idle connections were found dead, so a new one was
+      opened instead.
+    * ``evictions``: idle connections closed because of the idle timeout.
+
+    """
+    def __init__(self, idle_timeout=None):
+        self.idle_timeout = idle_timeout
+        self.hits = 0
+        self.misses = 0
+        self.reconnects = 0
+        self.evictions = 0
+        self._idle = {}  # key -> list of (client, last used timestamp)
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger('robottelo')
+
+    def _get_idle_timeout(self):
+        """Return the number of seconds a connection may stay idle."""
+        if self.idle_timeout is not None:
+            return self.idle_timeout
+        return float(conf.properties.get(
+            'main.server.ssh.pool_idle_timeout', 60))
+
+    def _evict_expired(self):
+        """Close idle connections older than the idle timeout.
+
+        Must be called with ``self._lock`` held.
+
+        """
+        deadline = time.time() - self._get_idle_timeout()
+        for key, idle in self._idle.items():
+            fresh = []
+            for client, last_used in idle:
+                if last_used < deadline:
+                    self.evictions += 1
+                    client.close()
+                else:
+                    fresh.append((client, last_used))
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+
+    def _connect(self, key, timeout):
+        """Open a new SSH connection for ``key``."""
+        hostname, username, key_filename = key
+        client = _call_paramiko_sshclient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(
+            hostname=hostname,
+            username=username,
+            key_filename=key_filename,
+            timeout=timeout
+        )
+        self._logger.info(
+            'Instantiated pooled Paramiko client {0}'.format(hex(id(client))))
+        return client
+
+    def acquire(self, key, timeout=10):
+        """Return a connection for ``key``, reusing an idle one if possible.
+
+        :param tuple key: A ``(hostname, username, key_filename)`` tuple.
+        :param int timeout: Timeout used when a new connection is opened.
+        :return: An SSH connection. It must be given back with
+            :meth:`release` or closed by the caller.
+        :rtype: paramiko.SSHClient
+
+        """
+        stale = False
+        with self._lock:
+            self._evict_expired()
+            idle = self._idle.get(key, [])
+            while idle:
+                client, _ = idle.pop()
+                if _connection_is_alive(client):
+                    self.hits += 1
+                    return client
+                client.close()
+                stale = True
+            if stale:
+                self.reconnects += 1
+            else:
+                self.misses += 1
+        # Connecting may take a while, do not hold the lock meanwhile.
+        return self._connect(key, timeout)
+
+    def release(self, key, client):
+        """Give ``client`` back to the pool so it can be reused."""
+        with self._lock:
+            self._idle.setdefault(key, []).append((client, time.time()))
+
+    def close_all(self):
+        """Close every idle connection held by the pool."""
+        with self._lock:
+            for idle in self._idle.values():
+                for client, _ in idle:
+                    client.close()
+            self._idle = {}
+
+    def stats(self):
+        """Return the pool counters.
+
+        :return: A dict with the ``hits``, ``misses``, ``reconnects``,
+            ``evictions`` and ``idle`` (connections currently idle) keys.
+        :rtype: dict
+
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'reconnects': self.reconnects,
+                'evictions': self.evictions,
+                'idle': sum(len(idle) for idle in self._idle.values()),
+            }
+
+    @contextmanager
+    def connection(self, hostname=None, username=None, key_filename=None,
+                   timeout=10):
+        """Yield a pooled ssh connection object.
+
+        Missing parameters default to the configuration properties, see
+        :func:`_connection_key`. The connection goes back to the pool when
+        the ``with`` block ends, unless an exception was raised, in which case
+        it is closed::
+
+            with pool.connection() as connection:
+                ...
+
+        :return: An SSH connection.
+        :rtype: paramiko.SSHClient
+
+        """
+        # Hide base logger from paramiko
+        logging.getLogger('paramiko').setLevel(logging.ERROR)
+
+        key = _connection_key(hostname, username, key_filename)
+        client = self.acquire(key, timeout)
+        try:
+            yield client
+        except Exception:
+            client.close()
+            raise
+        self.release(key, client)
+
+
+_pool = SSHConnectionPool()
+atexit.register(_pool.close_all)
+
+
+def pool_stats():
+    """Return the statistics of the shared SSH connection pool.
+
+    See :meth:`SSHConnectionPool.stats`.
+
+    """
+    return _pool.stats()
+
+
+def acquire_connection(hostname=None, timeout=10):
+    """Take a connection out of the shared pool for a long-lived use.
+
+    The connection is not handed to anybody else until it is given back with
+    :func:`release_connection`, or closed.
+
+    :return: A ``(key, connection)`` tuple.
+    :rtype: tuple
+
+    """
+    logging.getLogger('paramiko').setLevel(logging.ERROR)
+    key = _connection_key(hostname)
+    return key, _pool.acquire(key, timeout)
+
+
+def release_connection(key, client):
+    """Give a connection taken by :func:`acquire_connection` back."""
+    _pool.release(key, client)
+
+
+def _get_command_connection(hostname=None):
+    """Return a connection context manager for running commands.
+
+    Use the shared connection pool unless the ``main.server.ssh.pool``
+    configuration property is set to ``0``.
+
+    """
+    if conf.properties.get('main.server.ssh.pool', '1') == '0':
+        return _get_connection()
+    return _pool.connection(hostname=hostname)
+
+
 def upload_file(local_file, remote_file=None):
     """
     Uploads a remote file to a normal server or
@@ -101,7 +353,7 @@ def upload_file(local_file, remote_file=None):
         remote_file = local_file
 
     if not remote:
-        with _get_connection() as connection:
+        with _get_command_connection() as connection:
             sftp = connection.open_sftp()
             sftp.put(local_file, remote_file)
             sftp.close()
@@ -114,12 +366,56 @@ def download_file(remote_file, local_file=None):
     if local_file is None:
         local_file = remote_file
 
-    with _get_connection() as connection:
+    with _get_command_connection() as connection:
         sftp = connection.open_sftp()
         sftp.get(remote_file, local_file)
         sftp.close()
 
 
+def _command_result(cmd_stdout, cmd_stderr, errorcode, expect_csv):
+    """Build a :class:`SSHCommandResult` out of a command raw output.
+
+    :param str cmd_stdout: The raw (undecoded) standard output.
+    :param str cmd_stderr: The raw standard error.
+    :param int errorcode: The command exit status.
+    :param bool expect_csv: Whether the output should be parsed as CSV.
+    :rtype: SSHCommandResult
+
+    """
+    logger = logging.getLogger('robottelo')
+
+    # For output we don't really want to see all of Rails traffic
+    # information, so strip it out.
+
+    if cmd_stdout:
+        # Empty fields are returned as "" which gives us u'""'. CSV and JSON
+        # outputs are left as is, their parsers handle quoted values.
+        if not expect_csv and not cmd_stdout.lstrip().startswith('{'):
+            cmd_stdout = cmd_stdout.replace('""', '')
+        cmd_stdout = cmd_stdout.decode('utf-8')
+        cmd_stdout = u"".join(cmd_stdout).split("\n")
+        output = [
+            _COLOR_ESCAPE.sub('', line)
+            for line in cmd_stdout if not line.startswith("[")
+            ]
+    else:
+        output = []
+
+    # Ignore stderr if errorcode == 0. This is necessary since
+    # we're running Foreman in verbose mode which generates a lot
+    # of output return as stderr.
+    errors = [] if errorcode == 0 else cmd_stderr
+
+    if output:
+        logger.debug("<<<\n%s", '\n'.join(output[:-1]))
+    if errors:
+        errors = _COLOR_ESCAPE.sub('', "".join(errors))
+        logger.debug("<<< %s", errors)
+
+    return SSHCommandResult(
+        output, errors, errorcode, expect_csv)
+
+
 def command(cmd, hostname=None, expect_csv=False, timeout=None):
     """
     Executes SSH command(s) on remote hostname.
@@ -130,47 +426,218 @@ def command(cmd, hostname=None, expect_csv=False, timeout=None):
     if timeout is None:
         timeout = 120
 
-    # Variable to hold results returned from the command
-    stdout = stderr = errorcode = None
-
-    # Remove escape code for colors displayed in the output
-    regex = re.compile(r'\x1b\[\d\d?m')
-
     logger = logging.getLogger('robottelo')
     logger.debug(">>> %s", cmd)
 
     hostname = hostname or conf.properties['main.server.hostname']
 
-    with _get_connection() as connection:
+    with _get_command_connection(hostname) as connection:
         _, stdout, stderr = connection.exec_command(cmd, timeout)
         errorcode = stdout.channel.recv_exit_status()
         stdout = stdout.read()
         stderr = stderr.read()
 
-    # For output we don't really want to see all of Rails traffic
-    # information, so strip it out.
+    return _command_result(stdout, stderr, errorcode, expect_csv)
 
-    if stdout:
-        # Empty fields are returned as "" which gives us u'""'
-        stdout = stdout.replace('""', '')
-        stdout = stdout.decode('utf-8')
-        stdout = u"".join(stdout).split("\n")
-        output = [
-            regex.sub('', line) for line in stdout if not line.startswith("[")
-            ]
-    else:
-        output = []
 
-    # Ignore stderr if errorcode == 0. This is necessary since
-    # we're running Foreman in verbose mode which generates a lot
-    # of output return as stderr.
-    errors = [] if errorcode == 0 else stderr
+class SSHCommandStream(object):
+    """The output of a remote command, read line by line as it arrives.
 
-    if output:
-        logger.debug("<<<\n%s", '\n'.join(output[:-1]))
-    if errors:
-        errors = regex.sub('', "".join(errors))
-        logger.debug("<<< %s", errors)
+    Iterating over an instance runs the command and yields its decoded,
+    colour-stripped standard output lines, without their line terminator.
+    Only one chunk of output is held in memory at a time. Once the iteration
+    is over, ``return_code`` and ``stderr`` are set. ``stderr`` only keeps
+    the last ``max_stderr`` bytes of the standard error.
 
-    return SSHCommandResult(
-        output, errors, errorcode, expect_csv)
+    Unless ``raw`` is ``True``, lines are filtered the same way as
+    :func:`command` does: Rails traffic lines (starting with ``[``) are
+    skipped and, unless ``expect_csv`` is ``True``, ``""`` are removed.
+
+    Stopping the iteration early closes the channel and gives the connection
+    back to the pool.
+
+    """
+    bufsize = 32768
+    max_stderr = 1024 * 1024
+
+    def __init__(self, cmd, hostname=None, timeout=None, raw=False,
+                 expect_csv=False):
+        self.cmd = cmd
+        self.hostname = hostname
+        self.timeout = 120 if timeout is None else timeout
+        self.raw = raw
+        self.expect_csv = expect_csv
+        self.return_code = None
+        self.stderr = None
+
+    def __iter__(self):
+        return self._lines()
+
+    def _line(self, line):
+        """Decode and clean up a single raw ``line``.
+
+        :return: The line, or ``None`` if it must be skipped.
+
+        """
+        if line.endswith('\r'):
+            line = line[:-1]
+        if not self.raw:
+            if line.startswith('['):
+                return None
+            if not self.expect_csv:
+                line = line.replace('""', '')
+        return _COLOR_ESCAPE.sub('', line.decode('utf-8'))
+
+    def _chunks(self, channel):
+        """Yield standard output chunks of ``channel`` until it exits.
+
+        The standard error is drained on the way so that the remote command
+        never blocks on a full window. Once the command has exited, both
+        streams are read until their end, as their last data may arrive
+        along with the exit status.
+
+        """
+        stderr = ''
+        stdout_done = stderr_done = False
+        deadline = time.time() + self.timeout
+        channel.settimeout(self.timeout)
+        while not (stdout_done and stderr_done):
+            # An empty read means that the stream is over. After the exit,
+            # reads do not wait longer than the timeout for the end.
+            exited = channel.exit_status_ready()
+            if not stdout_done and (exited or channel.recv_ready()):
+                data = channel.recv(self.bufsize)
+                if data:
+                    deadline = time.time() + self.timeout
+                    yield data
+                else:
+                    stdout_done = True
+                continue
+            if not stderr_done and (exited or channel.recv_stderr_ready()):
+                data = channel.recv_stderr(self.bufsize)
+                if data:
+                    stderr = (stderr + data)[-self.max_stderr:]
+                    deadline = time.time() + self.timeout
+                else:
+                    stderr_done = True
+                continue
+            if time.time() > deadline:
+                raise socket.timeout(
+                    'No output received for {0} seconds from: {1}'
+                    ''.format(self.timeout, self.cmd))
+            time.sleep(0.01)
+        self.return_code = channel.recv_exit_status()
+        self.stderr = '' if self.return_code == 0 else _COLOR_ESCAPE.sub(
+            '', stderr)
+
+    def _lines(self):
+        """Run the command and yield its output lines."""
+        logger = logging.getLogger('robottelo')
+        logger.debug(">>> %s", self.cmd)
+        hostname = self.hostname or conf.properties['main.server.hostname']
+        with _get_command_connection(hostname) as connection:
+            channel = connection.get_transport().open_session()
+            try:
+                channel.exec_command(self.cmd)
+                pending = ''
+                for data in self._chunks(channel):
+                    lines = (pending + data).split('\n')
+                    pending = lines.pop()
+                    for line in lines:
+                        line = self._line(line)
+                        if line is not None:
+                            yield line
+                if pending:
+                    line = self._line(pending)
+                    if line is not None:
+                        yield line
+            except GeneratorExit:
+                # The consumer stopped early, the connection is still sound
+                pass
+            finally:
+                channel.close()
+        if self.stderr:
+            logger.debug("<<< %s", self.stderr)
+
+
+def command_stream(cmd, hostname=None, timeout=None, raw=False,
+                   expect_csv=False):
+    """Execute a SSH command on remote hostname and stream its output.
+
+    Defaults to main.server.hostname. See :class:`SSHCommandStream`::
+
+        stream = command_stream('cat /var/log/foreman/production.log')
+        for line in stream:
+            ...
+        stream.return_code
+
+    :rtype: SSHCommandStream
+
+    """
+    return SSHCommandStream(cmd, hostname, timeout, raw, expect_csv)
+
+
+def _exec_on_transport(transport, cmd, timeout):
+    """Run ``cmd`` on a new channel of ``transport``.
+
+    :return: A ``(stdout, stderr, errorcode)`` tuple.
+    :rtype: tuple
+
+    """
+    channel = transport.open_session()
+    try:
+        channel.settimeout(timeout)
+        channel.exec_command(cmd)
+        stdout = channel.makefile('rb', -1).read()
+        stderr = channel.makefile_stderr('rb', -1).read()
+        errorcode = channel.recv_exit_status()
+    finally:
+        channel.close()
+    return stdout, stderr, errorcode
+
+
+def command_many(cmds, hostname=None, expect_csv=False, timeout=None,
+                 max_parallel=5):
+    """Execute several SSH commands concurrently on remote hostname.
+
+    All commands share a single authenticated connection: each one runs on
+    its own channel of the same ``paramiko.Transport``, and at most
+    ``max_parallel`` of them run at the same time. Keep ``max_parallel`` below
+    the server ``MaxSessions`` setting (10 by default on OpenSSH).
+
+    :param list cmds: The commands to execute.
+    :param str hostname: Defaults to ``main.server.hostname``.
+    :param bool expect_csv: Whether every output should be parsed as CSV.
+    :param int timeout: Timeout of each command, 120 seconds by default.
+    :param int max_parallel: Maximum number of commands running at once.
+    :return: One result per command, in the same order as ``cmds``.
+    :rtype: list of :class:`SSHCommandResult`
+
+    """
+    if timeout is None:
+        timeout = 120
+    if not cmds:
+        return []
+
+    logger = logging.getLogger('robottelo')
+    for cmd in cmds:
+        logger.debug(">>> %s", cmd)
+
+    hostname = hostname or conf.properties['main.server.hostname']
+
+    with _get_command_connection(hostname) as connection:
+        transport = connection.get_transport()
+        workers = ThreadPool(max(1, min(max_parallel, len(cmds))))
+        try:
+            outputs = workers.map(
+                lambda cmd: _exec_on_transport(transport, cmd, timeout),
+                cmds
+            )
+        finally:
+            workers.close()
+            workers.join()
+
+    return [
+        _command_result(stdout, stderr, errorcode, expect_csv)
+        for stdout, stderr, errorcode in outputs
+    ]
@@ -15,9 +15,8 @@ useful to :class:`robottelo.factory.EntityFactoryMixin`.
 from robottelo.api import client
 from robottelo.common.constants import VALID_GPG_KEY_FILE
 from robottelo.common.helpers import get_data_file
-from robottelo.common.helpers import get_server_credentials
+from robottelo.common.helpers import get_server_credentials, TaskPoller
 from robottelo import factory, orm
-import time
 # (too-few-public-methods) pylint:disable=R0903
 
 
@@ -580,14 +579,16 @@ class LifecycleEnvironment(orm.Entity, factory.EntityFactoryMixin):
         This method does the following:
 
         1. If this entity does not yet point to an organization (i.e. if
-           ``self.organization is None``), an organization is created.
+           ``self.organization is None``), an organization is created, or
+           shared within a :class:`robottelo.factory.FactoryScope`.
         2. If this entity does not yet point to another lifecycle entity (i.e.
            if ``self.prior is None``), the "Library" lifecycle environment for
            this lifecycle environment's organization is found and used.
 
         """
         if self.organization is None:
-            self.organization = Organization().create(auth=auth)['id']
+            self.organization = factory.create_dependency(
+                self, 'organization_id', Organization(), auth)['id']
         if self.prior is None:
             query_results = client.get(
                 self.path(),
@@ -1136,10 +1137,13 @@ class ForemanTask(orm.Entity):
         synchronizing a repository or publishing/promoting a content view.
         These tasks should always return a `uuid` which then can be used to
         poll and check on its status. This method checks the status for a
-        given `uuid` at `poll_rate` intervals until said task is no longer
-        pending. If it takes longer than `timeout`
+        given `uuid` until said task is no longer pending, with a
+        :class:`robottelo.common.helpers.TaskPoller`: checks are frequent at
+        first, then less and less so, and scheduled with the progress of the
+        task. The poller is kept in ``self.poller``, which tells how many
+        checks were made and how long they took.
 
-        :param int poll_rate: How often to check the status of a task in
+        :param int poll_rate: The longest interval between two checks, in
             seconds.
         :param int timeout: Maximum number of seconds to wait until we
             timeout.
@@ -1149,19 +1153,19 @@ class ForemanTask(orm.Entity):
             used.
         :return: Information about the asynchronous task.
         :rtype: dict
-        :raises robottelo.entities.TaskTimeOut: If the task is not finished
+        :raises robottelo.entities.TaskTimeout: If the task is not finished
             before we reach the timeout.
 
         """
         if auth is None:
             auth = get_server_credentials()
 
-        timeout = time.time() + timeout
-        task_status = self.read(auth=auth)
-
-        while task_status['pending'] == True and time.time() < timeout:
-            time.sleep(poll_rate)
-            task_status = self.read(auth=auth)
+        self.poller = TaskPoller(
+            lambda: self.read(auth=auth),
+            timeout=timeout,
+            max_delay=poll_rate,
+        )
+        task_status = self.poller.poll()
 
         # Are we done? If so, return.
         if task_status['pending'] == False:
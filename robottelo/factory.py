@@ -10,11 +10,36 @@ classes in this module are useless by themselves. For information on how to use
 the base classes, read the docstrings on the classes themselves. For examples
 of factory implementations, see :mod:`robottelo.entities`.
 
+Dependent entities are created by :meth:`Factory.build`, which resolves the
+whole dependency tree of an entity before sending any request. Independent
+branches of that tree are then created concurrently, by up to
+``main.api.factory_workers`` threads (5 by default). Within a
+:class:`FactoryScope`, dependencies of the same type are shared instead of
+being created for every entity. A scope applies to the thread which
+entered it, and to the threads creating the entities of that thread.
+
 """
+from collections import namedtuple
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from robottelo.api import client
+from robottelo import cleanup
+from robottelo.common import conf
 from robottelo.common.helpers import get_server_url, get_server_credentials
 from robottelo import orm
 from urlparse import urljoin
+import logging
+import Queue
+import sys
+import threading
+
+
+logger = logging.getLogger(__name__)  # (bad var name) pylint: disable=C0103
+
+#: The number of requests sent to create an entity and its dependencies, and
+#: the length of the longest chain of requests which had to be sent one after
+#: another.
+BuildReport = namedtuple('BuildReport', ('requests', 'critical_path'))
 
 
 def _copy_and_update_keys(somedict, mapping):
@@ -65,6 +90,376 @@ class FactoryError(Exception):
     """Indicates an error occurred while creating an entity."""
 
 
+class FactoryScope(object):
+    """Share the parents of the entities created by factories.
+
+    Within a scope, the dependencies of the same type are created only once
+    and shared by every entity needing one, including the entities created
+    by later :meth:`Factory.create` calls in the same scope. For example,
+    both repositories are in the same organization here::
+
+        with FactoryScope() as scope:
+            Repository().create()
+            Repository().create()
+        print scope.saved  # 2 requests: 1 organization and 1 product
+
+    Only the dependencies generated for ``OneToOneField`` fields are shared,
+    not entities with explicit values nor the items of ``OneToManyField``
+    fields. Use ``exclude`` to opt out of sharing the
+    dependencies of some fields. Its items are field names, as returned by
+    :meth:`Factory._factory_data`, optionally qualified by the name of the
+    dependent factory class, such as ``'organization_id'`` or
+    ``'Product.organization_id'``.
+
+    """
+    def __init__(self, exclude=()):
+        self.exclude = frozenset(exclude)
+        self._lock = threading.Lock()
+        self._shared = {}
+        self._results = {}
+        self._locks = {}
+        self._reuses = {}
+
+    def __enter__(self):
+        _scopes().append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        scopes = _scopes()
+        if self in scopes:
+            scopes.remove(self)
+        logger.debug('Factory scope saved %s requests', self.saved)
+
+    @property
+    def saved(self):
+        """The number of requests saved by sharing dependencies."""
+        with self._lock:
+            return sum(
+                self._reuses.get(cls, 0) * report.requests
+                for cls, (_, report) in self._results.items()
+            )
+
+    def share(self, owner, name, dependency):
+        """Return the factory to use for the ``name`` dependency of ``owner``.
+
+        :return: The shared factory of the same type as ``dependency``, or
+            ``dependency`` itself if it is the first of its type, has
+            explicit values, or if ``name`` is excluded.
+        :rtype: Factory
+
+        """
+        if (name in self.exclude or
+                '{0}.{1}'.format(type(owner).__name__, name) in self.exclude):
+            return dependency
+        if isinstance(dependency, orm.Entity) and dependency.get_values():
+            return dependency
+        cls = type(dependency)
+        with self._lock:
+            shared = self._shared.setdefault(cls, dependency)
+            if shared is not dependency:
+                self._reuses[cls] = self._reuses.get(cls, 0) + 1
+        return shared
+
+    def result(self, factory):
+        """Return the entity created by a shared ``factory``, if any.
+
+        :return: A ``(result, report)`` tuple, or ``None``.
+
+        """
+        with self._lock:
+            if self._shared.get(type(factory)) is factory:
+                return self._results.get(type(factory))
+        return None
+
+    def create(self, factory, create):
+        """Call ``create``, once only if ``factory`` is shared.
+
+        :param Factory factory: The factory of the created entity.
+        :param create: A callable creating the entity and returning a
+            ``(result, report)`` tuple.
+        :return: The ``(result, report)`` tuple of this creation. The report
+            is empty if the shared entity was created by another caller.
+
+        """
+        cls = type(factory)
+        with self._lock:
+            if self._shared.get(cls) is not factory:
+                return create()
+            lock = self._locks.setdefault(cls, threading.Lock())
+        with lock:
+            if cls in self._results:
+                return self._results[cls][0], BuildReport(0, 0)
+            result, report = create()
+            with self._lock:
+                self._results[cls] = (result, report)
+            return result, report
+
+
+_local = threading.local()  # (bad var name) pylint: disable=C0103
+
+
+def _scopes():
+    """Return the stack of the scopes open in the current thread."""
+    scopes = getattr(_local, 'scopes', None)
+    if scopes is None:
+        scopes = _local.scopes = []
+    return scopes
+
+
+def _current_scope():
+    """Return the innermost open :class:`FactoryScope`, or ``None``."""
+    scopes = _scopes()
+    return scopes[-1] if scopes else None
+
+
+@contextmanager
+def _inherited(scope, suppressed):
+    """Apply the context of the thread which started a worker thread.
+
+    :param FactoryScope scope: The current scope of that thread, if any.
+    :param bool suppressed: Whether that thread is within
+        :meth:`robottelo.cleanup.CleanupRegistry.suppressed`.
+
+    """
+    scopes = _scopes()
+    if scope is not None:
+        scopes.append(scope)
+    try:
+        if suppressed:
+            with cleanup.registry.suppressed():
+                yield
+        else:
+            yield
+    finally:
+        if scope is not None:
+            scopes.remove(scope)
+
+
+class _Node(object):  # (too-few-public-methods) pylint:disable=R0903
+    """A factory in a dependency tree, see :func:`_resolve`."""
+    def __init__(self, factory):
+        self.factory = factory
+        # The snapshot of ``factory._factory_data()``, or ``None`` if the
+        # factory builds its values itself.
+        self.data = None
+        self.dependencies = []
+        self.dependents = []
+        self.result = None
+        self.report = BuildReport(0, 0)
+
+
+def _factories(value):
+    """Return the factories found in a ``_factory_data()`` value."""
+    if isinstance(value, Factory):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, Factory)]
+    return []
+
+
+def _resolve(factory, nodes):
+    """Add ``factory`` and all of its dependencies to ``nodes``.
+
+    ``nodes`` maps the ``id`` of each factory to its :class:`_Node`, so a
+    factory used by several entities is created only once. The data of a
+    factory overriding :meth:`Factory.build` is not looked into: that factory
+    is created by its own :meth:`Factory.create`.
+
+    :param Factory factory: The factory to add.
+    :param dict nodes: The nodes resolved so far.
+    :return: The node of ``factory``.
+    :rtype: _Node
+
+    """
+    node = nodes.get(id(factory))
+    if node is not None:
+        return node
+    node = nodes[id(factory)] = _Node(factory)
+    scope = _current_scope()
+    created = scope.result(factory) if scope is not None else None
+    if created is not None:
+        node.result = created[0]
+        return node
+    if type(factory).build.__func__ is not Factory.build.__func__:
+        return node
+    node.data = factory._factory_data()  # pylint:disable=W0212
+    for name, value in node.data.items():
+        for dependency in _factories(value):
+            dependency = _resolve_dependency(
+                factory, name, dependency, nodes, isinstance(value, list))
+            node.dependencies.append(dependency)
+            dependency.dependents.append(node)
+    return node
+
+
+def _resolve_dependency(owner, name, dependency, nodes, many=False):
+    """Resolve the ``name`` dependency of ``owner``, see :func:`_resolve`.
+
+    In a :class:`FactoryScope`, ``dependency`` may be replaced by the shared
+    factory of its type, unless it is one of ``many`` dependencies of a
+    ``OneToManyField``.
+
+    """
+    scope = _current_scope()
+    if scope is not None and not many and id(dependency) not in nodes:
+        shared = scope.share(owner, name, dependency)
+        if shared is not dependency:
+            nodes[id(dependency)] = _resolve(shared, nodes)
+    return _resolve(dependency, nodes)
+
+
+def _workers():
+    """Return the ``main.api.factory_workers`` configuration property."""
+    return int(conf.properties.get('main.api.factory_workers', 5))
+
+
+def _values(data, nodes):
+    """Replace the factories in ``data`` with the IDs of their entities."""
+    values = {}
+    for name, value in data.items():
+        if isinstance(value, Factory):
+            values[name] = nodes[id(value)].result['id']
+        elif isinstance(value, list):
+            values[name] = [
+                nodes[id(item)].result['id'] if isinstance(item, Factory)
+                else item
+                for item in value
+            ]
+        else:
+            values[name] = value
+    return values
+
+
+def _report(nodes):
+    """Return the :data:`BuildReport` of creating ``nodes``."""
+    nodes = dict((id(node), node) for node in nodes).values()
+    return BuildReport(
+        sum(node.report.requests for node in nodes),
+        max([node.report.critical_path for node in nodes] or [0]),
+    )
+
+
+def _create_node(node, nodes, auth):
+    """Create the entity of ``node``, whose dependencies already exist."""
+    def create():
+        """Create the entity and return a ``(result, report)`` tuple."""
+        if node.data is None:
+            result = node.factory.create(auth=auth)
+            return result, node.factory.build_report
+        result = node.factory._post(  # pylint:disable=W0212
+            _values(node.data, nodes), auth)
+        report = _report(node.dependencies)
+        return result, BuildReport(
+            report.requests + 1, report.critical_path + 1)
+
+    scope = _current_scope()
+    if scope is None:
+        node.result, node.report = create()
+    else:
+        node.result, node.report = scope.create(node.factory, create)
+
+
+def _create_nodes(nodes, auth, workers):
+    """Create the entities of ``nodes``, dependencies first.
+
+    A node is created as soon as all of its dependencies exist, by one of
+    ``workers`` threads. After a failure, no other node is started, and the
+    error is raised once the running nodes are done.
+
+    :param dict nodes: The nodes to create, as resolved by :func:`_resolve`.
+        The nodes already created are skipped.
+    :param tuple auth: A ``(username, password)`` pair.
+    :param int workers: The maximum number of entities created at once. If 1
+        or less, entities are created one at a time in the calling thread.
+
+    """
+    pending = dict(
+        (id(node), node) for node in nodes.values() if node.result is None
+    ).values()
+    remaining = dict(
+        (id(node), len([dependency for dependency in node.dependencies
+                        if dependency.result is None]))
+        for node in pending
+    )
+    ready = [node for node in pending if not remaining[id(node)]]
+    done = Queue.Queue()
+    scope = _current_scope()
+    suppressed = cleanup.registry.suppressing
+
+    def run(node):
+        """Create ``node`` and queue it, with the error raised, if any."""
+        try:
+            with _inherited(scope, suppressed):
+                _create_node(node, nodes, auth)
+        except Exception:  # pylint:disable=W0703
+            done.put((node, sys.exc_info()))
+        else:
+            done.put((node, None))
+
+    pool = ThreadPool(workers) if workers > 1 and len(pending) > 1 else None
+    running = 0
+    error = None
+    try:
+        while ready or running:
+            while ready and error is None:
+                running += 1
+                if pool is None:
+                    run(ready.pop())
+                else:
+                    pool.apply_async(run, (ready.pop(),))
+            if not running:
+                break
+            node, exc_info = done.get()
+            running -= 1
+            if exc_info is not None:
+                error = error or exc_info
+                continue
+            for dependent in node.dependents:
+                if id(dependent) not in remaining:
+                    continue
+                remaining[id(dependent)] -= 1
+                if not remaining[id(dependent)]:
+                    ready.append(dependent)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if error is not None:
+        raise error[0], error[1], error[2]
+
+
+def _deleter(url, auth):
+    """Return a function deleting the entity at ``url``."""
+    def delete():
+        """Delete the entity, raising an exception if it cannot."""
+        client.delete(url, auth=auth, verify=False).raise_for_status()
+    return delete
+
+
+def create_dependency(owner, name, dependency, auth=None):
+    """Create ``dependency``, for the ``name`` field of ``owner``.
+
+    Use this function in :meth:`Factory.build` overrides which create
+    dependencies themselves: within a :class:`FactoryScope`, ``dependency``
+    is shared like the dependencies created by :meth:`Factory.build`.
+
+    :param Factory owner: The factory needing ``dependency``.
+    :param str name: The name of the field, as in
+        :meth:`Factory._factory_data`.
+    :param Factory dependency: The factory of the dependency.
+    :param tuple auth: A ``(username, password)`` pair.
+    :return: Information about the created entity.
+    :rtype: dict
+
+    """
+    if auth is None:
+        auth = get_server_credentials()
+    nodes = {}
+    node = _resolve_dependency(owner, name, dependency, nodes)
+    _create_nodes(nodes, auth, _workers())
+    return node.result
+
+
 class Factory(object):
     """A mechanism for populating or creating Foreman entities.
 
@@ -147,7 +542,7 @@ class Factory(object):
         # to the caller.
         return values
 
-    def build(self, auth=None):
+    def build(self, auth=None, workers=None):
         """Create dependent entities and return attributes for the current
         entity.
 
@@ -155,45 +550,66 @@ class Factory(object):
         can be used to create an entity at the URL returned by
         :meth:`Factory._factory_path`.
 
+        The whole tree of dependent entities is resolved first. Entities are
+        then created as soon as their own dependencies exist, up to
+        ``workers`` at once. Afterwards, ``self.build_report`` holds a
+        :data:`BuildReport` of the requests sent.
+
         For information about this method's parameters, return values and so
         on, see :meth:`Factory.create`.
 
+        :param int workers: The maximum number of entities created at once.
+            Defaults to the ``main.api.factory_workers`` configuration
+            property, or 5.
+
         """
         # Populate all required fields with values.
         # self._factory_data() returns field names and values, and there are
         # three types of values:
         #
         # * A Factory subclass. This is typically returned by
-        #   OneToOneField.get_value(). We must call create() on this factory
+        #   OneToOneField.get_value(). We must create this factory's entity
         #   and get the created object's ID.
         # * A list of factory subclasses. This is typically returned by
-        #   OneToManyField.get_value(). We must call create() on all of the
-        #   factories in that list and collect all of their IDs.
+        #   OneToManyField.get_value(). We must create all of the factories'
+        #   entities in that list and collect all of their IDs.
         # * Some other type of value. We must use this value verbatim.
         #
-        values = {}
-        for name, value in self._factory_data().items():
-            if name in values.keys():
-                continue
-            if isinstance(value, Factory):
-                values[name] = value.create(auth=auth)['id']
-            elif isinstance(value, list):
-                values[name] = [
-                    factory.create(auth=auth)['id'] for factory in value
-                ]
-            else:
-                values[name] = value
+        data = self._factory_data()
+        nodes = {}
+        dependencies = []
+        for name, value in data.items():
+            dependencies.extend(
+                _resolve_dependency(
+                    self, name, factory, nodes, isinstance(value, list))
+                for factory in _factories(value)
+            )
+        if nodes and auth is None:
+            auth = get_server_credentials()
+        if workers is None:
+            workers = _workers()
+        _create_nodes(nodes, auth, workers)
+
+        self.build_report = _report(dependencies)
+        if nodes:
+            logger.debug(
+                '%s dependencies: %s requests, critical path of %s',
+                type(self).__name__,
+                self.build_report.requests,
+                self.build_report.critical_path,
+            )
 
         # We now have a dict of field names and values, which can be returned
         # to the caller.
-        return values
+        return _values(data, nodes)
 
     def create(self, auth=None):
         """Create a new entity, plus all of its dependent entities.
 
         Create an entity at the path returned by :meth:`Factory._factory_path`.
         If necessary, recursively create dependent entities. When done, return
-        a dict of information about the newly created entity.
+        a dict of information about the newly created entity, and leave a
+        :data:`BuildReport` of the requests sent in ``self.build_report``.
 
         :param tuple auth: A ``(username, password)`` pair to use when
             communicating with the API. If ``None``, the credentials returned
@@ -209,9 +625,26 @@ class Factory(object):
             auth = get_server_credentials()
 
         # Create dependent entities and generate values for non-FK fields.
+        self.build_report = BuildReport(0, 0)
         values = self.build(auth)
 
         # Create the current entity.
+        response = self._post(values, auth)
+        self.build_report = BuildReport(
+            self.build_report.requests + 1,
+            self.build_report.critical_path + 1,
+        )
+        return response
+
+    def _post(self, values, auth):
+        """Create an entity from ``values``, without any dependency.
+
+        :return: Information about the newly created entity.
+        :rtype: dict
+        :raises robottelo.factory.FactoryError: If the server returns an error
+            when attempting to create an entity.
+
+        """
         path = urljoin(get_server_url(), self._factory_path())
         response = client.post(path, values, auth=auth, verify=False).json()
         if 'error' in response.keys() or 'errors' in response.keys():
@@ -223,8 +656,13 @@ class Factory(object):
                 'Error encountered while POSTing to {0}. Error received: {1}'
                 ''.format(path, message)
             )
-
-        # Tell caller about created entity.
+        if 'id' in response:
+            cleanup.registry.add(
+                type(self).__name__,
+                response['id'],
+                _deleter(u'{0}/{1}'.format(path, response['id']), auth),
+                values,
+            )
         return response
 
 
@@ -13,11 +13,20 @@ class LogFile(object):
     """
     References a remote log file. The log file will be downloaded to allow
     operate on it using python
+
+    If ``stream`` is ``True`` the log file is not downloaded. Its lines are
+    read over ssh, one at a time, each time the file is operated on. Lines
+    read that way have no line terminator.
     """
 
-    def __init__(self, remote_path, pattern=None):
+    def __init__(self, remote_path, pattern=None, stream=False):
         self.remote_path = remote_path
         self.pattern = pattern
+        self.local_path = None
+        self.data = None
+
+        if stream:
+            return
 
         if not os.path.isdir(LOGS_DATA_DIR):
             os.makedirs(LOGS_DATA_DIR)
@@ -27,6 +36,16 @@ class LogFile(object):
         with open(self.local_path) as file_:
             self.data = file_.readlines()
 
+    def lines(self):
+        """
+        Iterate over the lines of the log file
+        """
+
+        if self.data is not None:
+            return iter(self.data)
+        return iter(ssh.command_stream(
+            u'cat {0}'.format(self.remote_path), raw=True))
+
     def filter(self, pattern=None):
         """
         Filter the log file using the pattern argument or object's pattern
@@ -39,7 +58,7 @@ class LogFile(object):
 
         result = []
 
-        for line in self.data:
+        for line in self.lines():
             if compiled.search(line) is not None:
                 result.append(line)
 
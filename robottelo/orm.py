@@ -1,5 +1,6 @@
 """Module that define the model layer used to define entities"""
 from fauxfactory import FauxFactory
+from robottelo.api import client, utils
 from robottelo.common import helpers
 import booby
 import booby.fields
@@ -362,6 +363,36 @@ class Entity(booby.Model):
             return urlparse.urljoin(base + '/', str(self.id))
         raise NoSuchPathError
 
+    def iter_all(self, auth=None, per_page=None, prefetch=None, params=None):
+        """Yield every entity of this entity's type, one at a time.
+
+        The entities are read from :meth:`path` ``('all')`` one page at a time,
+        see :func:`robottelo.api.utils.paginate`.
+
+        :param tuple auth: A ``(username, password)`` pair. If ``None``, the
+            credentials returned by
+            :func:`robottelo.common.helpers.get_server_credentials` are used.
+        :param int per_page: The number of entities per page.
+        :param bool prefetch: Whether to fetch the next page in the background.
+        :param dict params: Additional query parameters, such as ``search``.
+        :return: A generator of dicts, as returned by the server.
+        :raises requests.exceptions.HTTPError: If a page cannot be fetched.
+
+        """
+        if auth is None:
+            auth = helpers.get_server_credentials()
+        path = self.path('all')
+
+        def fetch(page, size):
+            """Return the page ``page`` of entities."""
+            query = dict(params or {})
+            query.update(page=page, per_page=size)
+            response = client.get(path, auth=auth, params=query, verify=False)
+            response.raise_for_status()
+            return response.json()
+
+        return utils.paginate(fetch, per_page, prefetch)
+
     @classmethod
     def get_fields(cls):
         """Return all defined fields as a dictionary.
@@ -0,0 +1,400 @@
+"""Leased pools of pre-created entities.
+
+Most tests only need *some* organization, product or lifecycle environment,
+and creating those dominates the run time of many tests. A
+:class:`FixturePool` creates such entities ahead of time, in background
+threads, and lends them to tests::
+
+    with pool.leased('organization') as org:
+        ...
+
+An entity goes back to its pool when the ``with`` block ends, and the pool
+creates new entities as soon as entities are leased. A test which changes a
+leased entity must say so, with ``mutated=True``. If the kind of an entity
+has a ``snapshot`` function, changes are also detected by comparing the
+snapshots taken when the entity was created and when it is returned. A
+changed entity is restored by the ``recycle`` function of its kind, if any,
+or else quarantined: it is never lent again.
+
+The kinds of entities listed in :data:`KINDS` can be pooled by setting the
+``main.pool.kinds`` configuration property to a comma-separated list of
+names, such as ``organization,cli-organization``. The pool returned by
+:func:`get_pool` then keeps ``main.pool.size`` entities of each kind (5 by
+default). :func:`leased` uses that pool, or creates a new entity if its kind
+is not pooled.
+
+Pooled entities are not recorded in :data:`robottelo.cleanup.registry`, so
+cleaning up after a test does not delete them.
+
+"""
+from collections import deque
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+from robottelo.api import client
+from robottelo import cleanup
+from robottelo.cli.factory import (
+    make_lifecycle_environment, make_org, make_product)
+from robottelo.cli.lifecycleenvironment import LifecycleEnvironment
+from robottelo.cli.org import Org
+from robottelo.cli.product import Product
+from robottelo.common import conf
+from robottelo.common.helpers import get_server_credentials
+from robottelo import entities
+import atexit
+import copy
+import logging
+import threading
+
+
+class PoolError(Exception):
+    """Indicates that an entity cannot be leased or returned."""
+
+
+def _api_snapshot(entity_class):
+    """Return a function reading an entity of ``entity_class`` with the API.
+
+    :param entity_class: A :class:`robottelo.orm.Entity` subclass.
+
+    """
+    def snapshot(entity):
+        """Return the attributes of ``entity``, as read from the server."""
+        return client.get(
+            entity_class(id=entity['id']).path(),
+            auth=get_server_credentials(),
+            verify=False,
+        ).json()
+    return snapshot
+
+
+def _cli_snapshot(cli_class):
+    """Return a function reading an entity with the ``info`` of ``cli_class``.
+
+    :param cli_class: A :class:`robottelo.cli.base.Base` subclass.
+
+    """
+    def snapshot(entity):
+        """Return the attributes of ``entity``, as read from the server."""
+        options = {'id': entity['id']}
+        if entity.get('organization-id'):
+            options['organization-id'] = entity['organization-id']
+        result = cli_class.info(options)
+        if result.return_code != 0:
+            raise PoolError(
+                'Could not read {0} {1}: {2}'.format(
+                    cli_class.__name__, entity['id'], result.stderr))
+        return result.stdout
+    return snapshot
+
+
+#: The kinds of entities which can be pooled, with the keyword arguments
+#: given to :meth:`FixturePool.register`.
+KINDS = {
+    'organization': {
+        'create': lambda: entities.Organization().create(),
+        'snapshot': _api_snapshot(entities.Organization),
+    },
+    'product': {
+        'create': lambda: entities.Product().create(),
+        'snapshot': _api_snapshot(entities.Product),
+    },
+    'lifecycle-environment': {
+        'create': lambda: entities.LifecycleEnvironment().create(),
+        'snapshot': _api_snapshot(entities.LifecycleEnvironment),
+    },
+    'cli-organization': {
+        'create': make_org,
+        'snapshot': _cli_snapshot(Org),
+    },
+    'cli-product': {
+        'create': lambda: make_product(
+            {'organization-id': make_org()['id']}),
+        'snapshot': _cli_snapshot(Product),
+    },
+    'cli-lifecycle-environment': {
+        'create': lambda: make_lifecycle_environment(
+            {'organization-id': make_org()['id']}),
+        'snapshot': _cli_snapshot(LifecycleEnvironment),
+    },
+}
+
+
+class _Kind(object):  # (too-few-public-methods) pylint:disable=R0903
+    """The entities of one kind in a :class:`FixturePool`."""
+    def __init__(self, name, create, snapshot, recycle, size):
+        self.name = name
+        self.create = create
+        self.snapshot = snapshot
+        self.recycle = recycle
+        self.size = size
+        # ``(entity, snapshot)`` tuples ready to be leased
+        self.available = deque()
+        self.pending = 0
+        self.quarantine = []
+
+
+class FixturePool(object):
+    """Entities created ahead of time and lent to tests.
+
+    :param int size: The number of entities of each kind to keep ready.
+    :param int workers: The number of threads creating, checking and
+        recycling entities.
+
+    """
+    def __init__(self, size=5, workers=4):
+        self.size = size
+        self.workers = workers
+        self.stats = dict.fromkeys(
+            ('leases', 'hits', 'misses', 'created', 'recycled',
+             'quarantined', 'errors'),
+            0
+        )
+        self.logger = logging.getLogger('robottelo')
+        self._kinds = {}
+        self._leases = {}
+        self._condition = threading.Condition()
+        self._executor = None
+
+    def register(self, name, create, snapshot=None, recycle=None, size=None):
+        """Register a kind of entities.
+
+        :param str name: The name of the kind, as given to :meth:`lease`.
+        :param create: A callable returning a new entity.
+        :param snapshot: A callable returning the state of an entity, as read
+            from the server, to detect changes made by tests. Optional.
+        :param recycle: A callable restoring a changed entity. Optional.
+        :param int size: The number of entities to keep ready. Defaults to
+            the size of the pool.
+
+        """
+        with self._condition:
+            self._kinds[name] = _Kind(
+                name, create, snapshot, recycle,
+                self.size if size is None else size,
+            )
+
+    def __contains__(self, name):
+        """Tell whether a kind called ``name`` is registered."""
+        return name in self._kinds
+
+    def start(self):
+        """Start creating the entities of every registered kind."""
+        for kind in self._kinds.values():
+            self._refill(kind)
+
+    def close(self):
+        """Wait for the background work to finish and stop the threads."""
+        with self._condition:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.close()
+            executor.join()
+
+    def _kind(self, name):
+        """Return the registered kind called ``name``."""
+        try:
+            return self._kinds[name]
+        except KeyError:
+            raise PoolError('No {0} entities are pooled.'.format(name))
+
+    def _submit(self, function, *args):
+        """Run ``function(*args)`` in a background thread."""
+        with self._condition:
+            if self._executor is None:
+                self._executor = ThreadPool(self.workers)
+            executor = self._executor
+        executor.apply_async(function, args)
+
+    def _refill(self, kind):
+        """Create entities until ``kind`` has enough of them, or will."""
+        with self._condition:
+            missing = kind.size - len(kind.available) - kind.pending
+            kind.pending += max(missing, 0)
+        for _ in range(missing):
+            self._submit(self._create, kind)
+
+    @staticmethod
+    def _new(kind):
+        """Create an entity of ``kind``, return it and its snapshot.
+
+        The entity and its dependencies are not recorded for cleanup.
+
+        """
+        with cleanup.registry.suppressed():
+            entity = kind.create()
+            state = kind.snapshot(entity) if kind.snapshot else None
+        return entity, state
+
+    def _create(self, kind):
+        """Create an entity of ``kind`` and make it available."""
+        try:
+            entity, state = self._new(kind)
+        except Exception:  # pylint:disable=W0703
+            self.logger.exception('Could not create a pooled %s', kind.name)
+            with self._condition:
+                kind.pending -= 1
+                self.stats['errors'] += 1
+                self._condition.notify_all()
+            return
+        with self._condition:
+            kind.pending -= 1
+            kind.available.append((entity, state))
+            self.stats['created'] += 1
+            self._condition.notify_all()
+
+    def lease(self, name):
+        """Lend an entity of the kind called ``name``.
+
+        If no entity is ready, wait for those being created, or create one if
+        none is. Either way, new entities are created in the background to
+        replace the leased one.
+
+        :return: A copy of the entity, to give back to :meth:`release`.
+        :raises PoolError: If no such kind is registered.
+
+        """
+        kind = self._kind(name)
+        with self._condition:
+            self.stats['leases'] += 1
+            while not kind.available and kind.pending:
+                self._condition.wait()
+            if kind.available:
+                entity, state = kind.available.popleft()
+                self.stats['hits'] += 1
+            else:
+                entity = None
+                self.stats['misses'] += 1
+        if entity is None:
+            entity, state = self._new(kind)
+        self._refill(kind)
+        lent = copy.deepcopy(entity)
+        with self._condition:
+            self._leases[id(lent)] = (kind, entity, state, lent)
+        return lent
+
+    def release(self, entity, mutated=None):
+        """Give back an entity returned by :meth:`lease`.
+
+        The entity is checked and recycled in the background.
+
+        :param entity: The leased entity.
+        :param bool mutated: Whether the test changed the entity. If
+            ``None``, changes are detected with the ``snapshot`` function of
+            the entity's kind, if any.
+        :raises PoolError: If ``entity`` is not leased from this pool.
+
+        """
+        with self._condition:
+            lease = self._leases.pop(id(entity), None)
+        if lease is None:
+            raise PoolError('This entity is not leased from this pool.')
+        kind, entity, state, _ = lease
+        self._submit(self._return, kind, entity, state, mutated)
+
+    def _return(self, kind, entity, state, mutated):
+        """Make a returned entity available again, or quarantine it."""
+        try:
+            if mutated is None and kind.snapshot is not None:
+                mutated = kind.snapshot(entity) != state
+            if mutated and kind.recycle is not None:
+                kind.recycle(entity)
+                if kind.snapshot is not None:
+                    state = kind.snapshot(entity)
+                mutated = False
+                with self._condition:
+                    self.stats['recycled'] += 1
+        except Exception:  # pylint:disable=W0703
+            self.logger.exception('Could not recycle a pooled %s', kind.name)
+            mutated = True
+        with self._condition:
+            if mutated:
+                kind.quarantine.append(entity)
+                self.stats['quarantined'] += 1
+            else:
+                kind.available.append((entity, state))
+            self._condition.notify_all()
+
+    @contextmanager
+    def leased(self, name, mutated=None):
+        """Lend an entity for the duration of a ``with`` block.
+
+        The entity is quarantined if the block raises an exception.
+
+        :param str name: The kind of entity, see :meth:`lease`.
+        :param bool mutated: See :meth:`release`.
+
+        """
+        entity = self.lease(name)
+        try:
+            yield entity
+        except Exception:
+            self.release(entity, mutated=True)
+            raise
+        self.release(entity, mutated)
+
+    def quarantined(self, name):
+        """Return the quarantined entities of the kind called ``name``."""
+        kind = self._kind(name)
+        with self._condition:
+            return list(kind.quarantine)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the pool of the kinds listed in ``main.pool.kinds``.
+
+    The pool is created and started on the first call.
+
+    :rtype: FixturePool
+
+    """
+    global _pool  # (global-statement) pylint:disable=W0603
+    with _pool_lock:
+        if _pool is None:
+            _pool = FixturePool(
+                int(conf.properties.get('main.pool.size', 5)),
+                int(conf.properties.get('main.pool.workers', 4)),
+            )
+            names = conf.properties.get('main.pool.kinds', '')
+            for name in names.split(','):
+                name = name.strip()
+                if name:
+                    if name not in KINDS:
+                        raise PoolError(
+                            'Unknown kind of pooled entities: {0}'
+                            ''.format(name))
+                    _pool.register(name, **KINDS[name])
+            _pool.start()
+        return _pool
+
+
+def close_pool():
+    """Stop the pool returned by :func:`get_pool`, if any."""
+    global _pool  # (global-statement) pylint:disable=W0603
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_pool)
+
+
+@contextmanager
+def leased(name, mutated=None):
+    """Lend an entity of a kind listed in :data:`KINDS`.
+
+    The entity comes from the pool returned by :func:`get_pool` if its kind
+    is pooled, or is created otherwise. See :meth:`FixturePool.leased`.
+
+    """
+    pool = get_pool()
+    if name in pool:
+        with pool.leased(name, mutated) as entity:
+            yield entity
+    elif name in KINDS:
+        yield KINDS[name]['create']()
+    else:
+        raise PoolError('Unknown kind of pooled entities: {0}'.format(name))
@@ -10,9 +10,11 @@ if sys.hexversion >= 0x2070000:
     import unittest
 else:
     import unittest2 as unittest
+from robottelo import cleanup
 from robottelo.cli.metatest import MetaCLITest
 from robottelo.common.helpers import get_server_url
 from robottelo.common import conf
+from robottelo.common.records.base import Record
 from robottelo.ui.activationkey import ActivationKey
 from robottelo.ui.architecture import Architecture
 from robottelo.ui.computeresource import ComputeResource
@@ -52,12 +54,33 @@ SAUCE_URL = "http://%s:%s@ondemand.saucelabs.com:80/wd/hub"
 
 
 class TestCase(unittest.TestCase):
-    """Robottelo test case"""
+    """Robottelo test case
+
+    The entities created by a test, or by a test class, are deleted after it
+    when the ``main.cleanup`` configuration property is ``test``, or
+    ``class``. See :mod:`robottelo.cleanup`.
+
+    """
 
     @classmethod
     def setUpClass(cls):
         super(TestCase, cls).setUpClass()
         cls.logger = logging.getLogger('robottelo')
+        cls.cleanup_mark = cleanup.registry.mark()
+
+    @classmethod
+    def tearDownClass(cls):
+        super(TestCase, cls).tearDownClass()
+        if conf.properties.get('main.cleanup') == 'class':
+            cleanup.registry.cleanup(cls.cleanup_mark)
+
+    def run(self, result=None):
+        mark = cleanup.registry.mark()
+        try:
+            return super(TestCase, self).run(result)
+        finally:
+            if conf.properties.get('main.cleanup') == 'test':
+                cleanup.registry.cleanup(mark)
 
 
 class APITestCase(TestCase):
@@ -252,6 +275,9 @@ def intersection(first, other):
         return True
     elif isinstance(first, type([])):
         return assert_list_intersects(first, other)
+    elif isinstance(first, Record) and isinstance(other, Record):
+        # Declared fields are kept in slots, not in __dict__
+        return intersection(dict(first.items()), dict(other.items()))
     elif hasattr(first, "__dict__") and hasattr(other, "__dict__"):
         self_data = first.__dict__
         other_data = other.__dict__
@@ -0,0 +1,137 @@
+#!/usr/bin/env python2
+"""Benchmark the latency of API requests with and without pooled sessions.
+
+Send GET requests through :mod:`robottelo.api.client`, first opening a new
+connection for every request, then reusing the pooled keep-alive
+connections. By default the requests go to a local HTTPS server using a
+self-signed certificate generated with ``openssl``. Give a URL to benchmark
+a real server instead, and optionally the number of requests::
+
+    python scripts/benchmark_api.py
+    python scripts/benchmark_api.py https://foreman.example.com/api/status 50
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from robottelo.api import client
+from robottelo.common import conf
+from SocketServer import ThreadingMixIn
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Answers every GET request with a small JSON document."""
+    protocol_version = 'HTTP/1.1'
+    # Send the response at once, not line by line
+    wbufsize = -1
+
+    def do_GET(self):  # (invalid-name) pylint:disable=C0103
+        """Send the JSON document."""
+        # Read the request body, if any, to keep the connection usable
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = '{"status": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint:disable=W0221
+        """Do not log requests."""
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    """An HTTP server handling each connection in a thread."""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        """Ignore the clients closing their connection abruptly."""
+
+
+def start_server(cert_dir):
+    """Start a local HTTPS server, or HTTP if no certificate can be made.
+
+    :return: The URL of the server.
+
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StatusHandler)
+    scheme = 'http'
+    cert = os.path.join(cert_dir, 'server.pem')
+    try:
+        subprocess.check_call(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+             '-days', '1', '-subj', '/CN=localhost', '-keyout', cert,
+             '-out', cert],
+            stdout=open(os.devnull, 'w'),
+            stderr=subprocess.STDOUT,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        print('openssl is not available, benchmarking over HTTP')
+    else:
+        server.socket = ssl.wrap_socket(
+            server.socket, certfile=cert, server_side=True)
+        scheme = 'https'
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return '{0}://127.0.0.1:{1}/api/v2/status'.format(
+        scheme, server.server_address[1])
+
+
+def measure(url, requests_count):
+    """Return the latency of ``requests_count`` requests, in milliseconds.
+
+    :return: A ``(mean, median)`` tuple.
+
+    """
+    latencies = []
+    for _ in range(requests_count):
+        start = time.time()
+        response = client.get(url, verify=False)
+        response.raise_for_status()
+        latencies.append((time.time() - start) * 1000)
+    latencies.sort()
+    return (sum(latencies) / len(latencies),
+            latencies[len(latencies) // 2])
+
+
+def main():
+    """Run the benchmark and print the results."""
+    cert_dir = tempfile.mkdtemp()
+    try:
+        if len(sys.argv) > 1:
+            url = sys.argv[1]
+        else:
+            url = start_server(cert_dir)
+        requests_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+        print('{0} GET requests to {1}'.format(  # pylint:disable=C0325
+            requests_count, url))
+        for name, pool in (('new connection', '0'), ('pooled session', '1')):
+            conf.properties['main.api.pool'] = pool
+            mean, median = measure(url, requests_count)
+            print(  # pylint:disable=C0325
+                '{0:15} mean {1:7.2f}ms  median {2:7.2f}ms'.format(
+                    name, mean, median))
+        client.close_sessions()
+    finally:
+        shutil.rmtree(cert_dir)
+
+
+if __name__ == '__main__':
+    main()
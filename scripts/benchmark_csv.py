@@ -0,0 +1,75 @@
+#!/usr/bin/env python2
+"""Benchmark the parsing of hammer CSV output.
+
+Compare the former ``split(',')`` based ``csv_to_dictionary`` with the RFC
+4180 parser of :mod:`robottelo.common.helpers`, on a generated hammer list
+output. Run it with the number of rows as argument, 100000 by default::
+
+    python scripts/benchmark_csv.py 100000
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from itertools import izip
+from robottelo.common.helpers import (
+    csv_to_dictionary, csv_to_table, iter_csv_dictionary)
+import time
+
+
+def split_csv_to_dictionary(data):
+    """The former implementation, which breaks on quoted commas."""
+    dic_keys = [x.replace(' ', '-').lower() for x in data[0].split(',')]
+    return [
+        dict(izip(dic_keys, item.split(',')))
+        for item in data[1:] if len(item) > 0
+    ]
+
+
+def generate_output(rows):
+    """Return the lines of a hammer list of ``rows`` records."""
+    lines = [u'Id,Name,Label,Description,Organization']
+    for i in xrange(rows):
+        lines.append(
+            u'{0},name-{0},label_{0},A description of record {0},'
+            u'Default_Organization'.format(i)
+        )
+    return lines
+
+
+def timed(function, *args):
+    """Return the seconds taken by ``function(*args)``."""
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def main():
+    """Run the benchmark and print the results."""
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lines = generate_output(rows)
+    if split_csv_to_dictionary(lines) != csv_to_dictionary(lines):
+        sys.exit('The parsers disagree on the generated output.')
+
+    print('{0} rows'.format(rows))  # pylint:disable=C0325
+    for name, function in (
+            ('split csv_to_dictionary', split_csv_to_dictionary),
+            ('RFC 4180 csv_to_dictionary', csv_to_dictionary),
+            ('RFC 4180 csv_to_table', csv_to_table),
+            ('first row of iter_csv_dictionary',
+             lambda data: next(iter_csv_dictionary(data))),
+    ):
+        print('{0:35} {1:.3f}s'.format(  # pylint:disable=C0325
+            name, timed(function, lines)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python2
+"""Benchmark the generation of random test data.
+
+Generate strings, names and addresses one call at a time, as the
+``generate_*`` functions of :mod:`robottelo.common.helpers` used to, then
+in batches drawing one random number per character, then with one batch of
+:class:`robottelo.common.helpers.DataGenerator`, drawing the random bits of
+the whole batch at once, and unique values. Optionally give the number of
+values of each kind::
+
+    python scripts/benchmark_data.py
+    python scripts/benchmark_data.py 100000
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from robottelo.common.helpers import DataGenerator
+import random
+import string
+import time
+
+
+def legacy_utf8(length):
+    """Build the CJK code points on every call, as generate_string did."""
+    output_array = []
+    for i in range(int('4E00', 16), int('9FCC', 16)):
+        output_array.append(i)
+    return u''.join(
+        unichr(random.choice(output_array)) for _ in xrange(length))
+
+
+def legacy_latin1(length):
+    """Build the Latin 1 ranges on every call, as generate_string did."""
+    output_array = []
+    for first, last in (('00C0', '00D6'), ('00D8', '00F6'), ('00F8', '00FF')):
+        for i in range(int(first, 16), int(last, 16)):
+            output_array.append(i)
+    return u''.join(
+        unichr(random.choice(output_array)) for _ in xrange(length))
+
+
+def legacy_name(minimum=4, maximum=8):
+    """Draw each character with SystemRandom, as generate_name did."""
+    rand = random.SystemRandom()
+    pool = string.ascii_lowercase + string.digits
+    return u''.join(
+        rand.choice(pool) for _ in range(random.randint(minimum, maximum)))
+
+
+def legacy_mac(delimiter=u':'):
+    """Draw each hexadecimal digit, as generate_mac did."""
+    chars = 'abcdef0123456789'
+    return delimiter.join(
+        chars[random.randrange(0, 16)] + chars[random.randrange(0, 16)]
+        for _ in range(6))
+
+
+class PerCharGenerator(DataGenerator):
+    """Draw one random number per character, in batches."""
+
+    def _indexes(self, size, count):
+        rand = self.random().random
+        return [int(rand() * size) for _ in xrange(count)]
+
+
+def legacy_ipaddr():
+    """Draw each octet, as generate_ipaddr did."""
+    return u'.'.join(unicode(random.randrange(0, 255)) for _ in range(4))
+
+
+def measure(function, count):
+    """Return the microseconds per value spent by ``function()``."""
+    start = time.time()
+    function()
+    return (time.time() - start) * 1e6 / count
+
+
+def main():
+    """Run the benchmark and print the results."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    generator = DataGenerator()
+    per_char = PerCharGenerator()
+    cases = (
+        ('utf8 x8',
+         lambda: [legacy_utf8(8) for _ in xrange(count)],
+         lambda: per_char.strings('utf8', 8, count),
+         lambda: generator.strings('utf8', 8, count),
+         lambda: generator.strings('utf8', 8, count, unique=True)),
+        ('latin1 x8',
+         lambda: [legacy_latin1(8) for _ in xrange(count)],
+         lambda: per_char.strings('latin1', 8, count),
+         lambda: generator.strings('latin1', 8, count),
+         lambda: generator.strings('latin1', 8, count, unique=True)),
+        ('name',
+         lambda: [legacy_name() for _ in xrange(count)],
+         lambda: per_char.names(count=count),
+         lambda: generator.names(count=count),
+         lambda: generator.names(count=count, unique=True)),
+        ('mac',
+         lambda: [legacy_mac() for _ in xrange(count)],
+         lambda: per_char.macs(count=count),
+         lambda: generator.macs(count=count),
+         lambda: generator.macs(count=count, unique=True)),
+        ('ipaddr',
+         lambda: [legacy_ipaddr() for _ in xrange(count)],
+         lambda: per_char.ipaddrs(count=count),
+         lambda: generator.ipaddrs(count=count),
+         lambda: generator.ipaddrs(count=count, unique=True)),
+    )
+    print(  # pylint:disable=C0325
+        '{0} values of each kind, in us/value'.format(count))
+    print(  # pylint:disable=C0325
+        '{0:10} {1:>9} {2:>9} {3:>9} {4:>9}'.format(
+            '', 'per call', 'per char', 'batch', 'unique'))
+    for name, legacy, slow_batch, batch, unique in cases:
+        print(  # pylint:disable=C0325
+            '{0:10} {1:9.2f} {2:9.2f} {3:9.2f} {4:9.2f}'.format(
+                name, measure(legacy, count), measure(slow_batch, count),
+                measure(batch, count), measure(unique, count)))
+
+
+if __name__ == '__main__':
+    main()
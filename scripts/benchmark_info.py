@@ -0,0 +1,135 @@
+#!/usr/bin/env python2
+"""Benchmark the parsing of hammer info output.
+
+Compare the former ``info_dictionary``, which runs uncompiled regular
+expressions on every line, with the single-pass parser of
+:mod:`robottelo.common.helpers`. Both parse the info outputs kept in
+``tests/robottelo/data/info``, as many times as given as argument, 2000 by
+default::
+
+    python scripts/benchmark_info.py 2000
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from robottelo.common.helpers import info_dictionary
+import glob
+import io
+import re
+import time
+
+
+class Result(object):  # (too-few-public-methods) pylint:disable=R0903
+    """Holds the ``stdout`` lines of an info command."""
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+
+def legacy_info_dictionary(result):
+    """The former implementation of ``info_dictionary``."""
+    r = {}
+    sub_prop = None
+    sub_num = None
+
+    for line in result.stdout:
+        if line == '':
+            continue
+        if line.startswith(' '):
+            if line.find(':') != -1:
+                key, value = line.lstrip().split(":", 1)
+            elif line.find('=>') != -1:
+                key, value = line.lstrip().split(" =>", 1)
+            else:
+                key = value = None
+
+            if key is None and value is None:
+                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
+
+                if match is None:
+                    match = re.match(r'(.*)$', line.lstrip())
+
+                value = match.group(1)
+
+                if isinstance(r[sub_prop], dict):
+                    r[sub_prop] = []
+
+                r[sub_prop].append(value)
+            else:
+                starts_with_number = re.match(r'(\d+)\)', key)
+                if starts_with_number:
+                    sub_num = int(starts_with_number.group(1))
+                    if sub_num == 1:
+                        r[sub_prop] = []
+                    key = re.sub(r'\d+\)', '', key)
+                    r[sub_prop].append({})
+
+                key = key.lstrip().replace(' ', '-').lower()
+
+                if sub_num is not None:
+                    r[sub_prop][-1][key] = value.lstrip()
+                else:
+                    r[sub_prop][key] = value.lstrip()
+        else:
+            sub_num = None
+            key, value = line.lstrip().split(":", 1)
+            key = key.lstrip().replace(' ', '-').lower()
+            if value.lstrip() == '':
+                sub_prop = key
+                r[sub_prop] = {}
+            else:
+                r[key] = value.lstrip()
+
+    result.stdout = r
+
+    return result
+
+
+def load_outputs():
+    """Return the lines of every info output sample."""
+    outputs = []
+    for path in sorted(glob.glob(os.path.join(
+            ROBOTTELO_PATH, 'tests', 'robottelo', 'data', 'info', '*.txt'))):
+        with io.open(path, encoding='utf-8') as handler:
+            outputs.append(handler.read().split(u'\n'))
+    return outputs
+
+
+def timed(function, outputs, rounds):
+    """Return the seconds taken to parse ``outputs`` ``rounds`` times."""
+    start = time.time()
+    for _ in xrange(rounds):
+        for output in outputs:
+            function(Result(output))
+    return time.time() - start
+
+
+def main():
+    """Run the benchmark and print the results."""
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    outputs = load_outputs()
+    for output in outputs:
+        if (legacy_info_dictionary(Result(output)).stdout !=
+                info_dictionary(Result(output)).stdout):
+            sys.exit('The parsers disagree on the info outputs.')
+
+    print('{0} info outputs, {1} rounds'.format(  # pylint:disable=C0325
+        len(outputs), rounds))
+    for name, function in (
+            ('former info_dictionary', legacy_info_dictionary),
+            ('single-pass info_dictionary', info_dictionary),
+    ):
+        print('{0:30} {1:.3f}s'.format(  # pylint:disable=C0325
+            name, timed(function, outputs, rounds)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python2
+"""Benchmark the rendering of the API paths of ``robottelo.records``.
+
+For every API path of every record in :mod:`robottelo.records`, resolve
+the path arguments from a record and render the path, first re-parsing the
+path on every call as ``ApiCrud`` used to, then with the compiled
+:class:`robottelo.api.apicrud.PathTemplate`. Optionally give the number of
+rounds::
+
+    python scripts/benchmark_paths.py
+    python scripts/benchmark_paths.py 10000
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from robottelo.api.apicrud import PathTemplate, resolve_path_arg
+from robottelo.common import conf
+from robottelo.common.records import Record
+import importlib
+import inspect
+import pkgutil
+import time
+
+#: The attributes of ``ApiCrud`` classes holding a path.
+PATH_ATTRIBUTES = ('api_path', 'api_path_get', 'api_path_put',
+                   'api_path_delete')
+
+
+def legacy_render(path, args):
+    """Render ``path`` by splitting and replacing, as ApiCrud used to."""
+    path_args = [s[1:] for s in path.split('/') if s.startswith(':')]
+    for arg in path_args:
+        if arg in args:
+            path = path.replace(':{0}'.format(arg), str(args[arg]))
+            del args[arg]
+        else:
+            raise NameError('Expecting {0} as an argument.'.format(arg))
+    return path
+
+
+def legacy_resolve(path, record):
+    """Resolve the path arguments from ``record``, as ApiCrud used to."""
+    path_args = [s[1:] for s in path.split('/') if s.startswith(':')]
+    return dict((arg, resolve_path_arg(arg, record)) for arg in path_args)
+
+
+def compiled_render(path, args):
+    """Render ``path`` with its compiled template."""
+    return PathTemplate.compile(path).render(args)
+
+
+def compiled_resolve(path, record):
+    """Resolve the path arguments from ``record`` with the template."""
+    return PathTemplate.compile(path).resolve(record)
+
+
+def cases():
+    """Return a ``(path, record)`` pair for each path of each record."""
+    # Some records read the server URL when their module is imported
+    import robottelo.records
+    pairs = []
+    for _, name, _ in pkgutil.iter_modules(robottelo.records.__path__):
+        module = importlib.import_module('robottelo.records.' + name)
+        for record_class in vars(module).values():
+            if (not inspect.isclass(record_class) or
+                    not issubclass(record_class, Record) or
+                    record_class.__module__ != module.__name__):
+                continue
+            meta = record_class._meta  # pylint:disable=W0212
+            api = getattr(meta, 'api_class', None)
+            if api is None:
+                continue
+            record = record_class()
+            for attribute in PATH_ATTRIBUTES:
+                path = getattr(api, attribute, None)
+                if path is not None:
+                    try:
+                        legacy_resolve(path, record)
+                    except (KeyError, TypeError):
+                        # The record misses an argument, e.g. an ID
+                        continue
+                    pairs.append((path, record))
+    return pairs
+
+
+def measure(resolve, render, pairs, rounds):
+    """Return the seconds spent resolving and rendering every path."""
+    start = time.time()
+    for _ in range(rounds):
+        for path, record in pairs:
+            render(path, resolve(path, record))
+    return time.time() - start
+
+
+def main():
+    """Run the benchmark and print the results."""
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    conf.properties.setdefault('main.server.hostname', 'example.com')
+    pairs = cases()
+    print('{0} rounds over {1} paths'.format(  # pylint:disable=C0325
+        rounds, len(pairs)))
+    for name, resolve, render in (
+            ('re-parsed', legacy_resolve, legacy_render),
+            ('compiled', compiled_resolve, compiled_render)):
+        elapsed = measure(resolve, render, pairs, rounds)
+        print(  # pylint:disable=C0325
+            '{0:10} {1:7.3f}s  {2:6.2f}us/path'.format(
+                name, elapsed, elapsed * 1e6 / (rounds * len(pairs))))
+
+
+if __name__ == '__main__':
+    main()
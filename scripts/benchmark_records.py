@@ -0,0 +1,94 @@
+#!/usr/bin/env python2
+"""Benchmark the memory and latency of creating and copying records.
+
+Create records of a class with a few declared fields, then copy them,
+comparing the slot-based records of :mod:`robottelo.common.records` with
+the same values stored in an instance ``__dict__``, copied with
+``copy.deepcopy`` as records used to be. Optionally give the number of
+records::
+
+    python scripts/benchmark_records.py
+    python scripts/benchmark_records.py 10000
+
+"""
+# Append parent dir to sys.path if not already present.
+import os
+import sys
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+
+# Proceed with normal imports.
+from robottelo.common import records
+import copy
+import time
+
+
+class Organization(records.Record):
+    """A record with the fields of a typical organization."""
+    name = records.StringField()
+    label = records.StringField()
+    description = records.StringField()
+    major = records.IntegerField()
+
+
+class DictRecord(object):  # (too-few-public-methods) pylint:disable=R0903
+    """The same fields, set like records do, in the instance ``__dict__``.
+    """
+    def __init__(self, **kwargs):
+        for field in Organization._meta.fields:  # pylint:disable=W0212
+            if field.name in kwargs:
+                setattr(self, field.name, kwargs[field.name])
+            else:
+                setattr(self, field.name, field.get_default())
+
+
+def values(index):
+    """Return the field values of the record ``index``."""
+    return {
+        'name': u'org{0}'.format(index),
+        'label': u'label{0}'.format(index),
+        'description': u'description',
+        'major': index,
+    }
+
+
+def size(instance):
+    """Return the memory used by ``instance`` and its ``__dict__``, if any.
+    """
+    total = sys.getsizeof(instance)
+    if getattr(instance, '__dict__', None):
+        total += sys.getsizeof(instance.__dict__)
+    return total
+
+
+def measure(name, create, duplicate, count):
+    """Create and copy ``count`` records, and print the results."""
+    start = time.time()
+    created = [create(**values(index)) for index in range(count)]
+    create_time = time.time() - start
+
+    start = time.time()
+    for instance in created:
+        duplicate(instance)
+    copy_time = time.time() - start
+
+    per_record = sum(size(instance) for instance in created) / count
+    print(  # pylint:disable=C0325
+        '{0:12} create {1:6.3f}s  copy {2:6.3f}s  {3:4d} bytes/record'
+        ''.format(name, create_time, copy_time, per_record))
+
+
+def main():
+    """Run the benchmark and print the results."""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('{0} records'.format(count))  # pylint:disable=C0325
+    measure('__dict__', DictRecord, copy.deepcopy, count)
+    measure('slots', Organization, Organization.copy, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -22,3 +22,9 @@ class SampleRecord(records.Record):
     class Meta:
         api_path = "/api/operatingsystems"
         api_json_key = u"operatingsystem"
+
+
+class EnumeratedRecord(records.Record):
+    name = records.ChoiceField(["n1", "n2", "n3"])
+    label = records.ChoiceField(["l1", "l2", "l3"])
+    desc = records.ChoiceField(["d1", "d2", "d3"])
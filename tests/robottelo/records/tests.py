@@ -4,7 +4,10 @@ if sys.hexversion >= 0x2070000:
 else:
     import unittest2 as unittest
 
-from .records import SampleRecord
+from .records import EnumeratedRecord, SampleRecord
+from robottelo.common.records.base import covering_array
+from robottelo.test import intersection
+import itertools
 
 
 class RecordsTestCase(unittest.TestCase):
@@ -48,3 +51,117 @@ class RecordsTestCase(unittest.TestCase):
         """Post init is executed"""
         instance = self.record_class()
         self.assertTrue(hasattr(instance, 'post_init_var'))
+
+
+class EnumerateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.record_class = EnumeratedRecord
+
+    def test_each_choice(self):
+        """Every choice of every field is represented once"""
+        self.assertEqual(len(self.record_class.enumerate(MATRIX=1)), 9)
+
+    def test_matrix(self):
+        """Every combination of choices is represented"""
+        records = self.record_class.enumerate(MATRIX=2)
+        self.assertEqual(len(records), 27)
+        self.assertEqual(
+            len(set((r.name, r.label, r.desc) for r in records)), 27)
+
+    def test_pairwise(self):
+        """Every pair of choices of two fields is represented"""
+        records = self.record_class.pairwise_enumerate()
+        self.assertLess(len(records), 27)
+        for first, second in itertools.combinations(
+                ('name', 'label', 'desc'), 2):
+            self.assertEqual(
+                len(set((r[first], r[second]) for r in records)), 9)
+
+    def test_lazy(self):
+        """Records are instantiated while iterating, and counted"""
+        enumeration = self.record_class.enumerate(MATRIX=2, LAZY=True)
+        self.assertEqual(
+            (enumeration.cases, enumeration.product), (27, 27))
+        self.assertEqual(len(list(enumeration)), 27)
+        self.assertEqual(len(list(enumeration)), 27)
+        enumeration = self.record_class.enumerate(NWISE=2, LAZY=True)
+        self.assertEqual(enumeration.product, 27)
+        self.assertEqual(enumeration.cases, len(list(enumeration)))
+
+    def test_covering_array(self):
+        """Every combination of any strength columns is in a row"""
+        values = [range(4), range(3), range(2), range(5)]
+        for strength in (1, 2, 3):
+            rows = covering_array(values, strength)
+            for columns in itertools.combinations(range(4), strength):
+                self.assertEqual(
+                    set(tuple(row[c] for c in columns) for row in rows),
+                    set(itertools.product(*[values[c] for c in columns])))
+
+
+class CompactRecordTestCase(unittest.TestCase):
+    def setUp(self):
+        self.record_class = SampleRecord
+
+    def test_field_slots(self):
+        """Declared fields are stored in slots, other values in __dict__"""
+        instance = self.record_class(name='n1')
+        instance['organization_id'] = 1
+        self.assertIn('name', self.record_class._field_slots)
+        self.assertNotIn('name', instance.__dict__)
+        self.assertEqual(instance['name'], 'n1')
+        self.assertEqual(instance.__dict__['organization_id'], 1)
+        self.assertIn('organization_id', instance.keys())
+
+    def test_contains(self):
+        """Set fields and values are found, unset and private ones are not"""
+        instance = self.record_class(blank_record=True)
+        self.assertNotIn('name', instance)
+        self.assertNotIn('post_init_var', instance)
+        instance['name'] = 'n1'
+        instance['_private'] = 'p'
+        self.assertIn('name', instance)
+        self.assertNotIn('_private', instance)
+        self.assertNotIn('_private', instance.keys())
+        self.assertNotIn(1, instance)
+        self.assertNotIn(None, instance)
+        with self.assertRaises(KeyError):
+            instance['major']
+        with self.assertRaises(KeyError):
+            instance['_private']
+
+    def test_delete(self):
+        """Fields and values can be deleted"""
+        instance = self.record_class(name='n1')
+        instance['label'] = 'l1'
+        del instance['name']
+        del instance['label']
+        self.assertNotIn('name', instance)
+        self.assertNotIn('label', instance)
+        with self.assertRaises(KeyError):
+            del instance['name']
+
+    def test_copy(self):
+        """Copies share no record, list or dict with the original"""
+        instance = self.record_class(name='n1')
+        instance['related'] = self.record_class(name='n2')
+        instance['related']['parent'] = instance
+        instance['tags'] = ['t1']
+        copied = instance.copy()
+        self.assertEqual(copied.keys(), instance.keys())
+        self.assertEqual(copied['name'], 'n1')
+        self.assertIsNot(copied['related'], instance['related'])
+        self.assertIs(copied['related']['parent'], copied)
+        copied['tags'].append('t2')
+        copied['related']['name'] = 'changed'
+        self.assertEqual(instance['tags'], ['t1'])
+        self.assertEqual(instance['related']['name'], 'n2')
+
+    def test_intersection(self):
+        """Records are compared by their fields, stored in slots"""
+        first, same, other = [
+            self.record_class(blank_record=True) for _ in range(3)]
+        first['name'] = same['name'] = 'n1'
+        other['name'] = 'n2'
+        self.assertIs(intersection(first, same), True)
+        self.assertIsNot(intersection(first, other), True)
@@ -0,0 +1,208 @@
+"""Tests for module ``robottelo.api.apicrud``."""
+from robottelo.api import apicrud
+from robottelo.api.apicrud import ApiCrud
+from robottelo.cleanup import registry
+from robottelo.common import conf, records
+import mock
+import unittest
+
+
+class ParentApi(ApiCrud):
+    """An API whose records are looked up by name."""
+    api_path = '/api/parents'
+    api_json_key = u'parent'
+    create_fields = ['name']
+
+
+class Parent(records.Record):
+    """A record referenced by :class:`Child`."""
+    name = records.StringField()
+
+    class Meta:
+        """Link the record with its API."""
+        api_class = ParentApi
+
+
+class ChildApi(ApiCrud):
+    """An API whose records reference a :class:`Parent`."""
+    api_path = '/api/children'
+    api_json_key = u'child'
+    create_fields = ['name', 'parent_id']
+
+
+class Child(records.Record):
+    """A record referencing a :class:`Parent`."""
+    name = records.StringField()
+    parent = records.RelatedField(Parent)
+
+    class Meta:
+        """Link the record with its API."""
+        api_class = ChildApi
+
+
+def response(json, ok=True):
+    """Return a mock response carrying ``json``."""
+    res = mock.Mock(ok=ok)
+    res.json.return_value = json
+    return res
+
+
+class ResolveOrCreateRecordTestCase(unittest.TestCase):
+    """Tests for :func:`robottelo.api.apicrud.resolve_or_create_record`."""
+    def setUp(self):  # pylint:disable=C0103
+        """Back up ``conf.properties`` and empty the resolution cache."""
+        self.conf_properties = conf.properties.copy()
+        apicrud.resolved.clear()
+        self.parent = Parent(name='parent')
+        patcher = mock.patch.object(ParentApi, 'list')
+        self.list = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            ParentApi, 'show', return_value=response({}))
+        self.show = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``conf.properties`` and empty the resolution cache."""
+        conf.properties = self.conf_properties
+        apicrud.resolved.clear()
+
+    def test_single_query(self):
+        """An existing record is found and resolved with one request."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        found = apicrud.resolve_or_create_record(self.parent)
+        self.assertEqual(found.id, 7)
+        self.assertEqual(self.list.call_count, 1)
+
+    def test_cached(self):
+        """Records are only looked up once per run."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        children = [Child(name=name, parent=self.parent.copy())
+                    for name in ('first', 'second', 'third')]
+        created = [ChildApi.record_create_dependencies(child)
+                   for child in children]
+        self.assertEqual(
+            [child.parent_id for child in created], [7, 7, 7])
+        self.assertEqual(self.list.call_count, 1)
+        self.assertFalse(self.show.called)
+
+    def test_one_request(self):
+        """Resolving a record many times costs one request."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        for _ in range(10):
+            self.assertEqual(
+                apicrud.resolve_or_create_record(self.parent).id, 7)
+        self.assertEqual(self.list.call_count + self.show.call_count, 1)
+
+    def test_cache_copies(self):
+        """Changing a returned record does not change the cache."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        apicrud.resolve_or_create_record(self.parent).name = 'changed'
+        self.assertEqual(
+            apicrud.resolve_or_create_record(self.parent).name, 'parent')
+
+    def test_cache_disabled(self):
+        """Records are looked up every time without the cache."""
+        conf.properties['main.api.resolve_cache'] = '0'
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        apicrud.resolve_or_create_record(self.parent)
+        apicrud.resolve_or_create_record(self.parent)
+        self.assertEqual(self.list.call_count, 2)
+
+    def test_missing(self):
+        """Missing records do not exist and cannot be resolved."""
+        self.list.return_value = response({'results': []})
+        self.assertFalse(ApiCrud.record_exists(self.parent))
+        with self.assertRaises(apicrud.ApiException):
+            ApiCrud.record_resolve(self.parent)
+
+    @mock.patch.object(ParentApi, 'record_create_recursive')
+    def test_create(self, create):
+        """A missing record is created, and the created record cached."""
+        self.list.return_value = response({'results': []})
+        create.return_value = Parent(id=8, name='parent')
+        self.assertEqual(apicrud.resolve_or_create_record(self.parent).id, 8)
+        self.assertEqual(apicrud.resolve_or_create_record(self.parent).id, 8)
+        self.assertEqual(create.call_count, 1)
+        self.assertEqual(self.list.call_count, 1)
+
+    @mock.patch.object(ParentApi, 'delete')
+    def test_remove(self, delete):
+        """Removed records are forgotten."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        delete.return_value = response({})
+        ParentApi.record_remove(apicrud.resolve_or_create_record(self.parent))
+        apicrud.resolve_or_create_record(self.parent)
+        self.assertEqual(self.list.call_count, 2)
+
+    def test_cleared(self):
+        """Records are looked up again once the cache is cleared."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        apicrud.resolve_or_create_record(self.parent)
+        apicrud.resolved.clear()
+        self.list.return_value = response(
+            {'results': [{'id': 8, 'name': 'parent'}]})
+        self.assertEqual(apicrud.resolve_or_create_record(self.parent).id, 8)
+        self.assertEqual(self.list.call_count, 2)
+
+    def test_cleanup(self):
+        """The cache is cleared when entities are cleaned up."""
+        self.list.return_value = response(
+            {'results': [{'id': 7, 'name': 'parent'}]})
+        mark = registry.mark()
+        apicrud.resolve_or_create_record(self.parent)
+        registry.add('organization', 1, lambda: None)
+        registry.cleanup(since=mark)
+        apicrud.resolve_or_create_record(self.parent)
+        self.assertEqual(self.list.call_count, 2)
+        self.assertFalse(self.show.called)
+
+
+class NestedApi(ApiCrud):
+    """An API whose path holds arguments."""
+    api_path = '/api/orgs/:organization.id/envs/:env_id/items'
+
+
+class PathTemplateTestCase(unittest.TestCase):
+    """Tests for :class:`robottelo.api.apicrud.PathTemplate`."""
+    def test_compiled_once(self):
+        """Each path is compiled once."""
+        self.assertIs(NestedApi.path_template(), NestedApi.path_template())
+        self.assertIs(
+            NestedApi.path_template(),
+            apicrud.PathTemplate.compile(NestedApi.api_path))
+
+    def test_list_path_args(self):
+        """Path arguments are listed in order."""
+        self.assertEqual(
+            NestedApi.list_path_args(), ['organization.id', 'env_id'])
+        self.assertEqual(ParentApi.list_path_args(), [])
+
+    def test_parse_path_arg(self):
+        """Arguments are rendered into the path and taken out of args."""
+        args = {'organization.id': 1, 'env_id': 2, 'json': {}}
+        self.assertEqual(
+            NestedApi.parse_path_arg(NestedApi.api_path, args),
+            '/api/orgs/1/envs/2/items')
+        self.assertEqual(args, {'json': {}})
+
+    def test_missing_arg(self):
+        """A missing argument raises ``NameError``."""
+        with self.assertRaises(NameError):
+            NestedApi.parse_path_arg(NestedApi.api_path, {'env_id': 2})
+
+    def test_record_path_args(self):
+        """Dotted arguments are resolved through related values."""
+        data = {'organization': {'id': 1}, 'env_id': 2}
+        self.assertEqual(
+            NestedApi.record_path_args(data),
+            {'organization.id': 1, 'env_id': 2})
+        self.assertEqual(
+            apicrud.resolve_path_arg('organization.id', data), 1)
@@ -0,0 +1,231 @@
+"""Tests for :mod:`robottelo.cleanup`."""
+from mock import Mock
+from robottelo.api import client
+from robottelo import cleanup, factory
+from robottelo.common import conf
+from unittest import TestCase
+import threading
+import time
+
+
+class KindTestCase(TestCase):
+    """Tests for :func:`robottelo.cleanup.kind` and references."""
+    # (protected-access) pylint:disable=W0212
+    def test_kind(self):
+        """Assert that kinds ignore case, hyphens and underscores."""
+        for name in ('LifecycleEnvironment', 'lifecycle-environment',
+                     'lifecycle_environment'):
+            self.assertEqual(cleanup.kind(name), 'lifecycleenvironment')
+
+    def test_references(self):
+        """Assert that ``*_id`` and ``*_ids`` fields are references."""
+        self.assertEqual(
+            sorted(cleanup._references({
+                'name': 'foo',
+                'organization-id': 1,
+                'domain_ids': [2, 3],
+                'medium_id': None,
+                'prior': 4,
+            })),
+            [('domain', u'2'), ('domain', u'3'), ('organization', u'1')]
+        )
+
+
+class CleanupRegistryTestCase(TestCase):
+    """Tests for :class:`robottelo.cleanup.CleanupRegistry`."""
+    def setUp(self):  # pylint:disable=C0103
+        """Create an empty registry."""
+        self.registry = cleanup.CleanupRegistry()
+        self.deleted = []
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def add(self, name, uid, fields=None, fail=False):
+        """Record an entity whose deletion is recorded in ``deleted``."""
+        def delete():
+            """Record the deletion."""
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(0.01)
+            with self.lock:
+                self.running -= 1
+            if fail:
+                raise ValueError
+            self.deleted.append((name, uid))
+        return self.registry.add(name, uid, delete, fields)
+
+    def test_reverse_order(self):
+        """Assert that entities are deleted before what they reference."""
+        self.add('domain', 1)
+        self.add('subnet', 2, {'domain_ids': [1]})
+        self.add('host', 3, {'subnet_id': 2, 'domain_id': 1})
+        report = self.registry.cleanup()
+        self.assertEqual(
+            self.deleted, [('host', 3), ('subnet', 2), ('domain', 1)])
+        self.assertEqual(report, cleanup.CleanupReport(3, 0, 0))
+        self.assertEqual(len(self.registry), 0)
+
+    def test_organization(self):
+        """Assert that the content of an organization is left to it."""
+        self.add('organization', 1)
+        self.add('product', 2, {'organization_id': 1})
+        self.add('repository', 3, {'product_id': 2})
+        self.add('user', 4, {'organization_ids': [1]})
+        self.add('activation-key', 5, {'organization-id': 1})
+        self.add('host', 6, {'activationkey_ids': [5]})
+        report = self.registry.cleanup()
+        self.assertEqual(report, cleanup.CleanupReport(3, 3, 0))
+        self.assertEqual(self.deleted[-1], ('organization', 1))
+        self.assertEqual(
+            sorted(self.deleted[:-1]), [('host', 6), ('user', 4)])
+
+    def test_organization_not_deleted(self):
+        """Assert that content is deleted if its organization is not."""
+        self.add('organization', 1)
+        mark = self.registry.mark()
+        self.add('product', 2, {'organization_id': 1})
+        self.add('repository', 3, {'product_id': 2})
+        report = self.registry.cleanup(mark)
+        self.assertEqual(report, cleanup.CleanupReport(2, 0, 0))
+        self.assertEqual(self.deleted, [('repository', 3), ('product', 2)])
+        self.assertEqual(len(self.registry), 1)
+
+    def test_mark(self):
+        """Assert that only the entities recorded after a mark are deleted."""
+        self.add('domain', 1)
+        mark = self.registry.mark()
+        self.add('domain', 2)
+        self.registry.cleanup(mark)
+        self.assertEqual(self.deleted, [('domain', 2)])
+        self.registry.cleanup()
+        self.assertEqual(self.deleted, [('domain', 2), ('domain', 1)])
+
+    def test_discard(self):
+        """Assert that discarded entities are not deleted."""
+        self.add('domain', 1)
+        self.registry.discard('Domain', '1')
+        self.assertEqual(len(self.registry), 0)
+
+    def test_suppressed(self):
+        """Assert that entities created while suppressed are not recorded,
+        by the suppressing thread only."""
+        with self.registry.suppressed():
+            self.add('domain', 1)
+            thread = threading.Thread(target=self.add, args=('domain', 2))
+            thread.start()
+            thread.join()
+        self.add('domain', 3)
+        self.assertEqual(self.registry.cleanup().deleted, 2)
+        self.assertEqual(
+            sorted(self.deleted), [('domain', 2), ('domain', 3)])
+
+    def test_subscribe(self):
+        """Assert that listeners are called after deleting entities."""
+        listener = Mock()
+        self.registry.subscribe(listener)
+        self.registry.cleanup()
+        self.assertFalse(listener.called)
+        self.add('domain', 1)
+        self.registry.cleanup()
+        listener.assert_called_once_with()
+
+    def test_failure(self):
+        """Assert that what a failed entity references is not deleted."""
+        self.add('domain', 1)
+        self.add('subnet', 2, {'domain_ids': [1]})
+        self.add('host', 3, {'subnet_id': 2}, fail=True)
+        self.add('medium', 4)
+        report = self.registry.cleanup()
+        self.assertEqual(report, cleanup.CleanupReport(1, 0, 3))
+        self.assertEqual(self.deleted, [('medium', 4)])
+
+    def test_parallel(self):
+        """Assert that independent entities are deleted concurrently."""
+        for uid in range(8):
+            self.add('domain', uid)
+        self.registry.cleanup(workers=3)
+        self.assertEqual(len(self.deleted), 8)
+        self.assertGreater(self.max_running, 1)
+        self.assertLessEqual(self.max_running, 3)
+
+    def test_serial(self):
+        """Assert that one worker deletes one entity at a time."""
+        for uid in range(4):
+            self.add('domain', uid)
+        self.registry.cleanup(workers=1)
+        self.assertEqual(self.max_running, 1)
+
+
+class FactoryTrackingTestCase(TestCase):
+    """Tests for the tracking of the entities created by factories."""
+    def setUp(self):  # pylint:disable=C0103
+        """Backup, customize and override objects."""
+        self.client_post = client.post
+        self.client_delete = client.delete
+        self.conf_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['foreman.admin.username'] = 'username'
+        conf.properties['foreman.admin.password'] = 'password'
+        self.mark = cleanup.registry.mark()
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore backed-up objects."""
+        client.post = self.client_post
+        client.delete = self.client_delete
+        conf.properties = self.conf_properties
+
+    def test_factory(self):
+        """Assert that entities created by factories can be deleted."""
+        class SampleFactory(factory.Factory):
+            """A factory of sample entities."""
+            def _factory_path(self):
+                """Return a path for creating a "Sample" entity."""
+                return 'api/v2/samples'
+
+            def _factory_data(self):
+                """Return data for creating a "Sample" entity."""
+                return {}
+
+        client.post = Mock()
+        client.post.return_value.json.return_value = {'id': 42}
+        client.delete = Mock()
+        SampleFactory().create()
+        report = cleanup.registry.cleanup(self.mark)
+        self.assertEqual(report, cleanup.CleanupReport(1, 0, 0))
+        self.assertEqual(
+            client.delete.call_args[0][0],
+            'https://example.com/api/v2/samples/42'
+        )
+
+    def test_suppressed_dependencies(self):
+        """Assert that dependencies created by factory workers are not
+        recorded while the creation is suppressed."""
+        class SampleFactory(factory.Factory):
+            """A factory of sample entities."""
+            def _factory_path(self):
+                """Return a path for creating a "Sample" entity."""
+                return 'api/v2/samples'
+
+            def _factory_data(self):
+                """Return data for creating a "Sample" entity."""
+                return {}
+
+        class ParentFactory(SampleFactory):
+            """A factory of entities with two dependencies."""
+            def _factory_data(self):
+                """Return data referencing two "Sample" entities."""
+                return {'first_id': SampleFactory(),
+                        'second_id': SampleFactory()}
+
+        ids = iter(range(1, 4))
+        client.post = Mock(side_effect=lambda *args, **kwargs: Mock(
+            json=Mock(return_value={'id': next(ids)})))
+        conf.properties['main.api.factory_workers'] = '2'
+        with cleanup.registry.suppressed():
+            ParentFactory().create()
+        self.assertEqual(client.post.call_count, 3)
+        self.assertEqual(
+            cleanup.registry.cleanup(self.mark),
+            cleanup.CleanupReport(0, 0, 0))
@@ -1,7 +1,20 @@
+import copy
+import pickle
+import random
+import threading
+import time
 import unittest
 
+from mock import Mock, patch
+from robottelo.cleanup import registry
 from robottelo.common import conf
-from robottelo.cli.base import Base
+from robottelo.common.ssh import SSHCommandResult
+from robottelo.cli import factory, shell
+from robottelo.cli.base import (
+    Base, CLIReturnCodeError, CommandCache, HammerCommand, LazyInfo,
+    execute_concurrently)
+from robottelo.cli.lifecycleenvironment import LifecycleEnvironment
+from robottelo.cli.org import Org
 
 
 class CLIClass(Base):
@@ -68,3 +81,643 @@ class BaseCliTestCase(unittest.TestCase):
         self.assertEqual(new_class.foreman_admin_username, 'auser')
         self.assertEqual(new_class.foreman_admin_password, 'apass')
         self.assertIn(Base, new_class.__bases__)
+
+    @patch('robottelo.cli.base.ssh.command')
+    @patch('robottelo.cli.base.shell.execute')
+    def test_execute_shell_backend(self, shell_execute, ssh_command):
+        """``execute`` uses the hammer shell when configured to"""
+        conf.properties['main.cli.backend'] = 'shell'
+        CLIClass.execute('org list', expect_csv=True)
+        shell_execute.assert_called_once_with(
+            'org list', 'adminusername', 'adminpassword', expect_csv=True,
+            timeout=None, expect_json=False)
+        self.assertFalse(ssh_command.called)
+
+    @patch('robottelo.cli.base.ssh.command')
+    @patch('robottelo.cli.base.shell.execute')
+    def test_execute_shell_unsupported(self, shell_execute, ssh_command):
+        """``execute`` starts hammer where the shell cannot be used"""
+        conf.properties['main.cli.backend'] = 'shell'
+        shell_execute.side_effect = shell.HammerShellUnsupported()
+        CLIClass.execute('org list', expect_csv=True)
+        self.assertEqual(ssh_command.call_count, 1)
+
+    @patch('robottelo.cli.base.Base.execute_stream')
+    def test_iter_list(self, execute_stream):
+        """``iter_list`` yields a dictionary per streamed CSV line"""
+        class FakeStream(list):
+            """A list of lines with a return code"""
+            return_code = 0
+            stderr = ''
+        execute_stream.return_value = FakeStream(['Id,Name', '1,a', '2,b'])
+        self.assertEqual(
+            list(CLIClass.iter_list()),
+            [{'id': '1', 'name': 'a'}, {'id': '2', 'name': 'b'}]
+        )
+        execute_stream.return_value.return_code = 70
+        with self.assertRaises(CLIReturnCodeError):
+            list(CLIClass.iter_list())
+
+
+class OrgRequiredClass(Base):
+    """Class whose commands require organization-id, but info"""
+    command_base = 'orgrequired'
+    command_requires_org = True
+    command_org_optional = ('info',)
+
+
+class HammerCommandTestCase(unittest.TestCase):
+    """Tests for the immutable hammer commands"""
+    def test_command(self):
+        """A command renders its options sorted and keeps its parts"""
+        command = HammerCommand(
+            'org', 'create', {'name': 'a', 'flag': True, 'no': False})
+        self.assertEqual(command, u"org create --flag --name='a'")
+        self.assertEqual(command.sub, 'create')
+        self.assertEqual(command.options, (('flag', True), ('name', 'a')))
+        self.assertFalse(command.requires_org)
+
+    def test_immutable(self):
+        """A command can not be changed once built"""
+        command = HammerCommand('org', 'create')
+        with self.assertRaises(AttributeError):
+            command.sub = 'delete'
+        with self.assertRaises(AttributeError):
+            command.extra = 'value'
+
+    def test_copy(self):
+        """A command survives copies and pickling"""
+        command = HammerCommand('org', 'info', {'id': 1}, True)
+        for other in (copy.deepcopy(command),
+                      pickle.loads(pickle.dumps(command))):
+            self.assertEqual(other, command)
+            self.assertEqual(other.options, command.options)
+            self.assertTrue(other.requires_org)
+
+    def test_requires_org(self):
+        """The organization requirement is given per subcommand"""
+        self.assertFalse(
+            OrgRequiredClass._construct_command({}, 'info').requires_org)
+        self.assertTrue(
+            OrgRequiredClass._construct_command({}, 'list').requires_org)
+        with self.assertRaises(Exception):
+            OrgRequiredClass.list()
+
+
+class LazyClass(Base):
+    """Class reading created records from the create output"""
+    command_base = 'lazy'
+    lazy_create_info = True
+
+
+class LazyInfoTestCase(unittest.TestCase):
+    """Tests for the records created without an info round trip"""
+    def test_fields(self):
+        """Known fields are read without running info"""
+        loader = Mock(return_value={'id': '1', 'label': 'l'})
+        record = LazyInfo({'id': '1', 'name': 'n'}, loader, {'label': None})
+        self.assertEqual(record['name'], 'n')
+        self.assertTrue('id' in record)
+        self.assertFalse(loader.called)
+        self.assertEqual(record['label'], 'l')
+        self.assertEqual(dict(record), {'id': '1', 'name': 'n', 'label': 'l'})
+        loader.assert_called_once_with()
+
+    def test_defaults(self):
+        """Defaults are used for the fields info does not have"""
+        loader = Mock(return_value={'id': '1', 'url': 'info'})
+        record = LazyInfo({'id': '1'}, loader, {'url': 'u', 'opt': None})
+        self.assertEqual(record['id'], '1')
+        self.assertFalse(record.loaded)
+        self.assertEqual(record['url'], 'info')
+        self.assertTrue(record.loaded)
+        self.assertIsNone(record['opt'])
+        with self.assertRaises(KeyError):
+            record['missing']
+        self.assertEqual(
+            record.copy(), {'id': '1', 'url': 'info', 'opt': None})
+        loader.assert_called_once_with()
+
+    @patch('robottelo.cli.base.Base.info')
+    @patch('robottelo.cli.base.Base.execute')
+    def test_create(self, execute, info):
+        """``create`` skips info for classes with lazy_create_info"""
+        execute.return_value = SSHCommandResult(
+            [{'message': 'Created', 'id': '3', 'name': 'n'}])
+        info.return_value = SSHCommandResult({'id': '3', 'label': 'l'})
+        result = LazyClass.create({'name': 'n'})
+        self.assertEqual(execute.call_count, 1)
+        self.assertEqual(result.stdout['id'], '3')
+        self.assertFalse(info.called)
+        self.assertEqual(result.stdout['label'], 'l')
+        info.assert_called_once_with({u'id': '3'})
+        self.assertNotIn('message', result.stdout)
+
+        info.reset_mock()
+        execute.return_value = SSHCommandResult([{'id': '3'}])
+        result = OrgRequiredClass.create({'organization-id': '1'})
+        info.assert_called_once_with({u'id': '3', u'organization-id': '1'})
+        self.assertEqual(result.stdout, {'id': '3', 'label': 'l'})
+
+
+def fake_command(cmd, expect_csv=False, timeout=None):
+    """Echo back the hammer subcommand and arguments after a random sleep"""
+    time.sleep(random.random() / 100)
+    parts = cmd.split()
+    sub = parts.index('hammer-stress')
+    return SSHCommandResult(
+        [{'sub': parts[sub + 1], 'args': u' '.join(parts[sub + 2:])}])
+
+
+class StressClass(Base):
+    """Class used for the concurrency stress test"""
+    command_base = 'hammer-stress'
+    command_requires_org = True
+    command_org_optional = ('update',)
+
+
+class ConcurrencyTestCase(unittest.TestCase):
+    """Runs CLI operations from many threads at once"""
+    def setUp(self):
+        super(ConcurrencyTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties.pop('main.cli.backend', None)
+
+    def tearDown(self):
+        super(ConcurrencyTestCase, self).tearDown()
+        conf.properties = self.old_properties
+
+    @patch('robottelo.cli.base.ssh.command', side_effect=fake_command)
+    def test_stress(self, _):
+        """Each concurrent call runs its own subcommand and options"""
+        calls = []
+        expected = []
+        for i in range(200):
+            if i % 3 == 0:
+                calls.append((StressClass.list, {'organization-id': i}))
+                expected.append(('list', i))
+            elif i % 3 == 1:
+                calls.append((StressClass.update, {'id': i}))
+                expected.append(('update', i))
+            else:
+                calls.append((StressClass.delete, {'id': i}))
+                expected.append(('delete', i))
+        results = execute_concurrently(calls, max_parallel=20)
+        self.assertEqual(len(results), len(calls))
+        for (sub, i), result in zip(expected, results):
+            self.assertEqual(result.stdout[0]['sub'], sub)
+            self.assertIn(u"='%s'" % i, result.stdout[0]['args'])
+            if sub == 'list':
+                self.assertIn(u"--per-page", result.stdout[0]['args'])
+            else:
+                self.assertNotIn(u"--per-page", result.stdout[0]['args'])
+
+    @patch('robottelo.cli.base.ssh.command', side_effect=fake_command)
+    def test_errors(self, _):
+        """A failing call raises once every call is done"""
+        with self.assertRaises(Exception):
+            execute_concurrently([
+                (StressClass.update, {'id': 1}),
+                (StressClass.list, {}),
+            ])
+
+    def test_empty(self):
+        """Nothing to run returns no results"""
+        self.assertEqual(execute_concurrently([]), [])
+
+
+@patch('robottelo.common.helpers.time.sleep')
+class WaitForReadyTestCase(unittest.TestCase):
+    """Tests for the readiness checks of the CLI factory"""
+    def setUp(self):
+        super(WaitForReadyTestCase, self).setUp()
+        factory.reset_wait_stats()
+
+    def tearDown(self):
+        super(WaitForReadyTestCase, self).tearDown()
+        factory.reset_wait_stats()
+
+    def test_info_polling(self, sleep):
+        """Polls ``info`` until the entity is found"""
+        found = SSHCommandResult({'id': '1'})
+        missing = SSHCommandResult([], return_code=128)
+        with patch.object(
+                OrgRequiredClass, 'info',
+                side_effect=[missing, missing, found]) as info:
+            factory.wait_for_ready(
+                OrgRequiredClass, {'id': '1'}, {'organization-id': '2'})
+        self.assertEqual(info.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        info.assert_called_with({u'id': '1'})
+        stats = factory.wait_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertIn('OrgRequiredClass', stats['per_entity'])
+
+    def test_timeout(self, sleep):
+        """Raises when the entity never shows up"""
+        missing = SSHCommandResult([], return_code=128)
+        with patch.object(factory, 'READY_TIMEOUT', 0):
+            with patch.object(OrgRequiredClass, 'info', return_value=missing):
+                with self.assertRaises(factory.CLIFactoryError):
+                    factory.wait_for_ready(OrgRequiredClass, {'id': '1'}, {})
+        self.assertEqual(factory.wait_stats()['timeouts'], 1)
+
+    def test_org_library(self, sleep):
+        """Organizations are ready once their Library environment exists"""
+        results = [
+            SSHCommandResult([]),
+            SSHCommandResult([{'id': '2', 'name': 'Library'}]),
+        ]
+        with patch.object(
+                LifecycleEnvironment, 'list', side_effect=results) as envs:
+            with patch.object(Org, 'info') as info:
+                factory.wait_for_ready(
+                    Org.with_user('user', 'pass'), {'id': '1'}, {},
+                    found=True)
+        self.assertEqual(envs.call_count, 2)
+        envs.assert_called_with({u'organization-id': '1'})
+        self.assertEqual(sleep.call_count, 1)
+        self.assertFalse(info.called)
+
+    def test_found(self, sleep):
+        """Entities already found by info are not polled"""
+        with patch.object(OrgRequiredClass, 'info') as info:
+            factory.wait_for_ready(
+                OrgRequiredClass, {'id': '1'}, {}, found=True)
+        self.assertFalse(info.called)
+        self.assertFalse(sleep.called)
+
+    def test_found_check(self, sleep):
+        """Specific readiness checks run even after info found the entity"""
+        check = Mock(side_effect=[False, True])
+        with patch.dict(factory.READY_CHECKS, {OrgRequiredClass: check}):
+            factory.wait_for_ready(
+                OrgRequiredClass, {'id': '1'}, {}, found=True)
+        self.assertEqual(check.call_count, 2)
+
+    def test_create_object(self, sleep):
+        """Creating an entity runs info once"""
+        created = SSHCommandResult({'id': '1', 'name': 'created'})
+        with patch.object(OrgRequiredClass, 'create', return_value=created):
+            with patch.object(OrgRequiredClass, 'info') as info:
+                entity = factory.create_object(
+                    OrgRequiredClass, {'organization-id': '2'})
+        registry.discard(OrgRequiredClass.command_base, '1')
+        self.assertEqual(entity['name'], 'created')
+        self.assertFalse(info.called)
+        self.assertFalse(sleep.called)
+
+
+def list_result(*args, **kwargs):
+    """Return a new result listing one record"""
+    return SSHCommandResult([{'id': '1'}])
+
+
+class CachedClass(Base):
+    """Class used for the cache tests"""
+    command_base = 'cached'
+
+
+@patch('robottelo.cli.base.ssh.command')
+class CommandCacheTestCase(unittest.TestCase):
+    """Tests for the cache of list and info results"""
+    def setUp(self):
+        super(CommandCacheTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['main.cli.cache'] = '1'
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties.pop('main.cli.backend', None)
+        self.cache = CommandCache()
+        self.patcher = patch('robottelo.cli.base.cache', self.cache)
+        self.patcher.start()
+
+    def tearDown(self):
+        super(CommandCacheTestCase, self).tearDown()
+        self.patcher.stop()
+        conf.properties = self.old_properties
+
+    def test_hit(self, command):
+        """The same list runs once, and copies of its result are returned"""
+        command.side_effect = list_result
+        first = CachedClass.exists(tuple_search=('name', 'a'))
+        second = CachedClass.exists(tuple_search=('name', 'a'))
+        self.assertEqual(command.call_count, 1)
+        self.assertEqual(first.stdout, second.stdout)
+        self.assertEqual(CachedClass.list().stdout, [{'id': '1'}])
+        self.assertEqual(command.call_count, 2)
+        self.assertEqual(
+            self.cache.stats(),
+            {'hits': 1, 'misses': 2, 'evictions': 0, 'invalidations': 0,
+             'size': 2}
+        )
+
+    def test_invalidation(self, command):
+        """Writes drop the results of their base command only"""
+        command.side_effect = list_result
+        CachedClass.list()
+        StressClass.list({'organization-id': 1})
+        CachedClass.delete({'id': 1})
+        CachedClass.list()
+        StressClass.list({'organization-id': 1})
+        self.assertEqual(command.call_count, 4)
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+        CachedClass.execute(
+            CachedClass._construct_command({}, 'add-thing'))
+        CachedClass.list()
+        self.assertEqual(command.call_count, 6)
+
+    def test_failure(self, command):
+        """Failed commands are not cached"""
+        command.return_value = SSHCommandResult([], return_code=128)
+        CachedClass.list()
+        CachedClass.list()
+        self.assertEqual(command.call_count, 2)
+
+    def test_disabled(self, command):
+        """The cache can be turned off"""
+        command.side_effect = list_result
+        with self.cache.disabled():
+            CachedClass.list()
+            CachedClass.list()
+        self.assertEqual(command.call_count, 2)
+        conf.properties['main.cli.cache'] = '0'
+        CachedClass.list()
+        self.assertEqual(command.call_count, 3)
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_lru(self, command):
+        """The least recently used results are evicted"""
+        command.side_effect = list_result
+        self.cache.maxsize = 2
+        CachedClass.list({'search': 'a'})
+        CachedClass.list({'search': 'b'})
+        CachedClass.list({'search': 'a'})
+        CachedClass.list({'search': 'c'})
+        self.assertEqual(command.call_count, 3)
+        CachedClass.list({'search': 'a'})
+        self.assertEqual(command.call_count, 3)
+        CachedClass.list({'search': 'b'})
+        self.assertEqual(command.call_count, 4)
+        self.assertEqual(self.cache.stats()['evictions'], 2)
+
+
+class FakeShellChannel(object):
+    """A fake channel running ``hammer shell`` with its status hook.
+
+    Every command line is echoed back, followed by its output, its exit
+    status and the prompt. Commands starting with ``fail`` write to the
+    standard error, and those starting with ``late`` too, but only once the
+    prompt is read. Commands starting with ``warn`` succeed with a warning on
+    the standard error, and those starting with ``missing`` fail with an
+    error on the standard output. Commands starting with ``break`` raise an
+    exception. No exit status is printed unless ``statuses`` is true.
+
+    """
+    def __init__(self):
+        self.stdout = [HammerShellTestCase.prompt]
+        self.stderr = []
+        self.late_stderr = []
+        self.exited = False
+        self.statuses = True
+
+    def _done(self, status):
+        """Queue the exit status and the prompt."""
+        if self.statuses:
+            self.stdout.append(
+                '\r\n{0}{1}\r\n'.format(shell.STATUS_MARKER, status))
+        self.stdout.append(HammerShellTestCase.prompt)
+
+    def sendall(self, data):
+        """Queue the output of the command line ``data``."""
+        line = data.rstrip('\n')
+        if self.exited:
+            return
+        if line == 'exit':
+            self.exited = True
+        elif line.startswith('break'):
+            raise IOError('Socket is closed')
+        elif line.startswith('late'):
+            self.late_stderr.append('Error: {0}\n'.format(line))
+            self.stdout.append(line + '\r\n')
+            self._done(70)
+        elif line.startswith('warn'):
+            self.stderr.append('Warning: {0} is deprecated\n'.format(line))
+            self.stdout.append(line + '\r\nId,Name\r\n')
+            self._done(0)
+        elif line.startswith('missing'):
+            self.stdout.append(
+                line + '\r\nFailed to find {0}\r\n'.format(line))
+            self._done(65)
+        elif line.startswith('fail'):
+            self.stderr.append('Error: {0}\n'.format(line))
+            self.stdout.append(line + '\r\n')
+            self._done(64)
+        else:
+            # Split the output in several chunks
+            self.stdout.append(line + '\r\nId,Name\r\n')
+            self.stdout.append('1,{0}\r\n'.format(line))
+            self._done(0)
+
+    def recv_ready(self):
+        """Whether there is standard output to read."""
+        return len(self.stdout) > 0
+
+    def recv(self, bufsize):  # pylint:disable=W0613
+        """Return the next chunk of standard output."""
+        return self.stdout.pop(0)
+
+    def recv_stderr_ready(self):
+        """Whether there is standard error to read."""
+        if not self.stdout:
+            self.stderr.extend(self.late_stderr)
+            del self.late_stderr[:]
+        return len(self.stderr) > 0
+
+    def recv_stderr(self, bufsize):  # pylint:disable=W0613
+        """Return the next chunk of standard error."""
+        return self.stderr.pop(0)
+
+    def exit_status_ready(self):
+        """Whether the shell exited."""
+        return self.exited
+
+    def close(self):
+        """A no-op stub method."""
+
+
+class HammerShellTestCase(unittest.TestCase):
+    """Tests for :class:`robottelo.cli.shell.HammerShell`"""
+    prompt = shell.HammerShell.prompt
+
+    def setUp(self):
+        super(HammerShellTestCase, self).setUp()
+        self.session = shell.HammerShell('admin', 'changeme')
+        self.session.channel = FakeShellChannel()
+        # Consume the prompt printed on start-up
+        self.session._read_until_prompt(1)  # pylint:disable=W0212
+
+    def test_split_output(self):
+        """Each command gets its own output, without echo nor prompt"""
+        stdout, stderr, return_code = self.session.run('org list')
+        self.assertEqual(stdout, 'Id,Name\n1,org list\n')
+        self.assertEqual(stderr, '')
+        self.assertEqual(return_code, 0)
+        stdout, _, _ = self.session.run('user list')
+        self.assertEqual(stdout, 'Id,Name\n1,user list\n')
+
+    def test_failed_command(self):
+        """A failed command gets hammer's exit status"""
+        stdout, stderr, return_code = self.session.run('fail now')
+        self.assertEqual(stdout, '')
+        self.assertEqual(stderr, 'Error: fail now\n')
+        self.assertEqual(return_code, 64)
+
+    def test_warning(self):
+        """A command writing a warning to the standard error has succeeded"""
+        stdout, stderr, return_code = self.session.run('warn now')
+        self.assertEqual(stdout, 'Id,Name\n')
+        self.assertEqual(stderr, 'Warning: warn now is deprecated\n')
+        self.assertEqual(return_code, 0)
+
+    def test_stdout_error(self):
+        """A command writing an error to the standard output has failed"""
+        stdout, stderr, return_code = self.session.run('missing org')
+        self.assertEqual(stdout, 'Failed to find missing org\n')
+        self.assertEqual(stderr, '')
+        self.assertEqual(return_code, 65)
+
+    def test_check_status(self):
+        """Shells not printing exit statuses are not used"""
+        self.addCleanup(
+            shell._unsupported.discard, None)  # pylint:disable=W0212
+        self.session.check_status()
+        self.session.channel.statuses = False
+        with self.assertRaises(shell.HammerShellUnsupported):
+            self.session.check_status()
+        self.assertIsNone(self.session.channel)
+        self.assertIn(None, shell._unsupported)  # pylint:disable=W0212
+        with self.assertRaises(shell.HammerShellUnsupported):
+            shell._get_session('admin', 'changeme')  # pylint:disable=W0212
+
+    def test_missing_status(self):
+        """A command without exit status closes the session"""
+        self.session.channel.statuses = False
+        with self.assertRaises(shell.HammerShellError):
+            self.session.run('org list')
+        self.assertIsNone(self.session.channel)
+
+    def test_shell_exited(self):
+        """An error is raised if the shell exits"""
+        self.session.channel.exited = True
+        with self.assertRaises(shell.HammerShellError):
+            self.session.run('org list')
+
+    def test_late_stderr(self):
+        """Standard error arriving after the prompt belongs to its command"""
+        _, stderr, return_code = self.session.run('late failure')
+        self.assertEqual(stderr, 'Error: late failure\n')
+        self.assertEqual(return_code, 70)
+        _, stderr, return_code = self.session.run('org list')
+        self.assertEqual(stderr, '')
+        self.assertEqual(return_code, 0)
+
+    def test_error_closes(self):
+        """The session is closed on any error"""
+        with self.assertRaises(IOError):
+            self.session.run('break now')
+        self.assertIsNone(self.session.channel)
+        with self.assertRaises(shell.HammerShellError):
+            self.session.run('org list')
+
+
+class ShellExecuteTestCase(unittest.TestCase):
+    """Tests for :func:`robottelo.cli.shell.execute`"""
+    def setUp(self):
+        super(ShellExecuteTestCase, self).setUp()
+        shell.close_sessions()
+        self.channels = []
+        patcher = patch.object(
+            shell.HammerShell, 'start', autospec=True,
+            side_effect=self.start)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(shell.HammerShell, 'close', autospec=True)
+        self.close = patcher.start()
+        self.close.side_effect = self.close_session
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shell.close_sessions)
+
+    def start(self, session):
+        """Give ``session`` a fake channel."""
+        session.channel = FakeShellChannel()
+        self.channels.append(session.channel)
+        session._read_until_prompt(1)  # pylint:disable=W0212
+
+    @staticmethod
+    def close_session(session):
+        """Drop the fake channel of ``session``."""
+        session.channel = None
+
+    def test_reuse(self):
+        """Commands of a thread share a session"""
+        shell.execute('org list', 'admin', 'changeme')
+        result = shell.execute('user list', 'admin', 'changeme')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(len(self.channels), 1)
+
+    def test_threads(self):
+        """Threads get their own sessions, closed once they are over"""
+        sessions = []
+
+        def target():
+            """Run a command in a new thread."""
+            shell.execute('org list', 'admin', 'changeme')
+            sessions.append(shell._get_session(  # pylint:disable=W0212
+                'admin', 'changeme'))
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        self.assertIsNotNone(sessions[0].channel)
+        session = shell._get_session(  # pylint:disable=W0212
+            'admin', 'changeme')
+        self.assertIsNot(session, sessions[0])
+        self.assertIsNone(sessions[0].channel)
+        self.assertIsNotNone(session.channel)
+
+    def test_close_sessions(self):
+        """Closing the sessions closes those of every thread"""
+        started = threading.Event()
+        done = threading.Event()
+        sessions = []
+
+        def target():
+            """Keep a session open until the test is done."""
+            sessions.append(shell._get_session(  # pylint:disable=W0212
+                'admin', 'changeme'))
+            started.set()
+            done.wait()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        started.wait()
+        try:
+            shell.close_sessions()
+            self.assertIsNone(sessions[0].channel)
+        finally:
+            done.set()
+            thread.join()
+
+    def test_error_drops(self):
+        """A session failing with any error is replaced"""
+        shell.execute('org list', 'admin', 'changeme')
+        with self.assertRaises(IOError):
+            shell.execute('break now', 'admin', 'changeme')
+        result = shell.execute('org list', 'admin', 'changeme')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(len(self.channels), 2)
@@ -6,6 +6,8 @@ from robottelo.api import client
 from robottelo.common import conf
 from robottelo import factory, orm
 from unittest import TestCase
+import threading
+import time
 
 
 SAMPLE_FACTORY_NAME = 'christmahanakwanzika present'
@@ -243,3 +245,276 @@ class SampleEntityFactoryTestCase(TestCase):
         self.assertIn('label', attrs.keys())
         self.assertEqual(attrs['name'], name)
         self.assertEqual(attrs['label'], label)
+
+
+class LeafFactory(SampleFactory):
+    """A factory without dependencies."""
+    def _factory_path(self):
+        """Return a path for creating a "Leaf" entity."""
+        return 'api/v2/leaves'
+
+
+class BranchFactory(SampleFactory):
+    """A factory depending on one leaf and on a list of leaves."""
+    def _factory_path(self):
+        """Return a path for creating a "Branch" entity."""
+        return 'api/v2/branches'
+
+    def _factory_data(self):
+        """Return data for creating a "Branch" entity."""
+        return {
+            'leaf_id': LeafFactory(),
+            'leaf_ids': [LeafFactory(), LeafFactory()],
+        }
+
+
+class TreeFactory(SampleFactory):
+    """A factory depending on a branch and on a leaf."""
+    def _factory_data(self):
+        """Return data for creating a "Tree" entity."""
+        return {
+            'name': SAMPLE_FACTORY_NAME,
+            'branch_id': BranchFactory(),
+            'leaf_id': LeafFactory(),
+        }
+
+
+class BuildingFactory(LeafFactory):
+    """A factory overriding ``build``."""
+    def build(self, auth=None):
+        """Create a leaf, then return this factory's values."""
+        values = super(BuildingFactory, self).build(auth)
+        values['leaf_id'] = LeafFactory().create(auth)['id']
+        return values
+
+
+class RecordedPostsTestCase(TestCase):
+    """A test case recording the requests sent to create entities."""
+    def setUp(self):  # pylint:disable=C0103
+        """Backup, customize and override objects."""
+        self.client_post = client.post
+        self.conf_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['foreman.admin.username'] = 'username'
+        conf.properties['foreman.admin.password'] = 'password'
+        self.lock = threading.Lock()
+        self.posts = []
+        self.threads = set()
+        self.running = 0
+        self.max_running = 0
+        client.post = Mock(side_effect=self.post)
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore backed-up objects."""
+        client.post = self.client_post
+        conf.properties = self.conf_properties
+
+    def post(self, path, values, **_):
+        """Record a POST request and return a response with a new ID."""
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.threads.add(threading.current_thread().ident)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+            self.posts.append((path, values))
+            entity_id = len(self.posts)
+        response = Mock()
+        response.json.return_value = {'id': entity_id}
+        return response
+
+
+class DependencyTreeTestCase(RecordedPostsTestCase):
+    """Tests for the creation of dependencies by ``Factory.build``."""
+    def test_values(self):
+        """Build a tree and check that factories are replaced by IDs."""
+        values = TreeFactory().build()
+        self.assertEqual(values['name'], SAMPLE_FACTORY_NAME)
+        ids = dict(
+            (entity_id, path)
+            for entity_id, (path, _) in enumerate(self.posts, 1)
+        )
+        self.assertTrue(ids[values['branch_id']].endswith('api/v2/branches'))
+        self.assertTrue(ids[values['leaf_id']].endswith('api/v2/leaves'))
+        self.assertEqual(len(self.posts), 5)
+
+    def test_order(self):
+        """Assert that each entity is created after its dependencies."""
+        TreeFactory().create()
+        for entity_id, (_, values) in enumerate(self.posts, 1):
+            for name, value in values.items():
+                if name == 'leaf_ids':
+                    self.assertTrue(all(item < entity_id for item in value))
+                elif name.endswith('_id'):
+                    self.assertLess(value, entity_id)
+        self.assertTrue(self.posts[-1][0].endswith('api/v2/samples'))
+
+    def test_report(self):
+        """Assert that the requests and the critical path are reported."""
+        tree = TreeFactory()
+        tree.build()
+        self.assertEqual(tree.build_report, factory.BuildReport(5, 2))
+        tree.create()
+        self.assertEqual(tree.build_report, factory.BuildReport(6, 3))
+        leaf = LeafFactory()
+        leaf.create()
+        self.assertEqual(leaf.build_report, factory.BuildReport(1, 1))
+
+    def test_concurrent(self):
+        """Assert that independent entities are created concurrently."""
+        TreeFactory().build(workers=4)
+        self.assertGreater(self.max_running, 1)
+        self.assertLessEqual(self.max_running, 4)
+
+    def test_serial(self):
+        """Assert that one worker creates entities in the calling thread."""
+        TreeFactory().build(workers=1)
+        self.assertEqual(self.max_running, 1)
+        self.assertEqual(self.threads, set([threading.current_thread().ident]))
+
+    def test_workers_property(self):
+        """Assert that ``main.api.factory_workers`` bounds the workers."""
+        conf.properties['main.api.factory_workers'] = '1'
+        TreeFactory().build()
+        self.assertEqual(self.max_running, 1)
+
+    def test_shared(self):
+        """Assert that a factory used twice is created once."""
+        leaf = LeafFactory()
+        tree = TreeFactory()
+        tree._factory_data = lambda: {  # pylint:disable=W0212
+            'leaf_id': leaf, 'leaf_ids': [leaf]}
+        values = tree.build()
+        self.assertEqual(len(self.posts), 1)
+        self.assertEqual(values, {'leaf_id': 1, 'leaf_ids': [1]})
+
+    def test_build_override(self):
+        """Assert that a factory overriding ``build`` uses its own."""
+        tree = TreeFactory()
+        tree._factory_data = lambda: {  # pylint:disable=W0212
+            'building_id': BuildingFactory()}
+        values = tree.build()
+        leaf_id = self.posts[-1][1]['leaf_id']
+        self.assertEqual(leaf_id, values['building_id'] - 1)
+        self.assertEqual(tree.build_report, factory.BuildReport(1, 1))
+
+    def test_error(self):
+        """Assert that a failure stops the creation of the dependents."""
+        client.post = Mock(return_value=MockErrorResponse())
+        with self.assertRaises(factory.FactoryError):
+            TreeFactory().build()
+        paths = [call[0][0] for call in client.post.call_args_list]
+        self.assertFalse(
+            [path for path in paths if path.endswith('api/v2/branches')])
+        self.assertTrue(paths)
+
+
+class FactoryScopeTestCase(RecordedPostsTestCase):
+    """Tests for :class:`robottelo.factory.FactoryScope`."""
+    def test_share(self):
+        """Assert that parents of the same type are created once."""
+        with factory.FactoryScope() as scope:
+            values = TreeFactory().build()
+            self.assertEqual(len(self.posts), 4)
+            self.assertEqual(scope.saved, 1)
+            branch = self.posts[values['branch_id'] - 1][1]
+            self.assertEqual(branch['leaf_id'], values['leaf_id'])
+            self.assertEqual(len(set(branch['leaf_ids'])), 2)
+
+            self.assertEqual(TreeFactory().build(), values)
+            self.assertEqual(len(self.posts), 4)
+            self.assertEqual(scope.saved, 6)
+
+    def test_closed(self):
+        """Assert that nothing is shared once the scope is closed."""
+        with factory.FactoryScope():
+            TreeFactory().build()
+        TreeFactory().build()
+        self.assertEqual(len(self.posts), 9)
+
+    def test_exclude(self):
+        """Assert that the excluded fields get their own parents."""
+        for exclude in ('leaf_id', 'TreeFactory.leaf_id'):
+            with factory.FactoryScope(exclude=[exclude]) as scope:
+                TreeFactory().build()
+            self.assertEqual(scope.saved, 0)
+        self.assertEqual(len(self.posts), 10)
+
+    def test_explicit_values(self):
+        """Assert that entities with explicit values are not shared."""
+        scope = factory.FactoryScope()
+        first = SampleEntityFactory()
+        self.assertIs(scope.share(None, 'sample_id', first), first)
+        self.assertIs(
+            scope.share(None, 'sample_id', SampleEntityFactory()), first)
+        explicit = SampleEntityFactory(name='explicit')
+        self.assertIs(scope.share(None, 'sample_id', explicit), explicit)
+
+    def test_create_dependency(self):
+        """Assert that ``create_dependency`` shares the dependencies."""
+        tree = TreeFactory()
+        with factory.FactoryScope() as scope:
+            first = factory.create_dependency(tree, 'leaf_id', LeafFactory())
+            second = factory.create_dependency(tree, 'leaf_id', LeafFactory())
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.posts), 1)
+        self.assertEqual(scope.saved, 1)
+
+    def test_concurrent_builds(self):
+        """Assert that concurrent builds create a shared parent once."""
+        scope = factory.FactoryScope()
+
+        def create():
+            """Create a leaf in the shared scope."""
+            with scope:
+                factory.create_dependency(None, 'leaf_id', LeafFactory())
+
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.posts), 1)
+
+    def test_thread_local(self):
+        """Assert that a scope does not apply to other threads."""
+        scopes = []
+        with factory.FactoryScope():
+            thread = threading.Thread(
+                target=lambda: scopes.append(
+                    factory._current_scope()))  # pylint:disable=W0212
+            thread.start()
+            thread.join()
+        self.assertEqual(scopes, [None])
+
+    def test_exit_order(self):
+        """Assert that scopes may be closed in any order."""
+        # pylint:disable=W0212
+        outer, inner = factory.FactoryScope(), factory.FactoryScope()
+        outer.__enter__()
+        inner.__enter__()
+        outer.__exit__(None, None, None)
+        self.assertIs(factory._current_scope(), inner)
+        inner.__exit__(None, None, None)
+        self.assertIsNone(factory._current_scope())
+
+    def test_workers(self):
+        """Assert that the threads creating dependencies use the scope."""
+        class SharingFactory(LeafFactory):
+            """A factory creating a shared leaf in its own ``build``."""
+            def build(self, auth=None):
+                """Create a leaf, then return this factory's values."""
+                values = super(SharingFactory, self).build(auth)
+                values['leaf_id'] = factory.create_dependency(
+                    self, 'leaf_id', LeafFactory(), auth)['id']
+                return values
+
+        tree = TreeFactory()
+        tree._factory_data = lambda: {  # pylint:disable=W0212
+            'sharing_id': SharingFactory(), 'leaf_id': LeafFactory()}
+        with factory.FactoryScope():
+            values = tree.build(workers=2)
+        self.assertEqual(len(self.posts), 2)
+        sharing = self.posts[values['sharing_id'] - 1][1]
+        self.assertEqual(sharing['leaf_id'], values['leaf_id'])
@@ -1,12 +1,19 @@
 """Tests for module ``robottelo.common.helpers``."""
 # (Too many public methods) pylint: disable=R0904
+import glob
+import io
+import json
+import os
 import unittest
-from robottelo.common import conf
+from mock import patch
+from robottelo.common import conf, get_app_root
 from robottelo.common.helpers import (
-    escape_search, generate_email_address, generate_ipaddr, generate_mac,
-    generate_name, generate_string, generate_strings_list, get_server_url,
-    get_server_credentials, info_dictionary, invalid_names_list,
-    valid_data_list, valid_names_list,
+    ALPHABETS, DataGenerator, escape_search, generate_email_address,
+    generate_ipaddr, generate_mac, generate_name, generate_string,
+    generate_strings_list, get_server_url, get_server_credentials,
+    info_dictionary, invalid_names_list, iter_csv_dictionary,
+    csv_to_dictionary, csv_to_table, monotonic, TaskPoller, valid_data_list,
+    valid_names_list, wait_until,
 )
 
 
@@ -188,6 +195,92 @@ class GenerateStringTestCase(unittest.TestCase):
         self.assertIsInstance(generate_string('html', 8), unicode)
 
 
+class DataGeneratorTestCase(unittest.TestCase):
+    def test_strings(self):
+        """Tests if strings are drawn from the alphabet of their type"""
+        generator = DataGenerator()
+        for str_type in ('alpha', 'alphanumeric', 'numeric', 'latin1',
+                         'utf8'):
+            values = generator.strings(str_type, 8, 50)
+            self.assertEqual(len(values), 50)
+            for value in values:
+                self.assertIsInstance(value, unicode)
+                self.assertEqual(len(value), 8)
+                self.assertTrue(set(value) <= set(ALPHABETS[str_type]))
+
+    def test_indexes(self):
+        """Tests if indexes cover the whole range and only it"""
+        generator = DataGenerator()
+        for size in (1, 10, 62, 255, 256, 20940):
+            indexes = generator._indexes(size, 2000)  # pylint:disable=W0212
+            self.assertEqual(len(indexes), 2000)
+            self.assertTrue(all(0 <= i < size for i in indexes))
+        self.assertEqual(len(set(generator._indexes(  # pylint:disable=W0212
+            62, 5000))), 62)
+
+    def test_latin1_alphabet(self):
+        """Tests if the latin1 alphabet holds no mathematical symbol"""
+        self.assertNotIn(u'\xd7', ALPHABETS['latin1'])
+        self.assertNotIn(u'\xf7', ALPHABETS['latin1'])
+        self.assertIn(u'\xc0', ALPHABETS['latin1'])
+
+    def test_html(self):
+        """Tests if html strings are wrapped in a tag"""
+        for value in DataGenerator().strings('html', 8, 20):
+            self.assertRegexpMatches(
+                value, r'^<([a-z0-9]+)>[a-zA-Z]{8}</\1>$')
+
+    def test_unknown_type(self):
+        """Tests if an unknown string type raises an exception"""
+        with self.assertRaises(Exception):
+            DataGenerator().strings('foo', 8)
+
+    def test_names(self):
+        """Tests if names have a length within the bounds"""
+        for value in DataGenerator().names(3, 6, 100):
+            self.assertTrue(3 <= len(value) <= 6)
+            self.assertTrue(set(value) <= set(ALPHABETS['name']))
+
+    def test_addresses(self):
+        """Tests if IP and MAC addresses are well formed"""
+        generator = DataGenerator()
+        for value in generator.ipaddrs(count=20):
+            octets = [int(octet) for octet in value.split('.')]
+            self.assertEqual(len(octets), 4)
+            self.assertTrue(all(0 <= octet < 255 for octet in octets))
+        for value in generator.ipaddrs(ip3=True, count=20):
+            self.assertTrue(value.endswith('.0'))
+            self.assertEqual(len(value.split('.')), 4)
+        for value in generator.macs(u'-', count=20):
+            self.assertRegexpMatches(value, r'^([0-9a-f]{2}-){5}[0-9a-f]{2}$')
+
+    def test_unique(self):
+        """Tests if unique values are never returned twice"""
+        generator = DataGenerator()
+        values = generator.strings('numeric', 2, 50, unique=True)
+        values += generator.strings('numeric', 2, 40, unique=True)
+        self.assertEqual(len(set(values)), 90)
+        with self.assertRaises(ValueError):
+            generator.strings('numeric', 2, 11, unique=True)
+        generator.reset()
+        self.assertEqual(
+            len(generator.strings('numeric', 2, 11, unique=True)), 11)
+
+    def test_seed(self):
+        """Tests if a seed reproduces the values"""
+        self.assertEqual(
+            DataGenerator(seed=1).names(count=10),
+            DataGenerator(seed=1).names(count=10))
+
+    def test_fork(self):
+        """Tests if the random generator is seeded again after a fork"""
+        generator = DataGenerator()
+        first = generator.random()
+        self.assertIs(generator.random(), first)
+        with patch('os.getpid', return_value=-1):
+            self.assertIsNot(generator.random(), first)
+
+
 class GenerateStringListTestCase(unittest.TestCase):
     def test_return_type(self):
         """Tests if generate string list returns a unicode string"""
@@ -305,3 +398,184 @@ class InfoDictionaryTestCase(unittest.TestCase):
                 'url': '/custom/url2',
             }],
         })
+
+    def test_parse_json(self):
+        """Can parse the JSON output of hammer"""
+        output = FakeSSHResult(stdout=[
+            '{',
+            '  "Id": 13,',
+            '  "Full Name": "Custom Product",',
+            '  "Description": null,',
+            '  "Readonly": false,',
+            '  "Content": [',
+            '    {"Repo Name": "repo1", "URL": "/custom/url1"}',
+            '  ],',
+            '  "Operating systems": ["RedHat 6.5", ""]',
+            '}',
+        ])
+
+        result = info_dictionary(output)
+        self.assertDictEqual(result.stdout, {
+            'id': '13',
+            'full-name': 'Custom Product',
+            'description': '',
+            'readonly': 'no',
+            'content': [{'repo-name': 'repo1', 'url': '/custom/url1'}],
+            'operating-systems': ['RedHat 6.5', ''],
+        })
+
+    def test_golden_files(self):
+        """Can parse the info output of every CLI entity
+
+        ``tests/robottelo/data/info`` holds an info output per hammer base
+        command, with the expected dictionary in a JSON file.
+
+        """
+        data_dir = os.path.join(
+            get_app_root(), 'tests', 'robottelo', 'data', 'info')
+        outputs = sorted(glob.glob(os.path.join(data_dir, '*.txt')))
+        self.assertGreater(len(outputs), 0)
+        for path in outputs:
+            with io.open(path, encoding='utf-8') as handler:
+                output = FakeSSHResult(stdout=handler.read().split(u'\n'))
+            with io.open(path[:-4] + '.json', encoding='utf-8') as handler:
+                expected = json.load(handler)
+            self.assertEqual(
+                info_dictionary(output).stdout, expected,
+                'Unexpected result for {0}'.format(os.path.basename(path))
+            )
+
+
+class CSVToDictionaryTestCase(unittest.TestCase):
+    def test_parse(self):
+        """Can parse CSV lines into dictionaries"""
+        self.assertEqual(
+            csv_to_dictionary(['Id,Full Name', '1,foo', '', '2,bar']),
+            [{'id': '1', 'full-name': 'foo'}, {'id': '2', 'full-name': 'bar'}]
+        )
+
+    def test_empty(self):
+        """Can parse an empty output"""
+        self.assertEqual(csv_to_dictionary([]), [])
+
+    def test_lazy(self):
+        """Rows are parsed as lines are consumed"""
+        def lines():
+            yield 'Id,Name'
+            yield '1,foo'
+            raise AssertionError('Read too far')
+        rows = iter_csv_dictionary(lines())
+        self.assertEqual(next(rows), {'id': '1', 'name': 'foo'})
+
+    def test_quoted(self):
+        """Quoted values can hold commas, quotes and line breaks"""
+        self.assertEqual(
+            csv_to_dictionary([
+                'Id,Name,Description',
+                '1,"a, b","say ""hi"""',
+                u'2,\u00e9,"first',
+                'second"',
+                '3,"",',
+            ]),
+            [
+                {'id': '1', 'name': 'a, b', 'description': 'say "hi"'},
+                {'id': '2', 'name': u'\u00e9', 'description': 'first\nsecond'},
+                {'id': '3', 'name': '', 'description': ''},
+            ]
+        )
+
+    def test_table(self):
+        """The column oriented result shares its keys between rows"""
+        table = csv_to_table(['Id,Full Name', '1,"foo, bar"', '2,baz'])
+        self.assertEqual(table.keys, ('id', 'full-name'))
+        self.assertEqual(table.rows, [('1', 'foo, bar'), ('2', 'baz')])
+        self.assertEqual(csv_to_table([]), ((), []))
+
+
+@patch('robottelo.common.helpers.time.sleep')
+class WaitUntilTestCase(unittest.TestCase):
+    def test_ready(self, sleep):
+        """Sleeps with an exponential backoff until the predicate is true"""
+        answers = iter([False, False, False, True])
+        self.assertTrue(wait_until(lambda: next(answers), delay=1, backoff=2))
+        self.assertEqual(
+            [call[0][0] for call in sleep.call_args_list], [1, 2, 2])
+
+    def test_timeout(self, sleep):
+        """Gives up once the deadline is reached"""
+        self.assertFalse(wait_until(lambda: False, timeout=0))
+        self.assertFalse(sleep.called)
+
+
+class MonotonicTestCase(unittest.TestCase):
+    def test_monotonic(self):
+        """The clock does not go backwards"""
+        first = monotonic()
+        self.assertLessEqual(first, monotonic())
+
+
+class TaskPollerTestCase(unittest.TestCase):
+    """Tests for ``TaskPoller``, on a fake clock"""
+    def setUp(self):  # pylint:disable=C0103
+        self.now = 0.0
+        self.sleeps = []
+        patchers = (
+            patch('robottelo.common.helpers.monotonic', lambda: self.now),
+            patch('robottelo.common.helpers.time.sleep', self.sleep),
+        )
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def sleep(self, seconds):
+        """Advances the fake clock"""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def test_backoff(self):
+        """The delay grows exponentially up to its maximum"""
+        tasks = iter([{'pending': True}] * 5 + [{'pending': False}])
+        poller = TaskPoller(lambda: next(tasks), min_delay=1, max_delay=5)
+        self.assertEqual(poller.poll(), {'pending': False})
+        self.assertEqual(self.sleeps, [1, 2, 4, 5, 5])
+        self.assertEqual(poller.polls, 6)
+        self.assertEqual(poller.waited, 17)
+
+    def test_progress(self):
+        """The next check is scheduled with the pace of the progress"""
+        tasks = iter([
+            {'pending': True, 'progress': 0.1},
+            {'pending': True, 'progress': 0.2},
+            {'pending': True, 'progress': 0.8},
+            {'pending': False, 'progress': 1},
+        ])
+        poller = TaskPoller(lambda: next(tasks), min_delay=1, max_delay=30)
+        poller.poll()
+        # 10% in 1s: 8s left; 60% in 8s: about 1.3s left
+        self.assertEqual(self.sleeps[:2], [1, 8])
+        self.assertAlmostEqual(self.sleeps[2], 0.2 * 8 / 0.6)
+
+    def test_deadline(self):
+        """The poller gives up at the deadline, without oversleeping"""
+        poller = TaskPoller(
+            lambda: {'pending': True}, timeout=10, min_delay=3, max_delay=3)
+        self.assertEqual(poller.poll(), {'pending': True})
+        self.assertEqual(self.sleeps, [3, 3, 3, 1])
+        self.assertEqual(poller.waited, 10)
+
+    def test_short_max_delay(self):
+        """A maximum delay below the minimum delay is honoured"""
+        tasks = iter([{'pending': True}] * 3 + [{'pending': False}])
+        poller = TaskPoller(lambda: next(tasks), max_delay=0.1)
+        poller.poll()
+        self.assertEqual(self.sleeps, [0.1, 0.1, 0.1])
+
+    def test_finished(self):
+        """A custom predicate tells when the task is finished"""
+        tasks = iter([{'result': 'pending'}, {'result': 'success'}])
+        poller = TaskPoller(
+            lambda: next(tasks),
+            finished=lambda task: task['result'] != 'pending',
+        )
+        self.assertEqual(poller.poll(), {'result': 'success'})
+        self.assertEqual(poller.polls, 2)
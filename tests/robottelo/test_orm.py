@@ -10,6 +10,7 @@ from robottelo.common import helpers
 from robottelo import entities, orm
 from sys import version_info
 import ddt
+import mock
 import socket
 import unittest
 
@@ -386,3 +387,40 @@ class GetValueTestCase(unittest.TestCase):
         """
         field = orm.StringField(choices=('a', 'b', 'c'), default='d')
         self.assertEqual(orm._get_value(field, None), 'd')
+
+
+class IterAllTestCase(unittest.TestCase):
+    """Tests for :meth:`robottelo.orm.Entity.iter_all`."""
+    def setUp(self):  # pylint:disable=C0103
+        """Back up and configure ``conf.properties``."""
+        self.conf_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``conf.properties``."""
+        conf.properties = self.conf_properties
+
+    def test_pages(self):
+        """Every page of ``path('all')`` is read, with the given params."""
+        pages = [
+            {'total': 3, 'results': [{'id': 1}, {'id': 2}]},
+            {'total': 3, 'results': [{'id': 3}]},
+        ]
+        response = mock.Mock()
+        response.json.side_effect = pages
+        with mock.patch.object(orm.client, 'get') as get:
+            get.return_value = response
+            entities_ = list(SampleEntity().iter_all(
+                auth=('user', 'pass'),
+                per_page=2,
+                prefetch=False,
+                params={'search': 'name=foo'},
+            ))
+        self.assertEqual(entities_, [{'id': 1}, {'id': 2}, {'id': 3}])
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(
+            get.call_args[1]['params'],
+            {'search': 'name=foo', 'page': 2, 'per_page': 2},
+        )
+        self.assertEqual(get.call_args[0][0], SampleEntity().path('all'))
+        self.assertEqual(response.raise_for_status.call_count, 2)
@@ -0,0 +1,229 @@
+"""Tests for :mod:`robottelo.pool`."""
+from mock import Mock
+from robottelo.common import conf
+from robottelo import cleanup, pool
+from unittest import TestCase
+import itertools
+import threading
+
+
+class FakeServer(object):
+    """Creates entities and tracks their state."""
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.states = {}
+
+    def create(self):
+        """Create an entity."""
+        with self.lock:
+            entity_id = next(self.ids)
+            self.states[entity_id] = 'clean'
+        return {'id': entity_id}
+
+    def snapshot(self, entity):
+        """Return the state of an entity."""
+        return self.states[entity['id']]
+
+    def recycle(self, entity):
+        """Restore the state of an entity."""
+        self.states[entity['id']] = 'clean'
+
+
+class FixturePoolTestCase(TestCase):
+    """Tests for :class:`robottelo.pool.FixturePool`."""
+    def setUp(self):  # pylint:disable=C0103
+        """Create a pool of two entities of a fake kind."""
+        self.server = FakeServer()
+        self.pool = pool.FixturePool(size=2, workers=2)
+        self.pool.register(
+            'thing', self.server.create, snapshot=self.server.snapshot)
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Stop the pool."""
+        self.pool.close()
+
+    def wait(self):
+        """Wait for the background work of the pool to finish."""
+        self.pool.close()
+
+    def test_prefill(self):
+        """Assert that entities are created when the pool starts."""
+        self.pool.start()
+        self.wait()
+        self.assertEqual(self.pool.stats['created'], 2)
+        self.assertEqual(self.pool.lease('thing'), {'id': 1})
+        self.assertEqual(self.pool.stats['hits'], 1)
+
+    def test_refill(self):
+        """Assert that leased entities are replaced."""
+        self.pool.start()
+        self.pool.lease('thing')
+        self.wait()
+        self.assertEqual(self.pool.stats['created'], 3)
+
+    def test_miss(self):
+        """Assert that an entity is created if no creation is pending."""
+        self.pool.register(
+            'thing', self.server.create, snapshot=self.server.snapshot,
+            size=0)
+        self.assertEqual(self.pool.lease('thing'), {'id': 1})
+        self.assertEqual(self.pool.stats['misses'], 1)
+
+    def test_copy(self):
+        """Assert that leases are copies of the pooled entities."""
+        self.pool.start()
+        entity = self.pool.lease('thing')
+        entity['name'] = 'changed'
+        self.pool.release(entity, mutated=False)
+        self.wait()
+        self.assertNotIn('name', self.pool.lease('thing'))
+
+    def test_return(self):
+        """Assert that an unchanged entity is lent again."""
+        self.pool.register(
+            'thing', self.server.create, snapshot=self.server.snapshot,
+            size=1)
+        self.pool.start()
+        with self.pool.leased('thing') as entity:
+            self.assertEqual(entity, {'id': 1})
+        self.wait()
+        leases = [self.pool.lease('thing') for _ in range(2)]
+        self.assertIn({'id': 1}, leases)
+
+    def test_detect_mutation(self):
+        """Assert that a changed entity is quarantined."""
+        self.pool.start()
+        with self.pool.leased('thing') as entity:
+            self.server.states[entity['id']] = 'changed'
+        self.wait()
+        self.assertEqual(self.pool.quarantined('thing'), [entity])
+        self.assertEqual(self.pool.stats['quarantined'], 1)
+
+    def test_mutated(self):
+        """Assert that an entity said to be changed is quarantined."""
+        self.pool.start()
+        with self.pool.leased('thing', mutated=True) as entity:
+            pass
+        self.wait()
+        self.assertEqual(self.pool.quarantined('thing'), [entity])
+
+    def test_error(self):
+        """Assert that an entity is quarantined if the test fails."""
+        self.pool.start()
+        with self.assertRaises(ValueError):
+            with self.pool.leased('thing') as entity:
+                raise ValueError
+        self.wait()
+        self.assertEqual(self.pool.quarantined('thing'), [entity])
+
+    def test_recycle(self):
+        """Assert that a changed entity is recycled if possible."""
+        self.pool.register(
+            'thing', self.server.create, snapshot=self.server.snapshot,
+            recycle=self.server.recycle, size=1)
+        self.pool.start()
+        with self.pool.leased('thing', mutated=True) as entity:
+            self.server.states[entity['id']] = 'changed'
+        self.wait()
+        self.assertEqual(self.pool.quarantined('thing'), [])
+        self.assertEqual(self.pool.stats['recycled'], 1)
+        self.assertEqual(self.server.states[1], 'clean')
+        self.assertIn(entity, [self.pool.lease('thing') for _ in range(2)])
+
+    def test_create_error(self):
+        """Assert that failed creations are counted and not retried."""
+        self.pool.register('thing', Mock(side_effect=ValueError))
+        self.pool.start()
+        self.wait()
+        self.assertEqual(self.pool.stats['errors'], 2)
+        with self.assertRaises(ValueError):
+            self.pool.lease('thing')
+
+    def test_not_cleaned_up(self):
+        """Assert that pooled entities survive the cleanup of the test
+        running when they are created."""
+        deleted = []
+
+        def create():
+            """Create an entity and record it, as factories do."""
+            entity = self.server.create()
+            cleanup.registry.add(
+                'thing', entity['id'],
+                lambda: deleted.append(entity['id']))
+            return entity
+
+        self.pool.register('thing', create, size=1)
+        mark = cleanup.registry.mark()
+        self.pool.start()
+        self.pool.lease('thing')
+        self.wait()
+        cleanup.registry.cleanup(since=mark)
+        self.assertEqual(self.pool.stats['created'], 2)
+        self.assertEqual(deleted, [])
+        self.assertEqual(self.pool.lease('thing'), {'id': 2})
+
+    def test_not_leased(self):
+        """Assert that only leased entities can be returned."""
+        with self.assertRaises(pool.PoolError):
+            self.pool.release({'id': 1})
+        with self.assertRaises(pool.PoolError):
+            self.pool.lease('other')
+
+    def test_concurrent_leases(self):
+        """Assert that concurrent tests never get the same entity."""
+        self.pool.start()
+        leases = []
+
+        def lease():
+            """Lease an entity."""
+            leases.append(self.pool.lease('thing')['id'])
+
+        threads = [threading.Thread(target=lease) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(leases)), 6)
+
+
+class GetPoolTestCase(TestCase):
+    """Tests for :func:`robottelo.pool.get_pool` and friends."""
+    def setUp(self):  # pylint:disable=C0103
+        """Backup and customize objects."""
+        self.conf_properties = conf.properties.copy()
+        self.kinds = pool.KINDS.copy()
+        self.server = FakeServer()
+        pool.KINDS['thing'] = {'create': self.server.create}
+        pool.close_pool()
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore backed-up objects."""
+        pool.close_pool()
+        conf.properties = self.conf_properties
+        pool.KINDS.clear()
+        pool.KINDS.update(self.kinds)
+
+    def test_configured(self):
+        """Assert that the configured kinds are pooled."""
+        conf.properties['main.pool.kinds'] = 'thing'
+        conf.properties['main.pool.size'] = '3'
+        fixture_pool = pool.get_pool()
+        self.assertIs(pool.get_pool(), fixture_pool)
+        self.assertIn('thing', fixture_pool)
+        with pool.leased('thing') as entity:
+            self.assertIn(entity['id'], (1, 2, 3))
+        self.assertEqual(fixture_pool.stats['leases'], 1)
+
+    def test_not_pooled(self):
+        """Assert that kinds which are not pooled are created."""
+        conf.properties['main.pool.kinds'] = ''
+        with pool.leased('thing') as entity:
+            self.assertEqual(entity, {'id': 1})
+        self.assertEqual(pool.get_pool().stats['leases'], 0)
+
+    def test_unknown(self):
+        """Assert that unknown kinds are rejected."""
+        conf.properties['main.pool.kinds'] = 'unknown'
+        with self.assertRaises(pool.PoolError):
+            pool.get_pool()
@@ -1,10 +1,14 @@
 """Unit tests for module ``robottelo.api.client``."""
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from mock import patch
 from robottelo.api import client
+from robottelo.common import conf
 from unittest import TestCase
 from urllib import urlencode
 import ddt
 import inspect
 import requests
+import threading
 
 
 # (accessing private members) pylint: disable=W0212
@@ -315,3 +319,101 @@ class ArgTestCase(TestCase):
             inspect.getargspec(functions[0]),
             inspect.getargspec(functions[1]),
         )
+
+
+class SessionTestCase(TestCase):
+    """Tests for the pooled sessions."""
+    def setUp(self):  # pylint:disable=C0103
+        """Start with no pooled session."""
+        self.conf_backup = conf.properties.copy()
+        client.close_sessions()
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Close the pooled sessions and restore the config."""
+        client.close_sessions()
+        conf.properties = self.conf_backup
+
+    def test_reuse(self):
+        """The same base URL, credentials and verify share a session."""
+        session = client.get_session(
+            'https://example.com/api/v2/hosts', ('admin', 'pass'), False)
+        self.assertIs(session, client.get_session(
+            'https://example.com/katello/api/v2/products',
+            ['admin', 'pass'],
+            False
+        ))
+        for args in (
+                ('https://example.org/api', ('admin', 'pass'), False),
+                ('http://example.com/api', ('admin', 'pass'), False),
+                ('https://example.com/api', ('other', 'pass'), False),
+                ('https://example.com/api', ('admin', 'pass'), True)):
+            self.assertIsNot(session, client.get_session(*args))
+
+    def test_threads(self):
+        """Threads get their own sessions, sharing the connections."""
+        sessions = []
+        url = 'https://example.com/api'
+
+        def target():
+            """Get a session in a new thread."""
+            sessions.append(client.get_session(url))
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        thread.join()
+        session = client.get_session(url)
+        self.assertIsNot(session, sessions[0])
+        self.assertIs(
+            session.get_adapter(url), sessions[0].get_adapter(url))
+
+    def test_pool_size(self):
+        """The connection pool size is configurable."""
+        conf.properties['main.api.pool_maxsize'] = '3'
+        session = client.get_session('https://example.com/api')
+        adapter = session.get_adapter('https://example.com/api')
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_no_cookies(self):
+        """Cookies set by the server are not sent back."""
+        cookies = []
+
+        class Handler(BaseHTTPRequestHandler):
+            """Set a session cookie and record the cookies received."""
+            def do_GET(self):  # pylint:disable=C0103
+                """Answer a GET request."""
+                cookies.append(self.headers.get('Cookie'))
+                self.send_response(200)
+                self.send_header('Set-Cookie', '_session_id=abc; Path=/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                """Do not log requests."""
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:{0}/api'.format(server.server_port)
+            for _ in range(2):
+                client._call_requests_get(url, auth=('admin', 'pass'))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(cookies, [None, None])
+
+    def test_requests(self):
+        """Requests are sent through the pooled sessions."""
+        with patch.object(requests.Session, 'get') as get:
+            client._call_requests_get(
+                'https://example.com/api', auth=('admin', 'pass'))
+        get.assert_called_once_with(
+            'https://example.com/api', auth=('admin', 'pass'))
+
+    def test_no_pool(self):
+        """Pooling can be turned off."""
+        conf.properties['main.api.pool'] = '0'
+        with patch('requests.get') as get:
+            client._call_requests_get('https://example.com/api')
+        get.assert_called_once_with('https://example.com/api')
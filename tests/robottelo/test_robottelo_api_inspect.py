@@ -1,8 +1,11 @@
 """Unit tests for module ``robottelo.api.inspect``."""
+import shutil
+import tempfile
 import unittest
 
-from mock import patch
+from mock import Mock, patch
 from robottelo.api import inspect
+from robottelo.common import conf
 
 
 MOCK_API_DOC = {
@@ -55,3 +58,114 @@ class ResourceCreateInfoTestCase(unittest.TestCase):
         info = inspect.get_resource_create_info(MOCK_API_DOC)
 
         self.assertEqual(info, RESULT_FOR_MOCK_API_DOC)
+
+
+class ApiDocIndexTestCase(unittest.TestCase):
+    """Tests for class ``ApiDocIndex``."""
+
+    def test_index(self):
+        """Methods and params are indexed by resource and name"""
+        index = inspect.ApiDocIndex(MOCK_API_DOC)
+
+        self.assertEqual(
+            index.method('aresource', 'create')['apis'], ['/an/api/path'])
+        self.assertIsNone(index.method('aresource', 'update'))
+        self.assertEqual(
+            index.param('aresource', 'create', 'param1'), {'name': 'param1'})
+        self.assertIsNone(index.param('other', 'create', 'param1'))
+        self.assertEqual(index.resources_with('create'), ['aresource'])
+
+    def test_index_reused(self):
+        """Indexing the same apidoc again returns the same index"""
+        index = inspect.index_api_doc(MOCK_API_DOC)
+
+        self.assertIs(inspect.index_api_doc(MOCK_API_DOC), index)
+        self.assertIsNot(inspect.index_api_doc({'resources': {}}), index)
+
+
+class ApiDocCacheTestCase(unittest.TestCase):
+    """Tests for the caches of function ``get_api_doc``."""
+
+    def setUp(self):  # pylint:disable=C0103
+        """Configure a temporary cache directory"""
+        self.conf_properties = conf.properties.copy()
+        self.cache_dir = tempfile.mkdtemp()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['main.api.apidoc_cache'] = self.cache_dir
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        inspect._api_docs.clear()  # pylint:disable=W0212
+        self.requests = patch('robottelo.api.inspect.requests').start()
+        self.requests.exceptions = inspect.requests.exceptions
+        self.responses = []
+        self.version = '1.7'
+        self.status_auth = []
+        self.status_code = 200
+        self.requests.get.side_effect = self.get
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``conf.properties`` and remove the cache directory"""
+        patch.stopall()
+        inspect._api_docs.clear()  # pylint:disable=W0212
+        conf.properties = self.conf_properties
+        shutil.rmtree(self.cache_dir)
+
+    def get(self, url, headers=None, **kwargs):  # pylint:disable=W0613
+        """Answer requests like a server at version ``self.version``"""
+        response = Mock(headers={})
+        if url.endswith('/api/status'):
+            self.status_auth.append(kwargs.get('auth'))
+            response.ok = self.status_code == 200
+            response.status_code = self.status_code
+            response.json.return_value = {'version': self.version}
+        elif headers and headers.get('If-None-Match') == self.version:
+            response.status_code = 304
+        else:
+            self.responses.append(url)
+            response.status_code = 200
+            response.headers = {'ETag': self.version}
+            response.json.return_value = {
+                'docs': {'version': self.version, 'resources': {}}}
+        return response
+
+    def test_memory_cache(self):
+        """The apidoc is read once per process"""
+        api_doc = inspect.get_api_doc()
+
+        self.assertIs(inspect.get_api_doc(), api_doc)
+        self.assertEqual(len(self.responses), 1)
+
+    def test_disk_cache(self):
+        """The apidoc is downloaded again only for another server version"""
+        inspect.get_api_doc()
+        inspect._api_docs.clear()  # pylint:disable=W0212
+
+        self.assertEqual(inspect.get_api_doc()['version'], '1.7')
+        self.assertEqual(len(self.responses), 1)
+
+        inspect._api_docs.clear()  # pylint:disable=W0212
+        self.version = '1.8'
+
+        self.assertEqual(inspect.get_api_doc()['version'], '1.8')
+        self.assertEqual(len(self.responses), 2)
+
+    def test_status_auth(self):
+        """The server version is read with the server credentials"""
+        inspect.get_api_doc()
+
+        self.assertEqual(self.status_auth, [('admin', 'changeme')])
+
+    @patch('robottelo.api.inspect.logging')
+    def test_status_error(self, logging):
+        """The status code is logged when the version cannot be read"""
+        self.status_code = 401
+        self.assertEqual(inspect.get_api_doc()['version'], '1.7')
+
+        self.assertIn(401, logging.getLogger().warning.call_args[0])
+
+    def test_no_cache(self):
+        """The apidoc is downloaded every time without caches"""
+        inspect.get_api_doc(use_cache=False)
+        inspect.get_api_doc(use_cache=False)
+
+        self.assertEqual(len(self.responses), 2)
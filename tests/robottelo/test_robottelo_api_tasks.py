@@ -0,0 +1,114 @@
+"""Unit tests for module ``robottelo.api.tasks``."""
+from mock import Mock
+from robottelo.api import client, tasks
+from robottelo.common import conf
+from robottelo.entities import TaskTimeout
+from unittest import TestCase
+import threading
+import time
+
+
+class TaskWaiterTestCase(TestCase):
+    """Tests for :class:`robottelo.api.tasks.TaskWaiter`."""
+    def setUp(self):  # pylint:disable=C0103
+        """Backup, customize and override objects."""
+        self.client_post = client.post
+        self.conf_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+        # Polls left before each task finishes
+        self.pending = {}
+        self.searches = []
+        client.post = Mock(side_effect=self.bulk_search)
+        self.waiter = tasks.TaskWaiter(
+            auth=('user', 'password'), poll_rate=0.01, max_poll_rate=0.05)
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore backed-up objects."""
+        client.post = self.client_post
+        conf.properties = self.conf_properties
+
+    def bulk_search(self, path, data, **_):
+        """Answer a ``bulk_search`` request."""
+        self.assertTrue(path.endswith('/foreman_tasks/api/tasks/bulk_search'))
+        task_ids = [search['task_id'] for search in data['searches']]
+        self.searches.append(task_ids)
+        results = []
+        for task_id in task_ids:
+            self.pending[task_id] -= 1
+            results.append({
+                'search_params': {'search_id': task_id},
+                'results': [{
+                    'id': task_id,
+                    'pending': self.pending[task_id] > 0,
+                    'result': 'success',
+                }],
+            })
+        response = Mock()
+        response.json.return_value = results
+        return response
+
+    def test_wait(self):
+        """Assert that tasks are polled together until they finish."""
+        self.pending.update({'a': 1, 'b': 3, 'c': 2})
+        results = self.waiter.wait(['a', 'b', 'c'])
+        self.assertEqual([task['id'] for task in results], ['a', 'b', 'c'])
+        self.assertEqual(self.waiter.requests, 3)
+        self.assertEqual(
+            [sorted(search) for search in self.searches],
+            [['a', 'b', 'c'], ['b', 'c'], ['b']]
+        )
+
+    def test_callback(self):
+        """Assert that callbacks are called when their task finishes."""
+        self.pending['a'] = 2
+        finished = threading.Event()
+        future = self.waiter.add('a', callback=lambda _: finished.set())
+        self.assertTrue(finished.wait(5))
+        self.assertTrue(future.done())
+        self.assertEqual(future.result()['id'], 'a')
+        called = []
+        future.add_done_callback(called.append)
+        self.assertEqual(called, [future])
+
+    def test_timeout(self):
+        """Assert that unfinished tasks time out."""
+        self.pending['a'] = 1000
+        future = self.waiter.add('a', timeout=0.1)
+        with self.assertRaises(TaskTimeout):
+            future.result(5)
+
+    def test_backoff(self):
+        """Assert that the interval grows while no task finishes."""
+        # (protected-access) pylint:disable=W0212
+        future = tasks.TaskFuture('a')
+        self.waiter._tasks['a'] = [(future, time.time() + 60)]
+        self.waiter._settle({})
+        self.assertAlmostEqual(self.waiter._delay, 0.015)
+        for _ in range(5):
+            self.waiter._settle({'a': {'id': 'a', 'pending': True}})
+        self.assertAlmostEqual(self.waiter._delay, 0.05)
+        self.waiter._settle({'a': {'id': 'a', 'pending': False}})
+        self.assertAlmostEqual(self.waiter._delay, 0.01)
+        self.assertTrue(future.done())
+
+    def test_poll_error(self):
+        """Assert that polling goes on after a failed request."""
+        self.pending['a'] = 1
+        calls = []
+
+        def post(*args, **kwargs):
+            """Fail once, then answer the requests."""
+            calls.append(args)
+            if len(calls) == 1:
+                raise ValueError
+            return self.bulk_search(*args, **kwargs)
+
+        client.post = Mock(side_effect=post)
+        self.assertEqual(self.waiter.wait(['a'])[0]['id'], 'a')
+        self.assertEqual(len(calls), 2)
+
+    def test_shared_waiter(self):
+        """Assert that callers with the same credentials share a waiter."""
+        auth = ('user', 'password')
+        self.assertIs(tasks.get_waiter(auth), tasks.get_waiter(auth))
+        self.assertIsNot(tasks.get_waiter(auth), tasks.get_waiter())
@@ -1,8 +1,10 @@
 """Unit tests for module ``robottelo.api.utils``."""
 from fauxfactory import FauxFactory
 from robottelo.api import utils
+from robottelo.common import conf
 from sys import version_info
 from unittest import TestCase
+import mock
 
 
 class MockResponse(object):
@@ -49,3 +51,165 @@ class StatusCodeErrorTestCase(TestCase):
             self.assertIsInstance(msg, unicode)
         else:
             self.assertIsInstance(msg, str)
+
+
+class PaginateTestCase(TestCase):
+    """Tests for :func:`robottelo.api.utils.paginate`."""
+    def setUp(self):
+        self.records = range(25)
+        self.pages = []
+
+    def fetch(self, page, per_page):
+        """Return a page of ``self.records`` and record its number."""
+        self.pages.append(page)
+        start = (page - 1) * per_page
+        return {
+            'total': len(self.records),
+            'results': self.records[start:start + per_page],
+        }
+
+    def test_pages(self):
+        """Every record is yielded, in order, from as few pages as needed."""
+        for prefetch in (False, True):
+            self.pages = []
+            self.assertEqual(
+                list(utils.paginate(self.fetch, 10, prefetch)),
+                self.records
+            )
+            self.assertEqual(self.pages, [1, 2, 3])
+
+    def test_full_last_page(self):
+        """No empty page is fetched when the last page is full."""
+        self.records = range(20)
+        self.assertEqual(
+            list(utils.paginate(self.fetch, 10, False)), self.records)
+        self.assertEqual(self.pages, [1, 2])
+
+    def test_no_total(self):
+        """Without a total, stop at the first page which is not full."""
+        def fetch(page, per_page):
+            """Return a page without a total."""
+            response = self.fetch(page, per_page)
+            del response['total']
+            return response
+        self.assertEqual(list(utils.paginate(fetch, 10, False)), self.records)
+        self.assertEqual(self.pages, [1, 2, 3])
+
+    def test_capped_page_size(self):
+        """Pages smaller than asked for do not end the listing."""
+        def fetch(page, per_page):  # pylint:disable=W0613
+            """Return pages of at most 4 records, as a capping server."""
+            return self.fetch(page, 4)
+        self.assertEqual(list(utils.paginate(fetch, 10, False)), self.records)
+        self.assertEqual(self.pages, range(1, 8))
+
+    def test_capped_page_size_no_total(self):
+        """Without a total, the page size reported by the server is used."""
+        def fetch(page, per_page):  # pylint:disable=W0613
+            """Return pages of at most 4 records, and their size."""
+            response = self.fetch(page, 4)
+            del response['total']
+            response['per_page'] = 4
+            return response
+        self.assertEqual(list(utils.paginate(fetch, 10, False)), self.records)
+        self.assertEqual(self.pages, range(1, 8))
+
+    def test_lazy(self):
+        """Pages are only fetched when their records are asked for."""
+        records = utils.paginate(self.fetch, 10, False)
+        self.assertEqual(self.pages, [])
+        self.assertEqual(next(records), 0)
+        self.assertEqual(self.pages, [1])
+
+    def test_prefetch(self):
+        """The next page is fetched while the current one is consumed."""
+        records = utils.paginate(self.fetch, 10, True)
+        self.assertEqual(next(records), 0)
+        records.close()
+        self.assertEqual(self.pages, [1, 2])
+
+    def test_error(self):
+        """Errors raised while prefetching are raised to the consumer."""
+        def fetch(page, per_page):
+            """Fail to fetch the second page."""
+            if page == 2:
+                raise ValueError(page)
+            return self.fetch(page, per_page)
+        records = utils.paginate(fetch, 10, True)
+        self.assertEqual(len([next(records) for _ in range(10)]), 10)
+        with self.assertRaises(ValueError):
+            next(records)
+
+
+class RepositoryContentTestCase(TestCase):
+    """Tests for :func:`robottelo.api.utils.get_packages` and friends."""
+    def setUp(self):  # pylint:disable=C0103
+        """Back up and configure ``conf.properties``."""
+        self.conf_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``conf.properties``."""
+        conf.properties = self.conf_properties
+
+    @staticmethod
+    def package(name, release='1'):
+        """Return a package as listed by the server."""
+        return {'name': name, 'version': '1.0', 'release': release,
+                'arch': 'noarch', 'id': name + release}
+
+    def responses(self, *pages):
+        """Return a mock response returning each page in turn."""
+        response = mock.Mock()
+        total = sum(len(page) for page in pages)
+        response.json.side_effect = [
+            {'total': total, 'results': page} for page in pages]
+        return response
+
+    def test_get_packages(self):
+        """Every page of packages is fetched."""
+        packages = [self.package(name) for name in 'abc']
+        with mock.patch.object(utils.client, 'get') as get:
+            get.return_value = self.responses(packages[:2], packages[2:])
+            self.assertEqual(
+                list(utils.get_packages(1, per_page=2, prefetch=False)),
+                packages
+            )
+        self.assertEqual(get.call_count, 2)
+        self.assertTrue(
+            get.call_args[0][0].endswith('repositories/1/packages'))
+        self.assertEqual(
+            get.call_args[1]['params'], {'page': 2, 'per_page': 2})
+
+    def test_get_errata_error(self):
+        """An error response raises ``RepositoryErrataException``."""
+        with mock.patch.object(utils.client, 'get') as get:
+            get.return_value.json.return_value = {'errors': ['not found']}
+            with self.assertRaises(utils.RepositoryErrataException):
+                list(utils.get_errata(1, prefetch=False))
+
+    def test_diff_packages(self):
+        """Packages are compared by NVRA."""
+        first = self.responses(
+            [self.package('a'), self.package('b'), self.package('c')])
+        second = self.responses(
+            [self.package('b'), self.package('c', '2'), self.package('d')])
+        with mock.patch.object(utils.client, 'get') as get:
+            get.side_effect = [first, second]
+            diff = utils.diff_packages(1, 2)
+        self.assertEqual(diff.only_first, set([
+            ('a', '1.0', '1', 'noarch'), ('c', '1.0', '1', 'noarch')]))
+        self.assertEqual(diff.only_second, set([
+            ('c', '1.0', '2', 'noarch'), ('d', '1.0', '1', 'noarch')]))
+        self.assertEqual(diff.both, set([('b', '1.0', '1', 'noarch')]))
+
+    def test_diff_content(self):
+        """Any iterables of keys can be compared."""
+        diff = utils.diff_content(
+            ['RHSA-1', 'RHBA-2'], iter(['RHBA-2', 'RHEA-3']))
+        self.assertEqual(diff, (set(['RHSA-1']), set(['RHEA-3']),
+                                set(['RHBA-2'])))
+        self.assertEqual(
+            utils.erratum_id({'id': 'uuid', 'errata_id': 'RHSA-1'}), 'RHSA-1')
@@ -5,6 +5,156 @@ from unittest import TestCase
 import os
 
 
+class MockFile(object):  # (too-few-public-methods) pylint:disable=R0903
+    """A mock ``paramiko.ChannelFile`` object."""
+    def __init__(self, content):
+        self.content = content
+
+    def read(self):
+        """Return the content of this file."""
+        return self.content
+
+
+class MockChannel(object):
+    """A mock ``paramiko.Channel`` object.
+
+    Running a command ``echo <text>`` outputs ``<text>``. Any other command
+    fails with an exit status of 1.
+
+    """
+    def __init__(self):
+        self.cmd = None
+        self.closed = False
+
+    def settimeout(self, timeout):  # pylint:disable=W0613
+        """A no-op stub method."""
+
+    def exec_command(self, cmd):
+        """Record the command to execute."""
+        self.cmd = cmd
+
+    def makefile(self, mode, bufsize):  # pylint:disable=W0613
+        """Return the standard output of the command."""
+        if self.cmd.startswith('echo '):
+            return MockFile(self.cmd[5:])
+        return MockFile('')
+
+    def makefile_stderr(self, mode, bufsize):  # pylint:disable=W0613
+        """Return the standard error of the command."""
+        if self.cmd.startswith('echo '):
+            return MockFile('')
+        return MockFile('unknown command')
+
+    def recv_exit_status(self):
+        """Return the exit status of the command."""
+        return 0 if self.cmd.startswith('echo ') else 1
+
+    def close(self):
+        """Mark this channel as closed."""
+        self.closed = True
+
+
+class MockStreamChannel(MockChannel):
+    """A mock ``paramiko.Channel`` object delivering its output in chunks.
+
+    The command ``seq <n>`` outputs the numbers 1 to n, one per line, each
+    number in its own chunk.
+
+    """
+    def __init__(self):
+        super(MockStreamChannel, self).__init__()
+        self.chunks = []
+        self.received = 0
+
+    def exec_command(self, cmd):
+        """Prepare the output chunks of the command."""
+        super(MockStreamChannel, self).exec_command(cmd)
+        count = int(cmd.split()[1])
+        self.chunks = ['\x1b[1m{0}\x1b[0m\n'.format(i)
+                       for i in range(1, count + 1)]
+        self.chunks.insert(0, '[ INFO] rails\n')
+        # Split a line across two chunks
+        self.chunks.append('fin')
+        self.chunks.append('al')
+
+    def recv_ready(self):
+        """Whether there is output to read."""
+        return len(self.chunks) > 0
+
+    def recv(self, bufsize):  # pylint:disable=W0613
+        """Return the next output chunk, or ``''`` at the end."""
+        self.received += 1
+        return self.chunks.pop(0) if self.chunks else ''
+
+    def recv_stderr_ready(self):  # pylint:disable=R0201
+        """Whether there is standard error to read."""
+        return False
+
+    def recv_stderr(self, bufsize):  # pylint:disable=R0201,W0613
+        """Return ``''``: the command outputs no standard error."""
+        return ''
+
+    def exit_status_ready(self):
+        """Whether the command is done."""
+        return len(self.chunks) == 0
+
+    def recv_exit_status(self):  # pylint:disable=R0201
+        """Return the exit status of the command."""
+        return 0
+
+
+class MockExitedChannel(MockStreamChannel):
+    """A mock ``paramiko.Channel`` object whose exit status is ready before
+    its last output is reported as ready.
+
+    The command ``seq <n>`` outputs the same chunks as
+    :class:`MockStreamChannel`, and ``late error`` on the standard error.
+
+    """
+    def exec_command(self, cmd):
+        """Prepare the output chunks of the command."""
+        super(MockExitedChannel, self).exec_command(cmd)
+        self.stderr_chunks = ['late ', 'error']
+
+    def recv_ready(self):  # pylint:disable=R0201
+        """Whether there is output to read, never known in advance."""
+        return False
+
+    def recv_stderr(self, bufsize):  # pylint:disable=W0613
+        """Return the next standard error chunk, or ``''`` at the end."""
+        return self.stderr_chunks.pop(0) if self.stderr_chunks else ''
+
+    def exit_status_ready(self):  # pylint:disable=R0201
+        """Whether the command is done, right away."""
+        return True
+
+    def recv_exit_status(self):  # pylint:disable=R0201
+        """Return the exit status of the command."""
+        return 1
+
+
+class MockTransport(object):  # (too-few-public-methods) pylint:disable=R0903
+    """A mock ``paramiko.Transport`` object."""
+    channel_class = MockChannel
+
+    def __init__(self):
+        self.active = True
+        self.channels = []
+
+    def open_session(self):
+        """Return a new mock channel."""
+        channel = self.channel_class()
+        self.channels.append(channel)
+        return channel
+
+    def is_active(self):
+        """Return whether this transport is active."""
+        return self.active
+
+    def send_ignore(self):
+        """A no-op stub method."""
+
+
 class MockSSHClient(object):
     """A mock ``paramiko.SSHClient`` object."""
     def __init__(self):
@@ -23,6 +173,11 @@ class MockSSHClient(object):
         self.hostname = None
         self.username = None
         self.key_filename = None
+        self.transport = MockTransport()
+
+    def get_transport(self):
+        """Return the mock transport of this client."""
+        return self.transport
 
     def set_missing_host_key_policy(self, policy):  # pylint:disable=W0613
         """A no-op stub method."""
@@ -85,3 +240,217 @@ class SSHTestCase(TestCase):
         self.assertEqual(connection.close_, 1)
 
         conf.properties = backup
+
+
+class SSHConnectionPoolTestCase(TestCase):
+    """Tests for class ``robottelo.common.ssh.SSHConnectionPool``."""
+    def setUp(self):  # pylint:disable=C0103
+        """Mock ``paramiko.SSHClient`` and create a pool."""
+        # pylint:disable=W0212
+        self.sshclient_backup = ssh._call_paramiko_sshclient
+        ssh._call_paramiko_sshclient = MockSSHClient
+        self.pool = ssh.SSHConnectionPool(idle_timeout=60)
+        self.key = ('example.com', 'nobody', 'key')
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``paramiko.SSHClient``."""
+        ssh._call_paramiko_sshclient = self.sshclient_backup
+
+    def test_reuse(self):
+        """A released connection is handed out again."""
+        with self.pool.connection(*self.key) as connection1:
+            pass
+        with self.pool.connection(*self.key) as connection2:
+            pass
+        self.assertIs(connection1, connection2)
+        self.assertEqual(connection1.connect_, 1)
+        self.assertEqual(connection1.close_, 0)
+        stats = self.pool.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['idle'], 1)
+
+    def test_keyed(self):
+        """Connections are not shared between different keys."""
+        with self.pool.connection(*self.key) as connection1:
+            pass
+        with self.pool.connection('example.org', 'nobody', 'key') as conn2:
+            self.assertEqual(conn2.hostname, 'example.org')
+        self.assertIsNot(connection1, conn2)
+        self.assertEqual(self.pool.stats()['misses'], 2)
+
+    def test_busy(self):
+        """A connection in use is not handed out twice."""
+        with self.pool.connection(*self.key) as connection1:
+            with self.pool.connection(*self.key) as connection2:
+                self.assertIsNot(connection1, connection2)
+        self.assertEqual(self.pool.stats()['idle'], 2)
+
+    def test_reconnect(self):
+        """A dead idle connection is closed and replaced."""
+        with self.pool.connection(*self.key) as connection1:
+            pass
+        connection1.transport.active = False
+        with self.pool.connection(*self.key) as connection2:
+            pass
+        self.assertIsNot(connection1, connection2)
+        self.assertEqual(connection1.close_, 1)
+        self.assertEqual(self.pool.stats()['reconnects'], 1)
+
+    def test_idle_timeout(self):
+        """Connections idle for too long are evicted."""
+        self.pool.idle_timeout = -1
+        with self.pool.connection(*self.key) as connection1:
+            pass
+        with self.pool.connection(*self.key) as connection2:
+            pass
+        self.assertIsNot(connection1, connection2)
+        self.assertEqual(connection1.close_, 1)
+        self.assertEqual(self.pool.stats()['evictions'], 1)
+
+    def test_error_closes(self):
+        """A connection is closed, not reused, if its user raised."""
+        with self.assertRaises(ValueError):
+            with self.pool.connection(*self.key) as connection:
+                raise ValueError()
+        self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+    def test_close_all(self):
+        """``close_all`` closes every idle connection."""
+        with self.pool.connection(*self.key) as connection:
+            pass
+        self.pool.close_all()
+        self.assertEqual(connection.close_, 1)
+        self.assertEqual(self.pool.stats()['idle'], 0)
+
+
+class PooledSSHTestCase(TestCase):
+    """Base class for tests running commands through a mock pool."""
+    def setUp(self):  # pylint:disable=C0103
+        """Mock ``paramiko.SSHClient`` and use a fresh connection pool."""
+        # pylint:disable=W0212
+        self.sshclient_backup = ssh._call_paramiko_sshclient
+        self.pool_backup = ssh._pool
+        self.conf_backup = conf.properties.copy()
+        ssh._call_paramiko_sshclient = MockSSHClient
+        ssh._pool = ssh.SSHConnectionPool()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['main.server.ssh.username'] = 'nobody'
+        conf.properties['main.server.ssh.key_private'] = 'key'
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore ``paramiko.SSHClient``, the pool and the config."""
+        # pylint:disable=W0212
+        ssh._call_paramiko_sshclient = self.sshclient_backup
+        ssh._pool = self.pool_backup
+        conf.properties = self.conf_backup
+
+
+class CommandManyTestCase(PooledSSHTestCase):
+    """Tests for function ``robottelo.common.ssh.command_many``."""
+    def test_results_in_order(self):
+        """One result per command is returned, in input order."""
+        cmds = ['echo {0}'.format(i) for i in range(20)]
+        results = ssh.command_many(cmds, max_parallel=4)
+        self.assertEqual(
+            [result.stdout for result in results],
+            [[unicode(i)] for i in range(20)]
+        )
+        self.assertTrue(all(result.return_code == 0 for result in results))
+
+    def test_one_transport(self):
+        """All commands run on channels of a single connection."""
+        ssh.command_many(['echo a', 'echo b', 'echo c'])
+        stats = ssh.pool_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['idle'], 1)
+        # pylint:disable=W0212
+        client = ssh._pool._idle.values()[0][0][0]
+        self.assertEqual(len(client.transport.channels), 3)
+        self.assertTrue(
+            all(channel.closed for channel in client.transport.channels))
+
+    def test_failed_command(self):
+        """A failed command reports its exit status and standard error."""
+        results = ssh.command_many(['echo a', 'false'])
+        self.assertEqual(results[0].return_code, 0)
+        self.assertEqual(results[1].return_code, 1)
+        self.assertEqual(results[1].stderr, 'unknown command')
+
+    def test_no_commands(self):
+        """No connection is opened when there is nothing to run."""
+        self.assertEqual(ssh.command_many([]), [])
+        self.assertEqual(ssh.pool_stats()['misses'], 0)
+
+
+class CommandStreamTestCase(PooledSSHTestCase):
+    """Tests for function ``robottelo.common.ssh.command_stream``."""
+    def setUp(self):  # pylint:disable=C0103
+        """Make the mock transport use streaming channels."""
+        super(CommandStreamTestCase, self).setUp()
+        self.channel_class_backup = MockTransport.channel_class
+        MockTransport.channel_class = MockStreamChannel
+
+    def tearDown(self):  # pylint:disable=C0103
+        """Restore the mock transport channel class."""
+        super(CommandStreamTestCase, self).tearDown()
+        MockTransport.channel_class = self.channel_class_backup
+
+    def test_lines(self):
+        """Lines are cleaned up, and those split across chunks joined."""
+        stream = ssh.command_stream('seq 3')
+        self.assertEqual(list(stream), [u'1', u'2', u'3', u'final'])
+        self.assertEqual(stream.return_code, 0)
+        self.assertEqual(ssh.pool_stats()['idle'], 1)
+
+    def test_raw(self):
+        """Raw lines are not filtered."""
+        lines = list(ssh.command_stream('seq 1', raw=True))
+        self.assertEqual(lines, [u'[ INFO] rails', u'1', u'final'])
+
+    def test_output_after_exit(self):
+        """Output arriving along with the exit status is not lost."""
+        MockTransport.channel_class = MockExitedChannel
+        stream = ssh.command_stream('seq 3')
+        self.assertEqual(list(stream), [u'1', u'2', u'3', u'final'])
+        self.assertEqual(stream.return_code, 1)
+        self.assertEqual(stream.stderr, 'late error')
+
+    def test_lazy(self):
+        """Output is read as it is consumed."""
+        lines = iter(ssh.command_stream('seq 100'))
+        self.assertEqual(next(lines), u'1')
+        # pylint:disable=W0212
+        client = ssh._pool._idle.get(('example.com', 'nobody', 'key'))
+        self.assertIsNone(client)
+        lines.close()
+        client = ssh._pool._idle.values()[0][0][0]
+        channel = client.transport.channels[0]
+        self.assertTrue(channel.closed)
+        self.assertLess(channel.received, 5)
+
+
+class CommandResultTestCase(TestCase):
+    """Tests for function ``robottelo.common.ssh._command_result``."""
+    def test_csv(self):
+        """Quoted CSV values are left for the CSV parser to handle."""
+        # pylint:disable=W0212
+        result = ssh._command_result(
+            'Id,Name\n1,""\n2,"a ""b"", c"\n', '', 0, True)
+        self.assertEqual(
+            result.stdout,
+            [{'id': '1', 'name': ''}, {'id': '2', 'name': 'a "b", c'}]
+        )
+
+    def test_text(self):
+        """Empty values are removed from the output which is not CSV."""
+        # pylint:disable=W0212
+        result = ssh._command_result('Name: ""\n', '', 0, False)
+        self.assertEqual(result.stdout, [u'Name: ', u''])
+
+    def test_json(self):
+        """Empty JSON strings are left as is."""
+        # pylint:disable=W0212
+        result = ssh._command_result('{\n  "Name": ""\n}\n', '', 0, False)
+        self.assertEqual(result.stdout, [u'{', u'  "Name": ""', u'}', u''])